@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI看线 - 性能基准测试
+
+使用回放数据源离线测量各组件的吞吐量，不依赖网络:
+
+    # 从AKShare录制回放数据
+    python benchmark.py record --symbols 000001 600519
+
+    # 或生成随机游走的合成数据
+    python benchmark.py synth --count 50
+
+    # 测量 数据获取 -> 技术指标 -> 图表 流程的吞吐量
+    python benchmark.py pipeline --fixtures ./fixtures --latency 0.05
+
+    # 对比10年日线上逐行循环与向量化KDJ的耗时
+    python benchmark.py kdj
+
+    # 对比逐只计算与面板一次性计算全市场技术指标的耗时和结果（含停牌股票）
+    python benchmark.py panel --count 2000 --days 250
+
+    # 对比每根新K线全量重算与增量更新技术指标的耗时
+    python benchmark.py stream
+
+    # 测量共用中间结果（均线、涨跌幅）前后单只股票计算全部指标的CPU耗时
+    python benchmark.py indicators
+
+    # 测量全市场面板上参数网格回测的耗时（默认1000只股票 × 50组均线参数），并检查停牌期间的收益计算
+    python benchmark.py backtest --workers 4
+
+    # 对比各渲染配置（print/web/llm）的图表渲染耗时、文件大小和base64编码耗时
+    python benchmark.py render
+
+    # 对比单进程逐张生成与多进程渲染服务批量生成图表的耗时
+    python benchmark.py charts --count 32 --workers 4
+"""
+
+import os
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules.data_sources import (
+    AkshareDataSource, ReplayDataSource, RecordingDataSource, set_default_data_source
+)
+from modules.symbol_info import configure_symbol_info_cache
+
+
+def make_synthetic_hist(symbol, days, seed=None):
+    """
+    生成随机游走的日线数据，列名与 ak.stock_zh_a_hist 一致
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=datetime.now().date(), periods=days)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    open_ = close * (1 + rng.normal(0, 0.01, days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, days))
+    volume = rng.integers(10_000, 1_000_000, days)
+    return pd.DataFrame({
+        '日期': dates.strftime('%Y-%m-%d'),
+        '股票代码': symbol,
+        '开盘': open_.round(2),
+        '收盘': close.round(2),
+        '最高': high.round(2),
+        '最低': low.round(2),
+        '成交量': volume,
+        '成交额': (volume * close * 100).round(2),
+        '振幅': ((high - low) / close * 100).round(2),
+        '涨跌幅': (pd.Series(close).pct_change().fillna(0) * 100).round(2).values,
+        '涨跌额': pd.Series(close).diff().fillna(0).round(2).values,
+        '换手率': rng.uniform(0.1, 5, days).round(2),
+    })
+
+
+def cmd_record(args):
+    """从AKShare录制回放数据"""
+    source = RecordingDataSource(AkshareDataSource(), args.fixtures)
+    end_date = datetime.now().strftime('%Y%m%d')
+    start_date = (datetime.now() - timedelta(days=args.days)).strftime('%Y%m%d')
+    for symbol in args.symbols:
+        print(f"录制 {symbol} ...")
+        source.stock_hist(symbol, start_date, end_date)
+        source.individual_info(symbol)
+        source.financial_abstract(symbol)
+        source.stock_news(symbol)
+    source.trade_dates()
+    print(f"✅ 回放数据已保存至: {args.fixtures}")
+
+
+def cmd_synth(args):
+    """生成合成回放数据"""
+    for kind in ('hist', 'info'):
+        os.makedirs(os.path.join(args.fixtures, kind), exist_ok=True)
+    for i in range(args.count):
+        symbol = f"{600000 + i:06d}"
+        make_synthetic_hist(symbol, args.days, seed=i).to_csv(
+            os.path.join(args.fixtures, 'hist', f"{symbol}.csv"), index=False)
+        pd.DataFrame({'item': ['股票代码', '股票简称'], 'value': [symbol, f"合成{symbol}"]}).to_csv(
+            os.path.join(args.fixtures, 'info', f"{symbol}.csv"), index=False)
+    print(f"✅ 已生成 {args.count} 只股票的合成数据: {args.fixtures}")
+
+
+def cmd_pipeline(args):
+    """测量 数据获取 -> 技术指标 -> 图表 流程的吞吐量"""
+    from modules.data_fetcher import StockDataFetcher
+    from modules.technical_analyzer import TechnicalAnalyzer
+    from modules.visualizer import Visualizer
+
+    set_default_data_source(ReplayDataSource(args.fixtures, latency=args.latency))
+    configure_symbol_info_cache(persist_path=None)
+
+    symbols = sorted(name[:-4] for name in os.listdir(os.path.join(args.fixtures, 'hist')))
+    if args.limit:
+        symbols = symbols[:args.limit]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_fetcher = StockDataFetcher(data_dir=os.path.join(work_dir, 'data'), use_store=not args.no_store)
+        technical_analyzer = TechnicalAnalyzer()
+        visualizer = Visualizer() if args.charts else None
+
+        timings = {'fetch': [], 'indicators': [], 'charts': []}
+        start = time.perf_counter()
+        for symbol in symbols:
+            t0 = time.perf_counter()
+            stock_data = data_fetcher.fetch_stock_data(symbol, args.period)
+            t1 = time.perf_counter()
+            indicators = technical_analyzer.calculate_indicators(stock_data)
+            t2 = time.perf_counter()
+            timings['fetch'].append(t1 - t0)
+            timings['indicators'].append(t2 - t1)
+            if visualizer is not None:
+                visualizer.create_charts(stock_data, indicators, symbol, os.path.join(work_dir, 'output'))
+                timings['charts'].append(time.perf_counter() - t2)
+        elapsed = time.perf_counter() - start
+
+    print(f"股票数量: {len(symbols)}, 总耗时: {elapsed:.2f}s, 吞吐量: {len(symbols) / elapsed:.1f} 只/秒")
+    for stage, values in timings.items():
+        if values:
+            print(f"  {stage:<12} 平均 {np.mean(values) * 1000:8.2f} ms  P95 {np.percentile(values, 95) * 1000:8.2f} ms")
+
+
+def kdj_loop_reference(data, n=9, m1=3, m2=3):
+    """
+    原逐行循环实现的KDJ，作为向量化实现的对照基准
+    """
+    low_min = data['low'].rolling(window=n).min()
+    high_max = data['high'].rolling(window=n).max()
+    rsv = (100 * ((data['close'] - low_min) / (high_max - low_min))).fillna(50)
+
+    k = pd.Series(0.0, index=data.index)
+    d = pd.Series(0.0, index=data.index)
+    j = pd.Series(0.0, index=data.index)
+    for i in range(len(data)):
+        if i == 0:
+            k[i] = 50
+            d[i] = 50
+        else:
+            k[i] = (m1 - 1) * k[i-1] / m1 + rsv[i] / m1
+            d[i] = (m2 - 1) * d[i-1] / m2 + k[i] / m2
+        j[i] = 3 * k[i] - 2 * d[i]
+    return {'K': k, 'D': d, 'J': j}
+
+
+def load_benchmark_data(days):
+    """
+    生成统一列名的合成日线数据
+    """
+    hist = make_synthetic_hist('600000', days, seed=0)
+    return pd.DataFrame({
+        'date': pd.to_datetime(hist['日期']),
+        'open': hist['开盘'],
+        'close': hist['收盘'],
+        'high': hist['最高'],
+        'low': hist['最低'],
+        'volume': hist['成交量'],
+    })
+
+
+def time_call(func, repeat):
+    """
+    返回多次调用中的最短耗时（秒）
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cmd_kdj(args):
+    """对比逐行循环与向量化KDJ的耗时和结果"""
+    from modules.technical_analyzer import TechnicalAnalyzer
+
+    data = load_benchmark_data(args.days)
+    analyzer = TechnicalAnalyzer()
+
+    loop_time = time_call(lambda: kdj_loop_reference(data), args.repeat)
+    vector_time = time_call(lambda: analyzer._calculate_kdj(data), args.repeat)
+
+    expected = kdj_loop_reference(data)
+    actual = analyzer._calculate_kdj(data)
+    max_diff = max((expected[key] - actual[key]).abs().max() for key in ('K', 'D', 'J'))
+
+    print(f"KDJ ({len(data)} 根日线)")
+    print(f"  逐行循环: {loop_time * 1000:9.2f} ms")
+    print(f"  向量化:   {vector_time * 1000:9.2f} ms  (加速 {loop_time / vector_time:.0f}x)")
+    print(f"  最大误差: {max_diff:.2e}")
+
+
+def cmd_panel(args):
+    """对比逐只计算与面板一次性计算技术指标的耗时和结果"""
+    from modules.technical_analyzer import TechnicalAnalyzer
+    from modules.panel_indicators import PanelIndicatorEngine
+
+    frames = {}
+    for i in range(args.count):
+        symbol = f"{600000 + i:06d}"
+        hist = make_synthetic_hist(symbol, args.days, seed=i)
+        frames[symbol] = pd.DataFrame({
+            'date': pd.to_datetime(hist['日期']),
+            'open': hist['开盘'],
+            'close': hist['收盘'],
+            'high': hist['最高'],
+            'low': hist['最低'],
+            'volume': hist['成交量'],
+        })
+    panel = {
+        name: pd.DataFrame({symbol: frame[name].to_numpy() for symbol, frame in frames.items()})
+        for name in ('close', 'high', 'low', 'volume')
+    }
+
+    # 每10只股票中有一只在区间中部停牌5天，检查停牌股票与去掉停牌日后逐只计算的结果一致
+    gap = np.arange(args.days // 3, args.days // 3 + 5)
+    for symbol in list(frames)[::10]:
+        for values in panel.values():
+            values.loc[gap, symbol] = np.nan
+        frames[symbol] = frames[symbol].drop(index=gap).reset_index(drop=True)
+
+    analyzer = TechnicalAnalyzer()
+    engine = PanelIndicatorEngine()
+
+    start = time.perf_counter()
+    expected = {symbol: analyzer.calculate_indicators(frame) for symbol, frame in frames.items()}
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel_indicators = engine.calculate(panel['close'], panel['high'], panel['low'], panel['volume'])
+    panel_time = time.perf_counter() - start
+
+    max_diff = 0.0
+    gap_diff = 0.0
+    for symbol, indicators in expected.items():
+        actual = engine.symbol_indicators(panel_indicators, symbol)
+        for name, values in indicators.items():
+            diff = ((values - actual[name]).abs() / values.abs().clip(lower=1)).max()
+            if pd.notna(diff):
+                max_diff = max(max_diff, diff)
+        if len(actual['K']) < args.days:
+            gap_diff = max(gap_diff, max((indicators[name] - actual[name]).abs().max() for name in ('K', 'D', 'J')))
+
+    print(f"技术指标 ({args.count} 只股票 × {args.days} 根日线)")
+    print(f"  逐只计算: {loop_time * 1000:9.2f} ms")
+    print(f"  面板计算: {panel_time * 1000:9.2f} ms  (加速 {loop_time / panel_time:.0f}x)")
+    print(f"  最大相对误差: {max_diff:.2e}")
+    print(f"  停牌股票KDJ最大误差: {gap_diff:.2e}")
+    assert gap_diff < 1e-6, f"停牌股票的KDJ与逐只计算不一致: {gap_diff}"
+
+
+def cmd_stream(args):
+    """对比每根新K线全量重算与增量更新技术指标的耗时和结果"""
+    from modules.technical_analyzer import TechnicalAnalyzer
+    from modules.incremental_indicators import IncrementalIndicatorCalculator
+
+    data = load_benchmark_data(args.days + args.bars)
+    history, new_bars = data.iloc[:args.days], data.iloc[args.days:]
+    bars = new_bars[['date', 'high', 'low', 'close', 'volume']].to_dict('records')
+    analyzer = TechnicalAnalyzer()
+
+    start = time.perf_counter()
+    for i in range(len(bars)):
+        expected = analyzer.calculate_indicators(data.iloc[:args.days + i + 1])
+    full_time = (time.perf_counter() - start) / len(bars)
+
+    calculator = IncrementalIndicatorCalculator.from_history(history)
+    start = time.perf_counter()
+    for bar in bars:
+        actual = calculator.update(bar)
+    stream_time = (time.perf_counter() - start) / len(bars)
+
+    max_diff = max(abs(expected[name].iloc[-1] - value) / max(1, abs(value))
+                   for name, value in actual.items() if not np.isnan(value))
+
+    print(f"每根新K线（已有 {args.days} 根历史日线）")
+    print(f"  全量重算: {full_time * 1000:9.3f} ms")
+    print(f"  增量更新: {stream_time * 1000:9.3f} ms  (加速 {full_time / stream_time:.0f}x)")
+    print(f"  最大相对误差: {max_diff:.2e}")
+
+
+def cmd_indicators(args):
+    """对比共用中间结果与各指标独立计算时，单只股票计算全部技术指标的CPU耗时"""
+    from modules.technical_analyzer import TechnicalAnalyzer, default_registry
+
+    # 去掉依赖声明后，各指标函数会自行重新计算均线和涨跌幅
+    unshared = default_registry.copy()
+    for spec in unshared.specs():
+        if spec.depends:
+            unshared.register(spec.name, spec.func, spec.params, None, spec.outputs, spec.public)
+
+    data = load_benchmark_data(args.days)
+    timings = {}
+    for label, registry in (('独立计算', unshared), ('共用中间结果', default_registry)):
+        analyzer = TechnicalAnalyzer(registry)
+        analyzer.calculate_indicators(data)
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.process_time()
+            for _ in range(args.number):
+                analyzer.calculate_indicators(data)
+            best = min(best, (time.process_time() - start) / args.number)
+        timings[label] = best
+
+    print(f"单只股票全部技术指标 ({args.days} 根日线)")
+    for label, value in timings.items():
+        print(f"  {label:<8} {value * 1000:8.3f} ms CPU")
+    saved = 1 - timings['共用中间结果'] / timings['独立计算']
+    print(f"  节省: {saved:.0%}")
+
+
+def cmd_backtest(args):
+    """测量在全市场面板上回测均线交叉参数网格的耗时"""
+    from modules.data_store import StockDataStore
+    from modules.universe_panel import UniversePanel
+    from modules.backtest import VectorizedBacktester
+
+    fast = [5, 10, 15, 20, 25]
+    slow = list(range(30, 30 + 10 * (args.combos // len(fast)), 10))
+    grid = {'fast': fast, 'slow': slow}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = StockDataStore(tmp_dir)
+        for i in range(args.count):
+            symbol = f"{600000 + i:06d}"
+            hist = make_synthetic_hist(symbol, args.days, seed=i)
+            store.save(symbol, pd.DataFrame({
+                'date': pd.to_datetime(hist['日期']),
+                'open': hist['开盘'],
+                'close': hist['收盘'],
+                'high': hist['最高'],
+                'low': hist['最低'],
+                'volume': hist['成交量'],
+            }), {})
+        panel_dir = os.path.join(tmp_dir, 'panel')
+        UniversePanel.build(store, panel_dir)
+
+        backtester = VectorizedBacktester()
+        start = time.perf_counter()
+        results = backtester.run_grid(
+            panel_dir,
+            'cross_above(ma(close, {fast}), ma(close, {slow}))',
+            'cross_below(ma(close, {fast}), ma(close, {slow}))',
+            grid, max_workers=args.workers,
+        )
+        elapsed = time.perf_counter() - start
+
+    combos = len(results)
+    print(f"参数网格回测 ({args.count} 只股票 × {args.days} 根日线 × {combos} 组参数, {args.workers or os.cpu_count()} 个进程)")
+    print(f"  总耗时:     {elapsed:9.2f} s")
+    print(f"  每组参数:   {elapsed / combos * 1000:9.2f} ms")
+    print(f"  每只股票每组: {elapsed / combos / args.count * 1e6:7.2f} us")
+    best = results.sort_values('mean_return', ascending=False).head(5)
+    print(best.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+    result = check_backtest_suspension()
+    print(f"  停牌回归检查: 总收益 {result['total_return']:.2%}，最大回撤 {result['max_drawdown']:.2%}（预期均为 -50.00%）")
+
+
+def check_backtest_suspension():
+    """
+    回归检查：持仓期间停牌，复牌后的价格变化需计入收益和回撤
+
+    价格 10 时入场，停牌两天后以 5 复牌，总收益和最大回撤应为 -50%。
+    """
+    from modules.backtest import VectorizedBacktester
+
+    close = np.array([[10.0], [10.0], [np.nan], [np.nan], [5.0], [5.0]])
+    variables = {'close': close, 'symbol': np.array(['000001'])}
+    entry = lambda variables: np.arange(len(close))[:, None] == 1
+    exit = lambda variables: np.zeros(close.shape, dtype=bool)
+    result = VectorizedBacktester(fee=0.0).run(variables, entry, exit).iloc[0]
+    assert np.isclose(result['total_return'], -0.5), result
+    assert np.isclose(result['max_drawdown'], -0.5), result
+    return result
+
+
+def cmd_render(args):
+    """对比各渲染配置的静态图渲染耗时、文件大小和上传前的base64编码耗时"""
+    import base64
+    from modules.technical_analyzer import TechnicalAnalyzer
+    from modules.visualizer import Visualizer
+    from modules.render_profiles import RENDER_PROFILES, chart_filename
+
+    configure_symbol_info_cache(persist_path=None)
+    stock_data = load_benchmark_data(args.days)
+    indicators = TechnicalAnalyzer().calculate_indicators(stock_data)
+    visualizer = Visualizer()
+
+    print(f"静态图渲染 ({args.days} 根日线)")
+    print(f"  {'配置':<8}{'像素':>12}{'绘制':>10}{'渲染':>10}{'大小':>10}{'编码':>10}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        chart_dir = os.path.join(work_dir, 'charts')
+        os.makedirs(chart_dir)
+        for profile, spec in RENDER_PROFILES.items():
+            visualizer._create_matplotlib_charts(stock_data, indicators, 'bench', 'bench', chart_dir,
+                                                 profiles=(profile,))
+            path = os.path.join(chart_dir, chart_filename('bench', profile))
+            with open(path, 'rb') as f:
+                content = f.read()
+            encode = time_call(lambda: base64.b64encode(content), args.repeat)
+            width, height = (int(size * spec['dpi']) for size in spec['figsize'])
+            times = visualizer.render_times
+            print(f"  {profile:<8}{f'{width}×{height}':>12}{times['figure']:>9.2f}s{times[profile]:>9.2f}s"
+                  f"{len(content) / 1024:>8.0f}KB{encode * 1000:>8.1f}ms")
+
+
+def cmd_charts(args):
+    """对比单进程逐张生成与 ChartRenderPool 多进程批量生成图表的耗时"""
+    from modules.technical_analyzer import TechnicalAnalyzer
+    from modules.visualizer import Visualizer
+    from modules.render_pool import ChartRenderPool
+
+    configure_symbol_info_cache(persist_path=None)
+    technical_analyzer = TechnicalAnalyzer()
+    jobs = []
+    for i in range(args.count):
+        symbol = f"{600000 + i:06d}"
+        hist = make_synthetic_hist(symbol, args.days, seed=i)
+        stock_data = pd.DataFrame({
+            'date': pd.to_datetime(hist['日期']),
+            'open': hist['开盘'],
+            'close': hist['收盘'],
+            'high': hist['最高'],
+            'low': hist['最低'],
+            'volume': hist['成交量'],
+        })
+        jobs.append((symbol, stock_data, technical_analyzer.calculate_indicators(stock_data)))
+    profiles = tuple(args.profiles)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        visualizer = Visualizer()
+        start = time.perf_counter()
+        for symbol, stock_data, indicators in jobs:
+            visualizer.create_charts(stock_data, indicators, symbol, os.path.join(work_dir, 'serial'),
+                                     profiles=profiles)
+        serial = time.perf_counter() - start
+
+        with ChartRenderPool(max_workers=args.workers, profiles=profiles) as pool:
+            # 先完成一批任务使各进程完成初始化，只测量常驻进程的吞吐量
+            list(pool.render_many(jobs[:args.workers or os.cpu_count()], os.path.join(work_dir, 'warmup')))
+            start = time.perf_counter()
+            results = list(pool.render_many(jobs, os.path.join(work_dir, 'pool')))
+            pooled = time.perf_counter() - start
+
+    failed = sum(1 for _, paths in results if not paths)
+    print(f"批量生成图表 ({args.count} 只股票 × {args.days} 根日线, 渲染配置 {', '.join(profiles)})")
+    print(f"  单进程逐张:   {serial:8.2f} s  ({args.count / serial:.2f} 张/秒)")
+    print(f"  {args.workers or os.cpu_count()} 个渲染进程: {pooled:8.2f} s  ({args.count / pooled:.2f} 张/秒)")
+    print(f"  加速比:       {serial / pooled:8.2f}x" + (f"，失败 {failed} 只" if failed else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AI看线 - 性能基准测试')
+    parser.add_argument('--fixtures', type=str, default='./fixtures', help='回放数据目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help='从AKShare录制回放数据')
+    record.add_argument('--symbols', nargs='+', required=True, help='股票代码列表')
+    record.add_argument('--days', type=int, default=3650, help='录制的日线天数')
+    record.set_defaults(func=cmd_record)
+
+    synth = subparsers.add_parser('synth', help='生成合成回放数据')
+    synth.add_argument('--count', type=int, default=50, help='股票数量')
+    synth.add_argument('--days', type=int, default=2520, help='每只股票的交易日数量')
+    synth.set_defaults(func=cmd_synth)
+
+    pipeline = subparsers.add_parser('pipeline', help='测量数据获取、技术指标和图表的吞吐量')
+    pipeline.add_argument('--period', type=str, default='1年', help='分析周期')
+    pipeline.add_argument('--latency', type=float, default=0.0, help='每次数据请求的模拟延迟（秒）')
+    pipeline.add_argument('--limit', type=int, help='最多测试的股票数量')
+    pipeline.add_argument('--charts', action='store_true', help='同时测量图表生成')
+    pipeline.add_argument('--no_store', action='store_true', help='不使用本地K线数据仓库')
+    pipeline.set_defaults(func=cmd_pipeline)
+
+    kdj = subparsers.add_parser('kdj', help='对比逐行循环与向量化KDJ')
+    kdj.add_argument('--days', type=int, default=2520, help='日线数量，默认约10年')
+    kdj.add_argument('--repeat', type=int, default=5, help='重复次数')
+    kdj.set_defaults(func=cmd_kdj)
+
+    panel = subparsers.add_parser('panel', help='对比逐只计算与面板计算技术指标')
+    panel.add_argument('--count', type=int, default=1000, help='股票数量')
+    panel.add_argument('--days', type=int, default=250, help='每只股票的交易日数量')
+    panel.set_defaults(func=cmd_panel)
+
+    stream = subparsers.add_parser('stream', help='对比全量重算与增量更新技术指标')
+    stream.add_argument('--days', type=int, default=2520, help='已有的历史日线数量')
+    stream.add_argument('--bars', type=int, default=50, help='新到达的K线数量')
+    stream.set_defaults(func=cmd_stream)
+
+    indicators = subparsers.add_parser('indicators', help='测量共用中间结果前后技术指标的CPU耗时')
+    indicators.add_argument('--days', type=int, default=250, help='日线数量')
+    indicators.add_argument('--repeat', type=int, default=5, help='重复次数')
+    indicators.add_argument('--number', type=int, default=50, help='每次重复的计算次数')
+    indicators.set_defaults(func=cmd_indicators)
+
+    backtest = subparsers.add_parser('backtest', help='测量参数网格回测的耗时')
+    backtest.add_argument('--count', type=int, default=1000, help='股票数量')
+    backtest.add_argument('--days', type=int, default=1000, help='每只股票的交易日数量')
+    backtest.add_argument('--combos', type=int, default=50, help='参数组合数量（5的倍数）')
+    backtest.add_argument('--workers', type=int, help='进程数，默认为CPU核数')
+    backtest.set_defaults(func=cmd_backtest)
+
+    render = subparsers.add_parser('render', help='对比各渲染配置的图表渲染耗时和文件大小')
+    render.add_argument('--days', type=int, default=250, help='日线数量')
+    render.add_argument('--repeat', type=int, default=5, help='base64编码的重复次数')
+    render.set_defaults(func=cmd_render)
+
+    charts = subparsers.add_parser('charts', help='对比单进程与多进程渲染服务批量生成图表')
+    charts.add_argument('--count', type=int, default=32, help='股票数量')
+    charts.add_argument('--days', type=int, default=250, help='日线数量')
+    charts.add_argument('--workers', type=int, help='渲染进程数，默认为CPU核数')
+    charts.add_argument('--profiles', nargs='+', default=['llm'], help='渲染配置')
+    charts.set_defaults(func=cmd_charts)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
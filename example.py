@@ -3,7 +3,9 @@ from dotenv import load_dotenv
 
 from modules.data_fetcher import StockDataFetcher
 from modules.technical_analyzer import TechnicalAnalyzer
+from modules.indicator_cache import get_default_indicator_cache
 from modules.visualizer import Visualizer
+from modules.render_profiles import DEFAULT_RENDER_PROFILE, LLM_RENDER_PROFILE
 from modules.ai_analyzer import AIAnalyzer
 
 # 加载环境变量
@@ -16,7 +18,7 @@ def analyze_stock(stock_code, period='1年', save_path='./output'):
     
     # 初始化各模块
     data_fetcher = StockDataFetcher()
-    technical_analyzer = TechnicalAnalyzer()
+    technical_analyzer = TechnicalAnalyzer(cache=get_default_indicator_cache())
     visualizer = Visualizer()
     ai_analyzer = AIAnalyzer()
     
@@ -35,7 +37,8 @@ def analyze_stock(stock_code, period='1年', save_path='./output'):
     
     # 生成可视化图表
     print("正在生成K线图和技术指标图...")
-    chart_path = visualizer.create_charts(stock_data, indicators, stock_code, save_path)
+    chart_path = visualizer.create_charts(stock_data, indicators, stock_code, save_path,
+                                          profiles=(DEFAULT_RENDER_PROFILE, LLM_RENDER_PROFILE))
     
     # AI分析预测
     print("正在使用AI分析预测未来走势...")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI看线 - 收盘后全市场日线批量更新
+
+通过一次全市场行情快照请求，为本地数据仓库中的所有股票追加当日K线。
+本地数据缺少交易日或因除权除息需要重新复权的股票，可使用 --backfill 走逐只下载的补齐流程。
+
+    python ingest_daily.py
+    python ingest_daily.py --include_new --backfill
+"""
+
+import argparse
+from dotenv import load_dotenv
+
+from modules.data_fetcher import StockDataFetcher
+
+# 加载环境变量
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AI看线 - 收盘后全市场日线批量更新')
+    parser.add_argument('--data_dir', type=str, default='./data', help='本地数据目录')
+    parser.add_argument('--include_new', action='store_true', help='为本地尚无数据的股票新建数据')
+    parser.add_argument('--backfill', action='store_true', help='对需要补齐的股票逐只下载历史数据')
+    parser.add_argument('--max_workers', type=int, default=8, help='并发线程数')
+    args = parser.parse_args()
+
+    data_fetcher = StockDataFetcher(data_dir=args.data_dir)
+    result = data_fetcher.ingest_daily_snapshot(include_new=args.include_new, max_workers=args.max_workers)
+
+    needs_backfill = result.get('needs_backfill', [])
+    if needs_backfill:
+        if args.backfill:
+            print(f"正在补齐 {len(needs_backfill)} 只股票的历史数据...")
+            for symbol, stock_data in data_fetcher.fetch_many(needs_backfill, max_workers=args.max_workers,
+                                                             show_progress=True):
+                if stock_data.empty:
+                    print(f"❌ {symbol} 补齐失败")
+        else:
+            print(f"⚠️  {len(needs_backfill)} 只股票需要补齐历史数据，可使用 --backfill 参数")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,14 @@ import argparse
 from dotenv import load_dotenv
 
 from modules.data_fetcher import StockDataFetcher
+from modules.timeframes import TIMEFRAMES
 from modules.technical_analyzer import TechnicalAnalyzer
+from modules.indicator_cache import get_default_indicator_cache
 from modules.visualizer import Visualizer
+from modules.render_profiles import RENDER_PROFILES, DEFAULT_RENDER_PROFILE, LLM_RENDER_PROFILE
+from modules.artifact_store import get_default_artifact_store
 from modules.ai_analyzer import AIAnalyzer
+from modules.ai_providers import BaseAIAnalyzer
 
 # 加载环境变量
 load_dotenv()
@@ -17,6 +22,9 @@ def main():
     parser.add_argument('--period', type=str, default='1年', 
                        choices=['1年', '6个月', '3个月', '1个月', '1周'],
                        help='分析周期，默认为1年')
+    parser.add_argument('--timeframe', type=str, default='daily',
+                       choices=TIMEFRAMES,
+                       help='K线周期，周线、月线、季线由日线在本地合成，默认为日线')
     parser.add_argument('--save_path', type=str, default='./output', help='结果保存路径')
     parser.add_argument('--ai_provider', type=str, 
                        choices=['openai', 'siliconflow', 'deepseek', 'gemini', 'auto'],
@@ -25,6 +33,11 @@ def main():
                        help='显示所有AI供应商状态')
     parser.add_argument('--model', type=str, help='指定使用的模型名称')
     parser.add_argument('--temperature', type=float, help='设置温度参数（0.0-1.0）')
+    parser.add_argument('--render_profile', type=str, default=DEFAULT_RENDER_PROFILE,
+                       choices=list(RENDER_PROFILES),
+                       help='保存的技术分析图的渲染配置（print为4800×3600），多模态分析另外使用低分辨率的llm配置')
+    parser.add_argument('--no_chart', action='store_true',
+                       help='不生成图表，只计算各指标的最新值进行纯文本分析')
     
     args = parser.parse_args()
     
@@ -43,8 +56,10 @@ def main():
     
     # 初始化各模块
     data_fetcher = StockDataFetcher()
-    technical_analyzer = TechnicalAnalyzer()
+    technical_analyzer = TechnicalAnalyzer(cache=get_default_indicator_cache())
     visualizer = Visualizer()
+    # 图表和分析结果按输入内容保存，相同输入的再次运行直接复用
+    artifact_store = get_default_artifact_store(os.path.join(args.save_path, 'artifacts'))
     
     # 准备AI分析器参数
     ai_kwargs = {}
@@ -74,7 +89,7 @@ def main():
     try:
         # 获取股票数据
         print(f"正在获取 {args.stock_code} 的历史数据...")
-        stock_data = data_fetcher.fetch_stock_data(args.stock_code, args.period)
+        stock_data = data_fetcher.fetch_stock_data(args.stock_code, args.period, timeframe=args.timeframe)
         
         if stock_data.empty:
             print(f"❌ 未能获取到股票 {args.stock_code} 的数据，请检查股票代码是否正确")
@@ -92,30 +107,52 @@ def main():
         
         # 计算技术指标
         print("正在计算技术指标...")
-        indicators = technical_analyzer.calculate_indicators(stock_data)
-        print(f"✅ 成功计算 {len(indicators)} 个技术指标")
+        if args.no_chart:
+            # 纯文本分析只需要提示词中各指标的最新值，不计算完整序列
+            prompt_indicators = [name for _, name in BaseAIAnalyzer.PROMPT_INDICATORS]
+            indicators = technical_analyzer.calculate_snapshot(stock_data, names=prompt_indicators)
+            print(f"✅ 成功计算 {len(indicators)} 个技术指标的最新值")
+        else:
+            # 按需计算：只有图表和AI分析实际用到的指标才会被计算
+            indicators = technical_analyzer.calculate_indicators(stock_data, lazy=True)
+            print(f"✅ 可用 {len(indicators)} 个技术指标（按需计算）")
         
         # 生成可视化图表
-        print("正在生成K线图和技术指标图...")
-        chart_path = visualizer.create_charts(stock_data, indicators, args.stock_code, args.save_path)
-        print(f"✅ 图表已保存至: {chart_path}")
+        chart_key = None
+        chart_path = None
+        if not args.no_chart:
+            print("正在生成K线图和技术指标图...")
+            profiles = tuple(dict.fromkeys([args.render_profile, LLM_RENDER_PROFILE]))
+            visualizer.render_times = {}
+            chart_key = artifact_store.charts(visualizer, stock_data, indicators, args.stock_code, args.period,
+                                              timeframe=args.timeframe, profiles=profiles,
+                                              registry=technical_analyzer.registry)
+            chart_path = artifact_store.path(chart_key, 'charts')
+            if visualizer.render_times:
+                print(f"✅ 图表已保存至: {chart_path}")
+                print("   渲染耗时: " + "，".join(f"{name} {seconds:.2f}s" for name, seconds in visualizer.render_times.items()))
+            else:
+                print(f"✅ 使用已生成的图表: {chart_path}")
         
         # AI分析预测
         print(f"正在使用 {provider_info['provider_name']} 分析预测未来走势...")
-        analysis_result = ai_analyzer.analyze(
-            stock_data, indicators, financial_data, news_data, args.stock_code, args.save_path
+        analysis_key, analysis_result = artifact_store.analysis(
+            ai_analyzer, stock_data, indicators, financial_data, news_data, args.stock_code, args.period,
+            chart_key=chart_key, timeframe=args.timeframe, registry=technical_analyzer.registry
         )
         
-        # 保存分析结果
-        result_path = os.path.join(args.save_path, f"{args.stock_code}_analysis_result.txt")
-        with open(result_path, 'w', encoding='utf-8') as f:
-            f.write(analysis_result)
-        
-        print(f"✅ AI分析完成，结果已保存至: {result_path}")
+        # 分析结果保存在产物目录中，出错时不保存
+        result_path = artifact_store.path(analysis_key, 'analysis_result.txt') if analysis_key else None
+        if result_path:
+            print(f"✅ AI分析完成，结果已保存至: {result_path}")
+        else:
+            print("❌ AI分析出错，结果未保存")
         
         print(f"\n🎉 分析完成！")
-        print(f"📊 K线图和技术指标图: {chart_path}")
-        print(f"🤖 AI分析结果: {result_path}")
+        if chart_path:
+            print(f"📊 K线图和技术指标图: {chart_path}")
+        if result_path:
+            print(f"🤖 AI分析结果: {result_path}")
         print(f"🔧 使用的AI供应商: {provider_info['provider_name']} ({provider_info['model']})")
         
         # 显示分析结果预览
@@ -9,12 +9,20 @@ from dotenv import load_dotenv
 
 from modules.data_fetcher import StockDataFetcher
 from modules.technical_analyzer import TechnicalAnalyzer
+from modules.indicator_cache import get_default_indicator_cache
 from modules.visualizer import Visualizer
+from modules.render_profiles import LLM_RENDER_PROFILE
+from modules.artifact_store import get_default_artifact_store
 from modules.ai_analyzer import AIAnalyzer
+from modules.single_flight import SingleFlight
+from modules.screener import get_default_screener, DEFAULT_SORT_BY
 
 # Initialize FastMCP server
 mcp = FastMCP("AI-Kline")
 
+# 合并同一只股票的并发分析请求
+analysis_flight = SingleFlight()
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -36,23 +44,62 @@ async def ashare_analysis(symbol: str
         return f"Failed to analyze stock pattern: {str(e)}"
     
 @mcp.tool()
-async def get_ashare_quote(symbol: str, period: str = '1周'
+async def get_ashare_quote(symbol: str, period: str = '1周', timeframe: str = 'daily'
                                    ) -> str:
     """
     获取股票行情数据
     Args:
         symbol: A股股票代码或者指数代码 (股票代码： 000001, 600001, 300001)
         period: 分析周期 (1年, 6个月, 3个月, 1个月, 1周)
+        timeframe: K线周期 (daily, weekly, monthly, quarterly)
     """
     try:
         data_fetcher = StockDataFetcher()
-        stock_data = data_fetcher.fetch_stock_data(symbol, period)
+        stock_data = data_fetcher.fetch_stock_data(symbol, period, timeframe=timeframe)
         analysis_result = stock_data.to_dict()
         return str(analysis_result)
     except Exception as e:
         logger.error(f"Error analyzing stock pattern: {e}")
         return f"Failed to analyze stock pattern: {str(e)}"
 
+@mcp.tool()
+async def get_ashare_chart(symbol: str, period: str = '1年', timeframe: str = 'daily'
+                                   ) -> str:
+    """
+    获取交互式K线图（含均线、布林带和成交量）的完整HTML页面
+    Args:
+        symbol: A股股票代码或者指数代码 (股票代码： 000001, 600001, 300001)
+        period: 分析周期 (1年, 6个月, 3个月, 1个月, 1周)
+        timeframe: K线周期 (daily, weekly, monthly, quarterly)
+    """
+    try:
+        return await run_in_threadpool(chart_html, symbol, period, timeframe)
+    except Exception as e:
+        logger.error(f"Error rendering chart: {e}")
+        return f"Failed to render chart: {str(e)}"
+
+@mcp.tool()
+async def screen_ashare(expression: str, sort_by: str = DEFAULT_SORT_BY, limit: int = 50
+                                   ) -> str:
+    """
+    全市场信号选股，返回满足条件的股票（按 sort_by 降序）
+    Args:
+        expression: 信号表达式，可组合技术指标、价格和预置信号，
+                    例如 "macd_golden_cross and RSI6 < 30"、"close < BOLL_lower or J < 0"；
+                    预置信号: macd_golden_cross, macd_dead_cross, kdj_golden_cross, kdj_oversold, kdj_overbought,
+                    boll_break_lower, boll_break_upper, rsi_oversold, rsi_overbought, ma_bullish, volume_surge
+        sort_by: 排序表达式，默认为相对成交量 (volume / volume_ma5)
+        limit: 最多返回的股票数量
+    """
+    try:
+        result = await run_in_threadpool(get_default_screener().screen, expression,
+                                         sort_by=sort_by, limit=limit)
+        result['date'] = result['date'].dt.strftime('%Y-%m-%d')
+        return result.to_json(orient='records', force_ascii=False)
+    except Exception as e:
+        logger.error(f"Error screening stocks: {e}")
+        return f"Failed to screen stocks: {str(e)}"
+
 @mcp.tool()
 async def get_ashare_news(symbol: str
                                    ) -> str:
@@ -95,12 +142,30 @@ async def run_in_threadpool(func, *args, **kwargs):
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
 
+def chart_html(symbol: str, period: str = '1年', timeframe: str = 'daily') -> str:
+    """
+    在内存中生成交互式K线图HTML，不写文件
+    """
+    data_fetcher = StockDataFetcher()
+    technical_analyzer = TechnicalAnalyzer(cache=get_default_indicator_cache())
+    stock_data = data_fetcher.fetch_stock_data(symbol, period, timeframe=timeframe)
+    if stock_data.empty:
+        return f"未找到股票 {symbol} 的数据"
+    indicators = technical_analyzer.calculate_indicators(stock_data, lazy=True)
+    return Visualizer().create_interactive_chart(stock_data, indicators, symbol, timeframe=timeframe)
+
 def pattern_run(symbol: str, period: str = '1年', save_path: str = './output') -> str:
+    """
+    分析股票，相同股票、周期和保存路径的并发调用共享同一次分析结果
+    """
+    key = (symbol, period, 'auto', os.path.abspath(save_path))
+    return analysis_flight.do(key, _pattern_run, symbol, period, save_path)
 
+def _pattern_run(symbol: str, period: str = '1年', save_path: str = './output') -> str:
     
     # 初始化各模块
     data_fetcher = StockDataFetcher()
-    technical_analyzer = TechnicalAnalyzer()
+    technical_analyzer = TechnicalAnalyzer(cache=get_default_indicator_cache())
     visualizer = Visualizer()
     ai_analyzer = AIAnalyzer()
     
@@ -115,15 +180,21 @@ def pattern_run(symbol: str, period: str = '1年', save_path: str = './output')
     
     # 计算技术指标
     print("正在计算技术指标...")
-    indicators = technical_analyzer.calculate_indicators(stock_data)
+    indicators = technical_analyzer.calculate_indicators(stock_data, lazy=True)
     
     # 生成可视化图表
     print("正在生成K线图和技术指标图...")
-    chart_path = visualizer.create_charts(stock_data, indicators, symbol, save_path)
+    # 图表只作为多模态分析的输入，只渲染llm配置；图表和分析结果按输入内容保存，相同输入直接复用
+    artifact_store = get_default_artifact_store(os.path.join(save_path, 'artifacts'))
+    chart_key = artifact_store.charts(visualizer, stock_data, indicators, symbol, period,
+                                      profiles=(LLM_RENDER_PROFILE,),
+                                      registry=technical_analyzer.registry)
     
     # AI分析预测
     print("正在使用AI分析预测未来走势...")
-    analysis_result = ai_analyzer.analyze(stock_data, indicators, financial_data, news_data, symbol, save_path)
+    _, analysis_result = artifact_store.analysis(ai_analyzer, stock_data, indicators, financial_data, news_data,
+                                                 symbol, period, chart_key=chart_key,
+                                                 registry=technical_analyzer.registry)
 
     return analysis_result 
 
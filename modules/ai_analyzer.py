@@ -2,7 +2,7 @@ import os
 from typing import Dict, Any, List, Optional
 import pandas as pd
 
-from .ai_providers import AIAnalyzerFactory, AIAnalyzerConfig
+from .ai_providers import AIAnalyzerFactory, AIAnalyzerConfig, AnalysisError
 
 class AIAnalyzer:
     """
@@ -64,7 +64,7 @@ class AIAnalyzer:
     
     def analyze(self, stock_data: pd.DataFrame, indicators: Dict[str, Any], 
                financial_data: Dict[str, Any], news_data: List[Dict[str, Any]], 
-               stock_code: str, save_path: str) -> str:
+               stock_code: str, save_path: Optional[str]) -> str:
         """
         分析股票数据并预测未来走势
         
@@ -74,22 +74,40 @@ class AIAnalyzer:
             financial_data: 财务数据
             news_data: 新闻数据
             stock_code: 股票代码
-            save_path: 保存路径
+            save_path: 保存路径，多模态分析使用其中 charts/ 下的图表；为None时不使用图表，只做纯文本分析
             
+        Returns:
+            分析结果文本，分析失败时为错误说明；需要区分成功与失败时使用 analyze_or_raise
+        """
+        try:
+            return self.analyze_or_raise(stock_data, indicators, financial_data, news_data, stock_code, save_path)
+        except AnalysisError as e:
+            return str(e)
+    
+    def analyze_or_raise(self, stock_data: pd.DataFrame, indicators: Dict[str, Any], 
+                         financial_data: Dict[str, Any], news_data: List[Dict[str, Any]], 
+                         stock_code: str, save_path: Optional[str]) -> str:
+        """
+        分析股票数据并预测未来走势，参数同 analyze
+        
         Returns:
             分析结果文本
+            
+        Raises:
+            AnalysisError: 分析器未初始化或分析失败，异常消息与 analyze 返回的错误说明相同
         """
         if not hasattr(self, 'analyzer'):
-            return "错误: AI分析器未正确初始化，请检查API密钥配置"
+            raise AnalysisError("错误: AI分析器未正确初始化，请检查API密钥配置")
         
         try:
             result = self.analyzer.analyze(stock_data, indicators, financial_data, news_data, stock_code, save_path)
-            # 在结果中添加使用的供应商信息
-            provider_name = AIAnalyzerFactory.SUPPORTED_PROVIDERS[self.provider]
-            result += f"\n\n---\n*本分析由 {provider_name} 提供*"
-            return result
         except Exception as e:
-            return f"AI分析过程中出错 ({self.provider}): {str(e)}"
+            raise AnalysisError(f"AI分析过程中出错 ({self.provider}): {str(e)}") from e
+        
+        # 在结果中添加使用的供应商信息
+        provider_name = AIAnalyzerFactory.SUPPORTED_PROVIDERS[self.provider]
+        result += f"\n\n---\n*本分析由 {provider_name} 提供*"
+        return result
     
     def get_provider_info(self) -> Dict[str, str]:
         """
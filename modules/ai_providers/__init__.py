@@ -1,6 +1,6 @@
 # modules/ai_providers/__init__.py
 
-from .base_ai_analyzer import BaseAIAnalyzer
+from .base_ai_analyzer import BaseAIAnalyzer, AnalysisError
 from .ai_factory import AIAnalyzerFactory, AIAnalyzerConfig
 
 # 导入具体的分析器实现
@@ -26,6 +26,7 @@ except ImportError:
 
 __all__ = [
     'BaseAIAnalyzer',
+    'AnalysisError',
     'AIAnalyzerFactory',
     'AIAnalyzerConfig',
     'OpenAIAnalyzer',
@@ -1,12 +1,32 @@
+import os
+import time
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any, List
 import pandas as pd
 
+from ..symbol_info import get_symbol_info_cache
+from ..render_profiles import LLM_RENDER_PROFILE, find_chart_image
+
+class AnalysisError(RuntimeError):
+    """
+    AI分析失败（请求出错、响应无效等），异常消息为可直接展示给用户的错误说明
+    """
+
+
 class BaseAIAnalyzer(ABC):
     """
     AI分析器基础抽象类，定义所有AI供应商必须实现的接口
     """
     
+    # 提示词中使用的技术指标：(分析数据中的键, 指标名称)，只需要各指标的最新值
+    PROMPT_INDICATORS = [
+        ('MA5', 'MA5'), ('MA10', 'MA10'), ('MA20', 'MA20'), ('MA30', 'MA30'),
+        ('MACD', 'MACD'), ('MACD_signal', 'MACD_signal'), ('MACD_hist', 'MACD_hist'),
+        ('KDJ_K', 'K'), ('KDJ_D', 'D'), ('KDJ_J', 'J'),
+        ('RSI6', 'RSI6'), ('RSI12', 'RSI12'), ('RSI24', 'RSI24'),
+        ('BOLL_upper', 'BOLL_upper'), ('BOLL_middle', 'BOLL_middle'), ('BOLL_lower', 'BOLL_lower'),
+    ]
+    
     def __init__(self, api_key: str, **kwargs):
         """
         初始化AI分析器
@@ -14,9 +34,11 @@ class BaseAIAnalyzer(ABC):
         Args:
             api_key: API密钥
             **kwargs: 其他配置参数
+                - render_profile: 多模态分析使用的图表渲染配置，默认为llm
         """
         self.api_key = api_key
         self.config = kwargs
+        self.render_profile = kwargs.get('render_profile', LLM_RENDER_PROFILE)
         self._validate_config()
     
     @abstractmethod
@@ -27,20 +49,23 @@ class BaseAIAnalyzer(ABC):
     @abstractmethod
     def analyze(self, stock_data: pd.DataFrame, indicators: Dict[str, Any], 
                financial_data: Dict[str, Any], news_data: List[Dict[str, Any]], 
-               stock_code: str, save_path: str) -> str:
+               stock_code: str, save_path: Optional[str]) -> str:
         """
         分析股票数据并预测未来走势
         
         Args:
             stock_data: 股票历史数据
-            indicators: 技术指标数据
+            indicators: 技术指标数据（指标序列，或 calculate_snapshot 返回的最新值记录）
             financial_data: 财务数据
             news_data: 新闻数据
             stock_code: 股票代码
-            save_path: 保存路径
+            save_path: 保存路径，多模态分析使用其中 charts/ 下的图表；为None时不使用图表，只做纯文本分析
             
         Returns:
             分析结果文本
+            
+        Raises:
+            AnalysisError: 分析失败
         """
         pass
     
@@ -58,6 +83,43 @@ class BaseAIAnalyzer(ABC):
         """
         pass
     
+    def _chart_image_path(self, save_path: Optional[str], stock_code: str) -> Optional[str]:
+        """
+        获取多模态分析使用的技术分析图路径，优先使用 render_profile 对应的图片；save_path 为None时返回None
+        """
+        if save_path is None:
+            return None
+        return find_chart_image(os.path.join(save_path, 'charts'), stock_code, self.render_profile)
+    
+    @staticmethod
+    def _report_upload(image_path: str, start: float, encoded: float) -> None:
+        """
+        输出多模态请求的图片大小、编码耗时和请求耗时（含上传和模型响应）
+        """
+        size_kb = os.path.getsize(image_path) / 1024
+        print(f"多模态分析: 图片 {os.path.basename(image_path)} {size_kb:.0f}KB，"
+              f"编码 {(encoded - start) * 1000:.0f}ms，请求 {time.perf_counter() - encoded:.2f}s")
+    
+    def _get_stock_name(self, stock_code: str) -> str:
+        """
+        获取股票名称（所有子类共用，读取进程内共享的股票信息缓存）
+        """
+        return get_symbol_info_cache().get_name(stock_code)
+    
+    @staticmethod
+    def _latest_indicator(indicators: Dict[str, Any], name: str) -> Optional[float]:
+        """
+        读取指标的最新值，indicators 既可以是指标序列的字典，也可以是 calculate_snapshot 返回的扁平记录
+        """
+        if name not in indicators:
+            return None
+        value = indicators[name]
+        if isinstance(value, pd.Series):
+            if value.empty:
+                return None
+            value = value.iloc[-1]
+        return float(value)
+    
     def _prepare_analysis_data(self, stock_data: pd.DataFrame, indicators: Dict[str, Any], 
                               financial_data: Dict[str, Any], news_data: List[Dict[str, Any]], 
                               stock_code: str, stock_name: str) -> Dict[str, Any]:
@@ -94,33 +156,9 @@ class BaseAIAnalyzer(ABC):
         
         # 提取关键技术指标
         if indicators:
-            latest_idx = -1  # 最新数据索引
-            
-            # 移动平均线
-            analysis_data['MA5'] = float(indicators['MA5'].iloc[latest_idx]) if 'MA5' in indicators and not indicators['MA5'].empty else None
-            analysis_data['MA10'] = float(indicators['MA10'].iloc[latest_idx]) if 'MA10' in indicators and not indicators['MA10'].empty else None
-            analysis_data['MA20'] = float(indicators['MA20'].iloc[latest_idx]) if 'MA20' in indicators and not indicators['MA20'].empty else None
-            analysis_data['MA30'] = float(indicators['MA30'].iloc[latest_idx]) if 'MA30' in indicators and not indicators['MA30'].empty else None
-            
-            # MACD
-            analysis_data['MACD'] = float(indicators['MACD'].iloc[latest_idx]) if 'MACD' in indicators and not indicators['MACD'].empty else None
-            analysis_data['MACD_signal'] = float(indicators['MACD_signal'].iloc[latest_idx]) if 'MACD_signal' in indicators and not indicators['MACD_signal'].empty else None
-            analysis_data['MACD_hist'] = float(indicators['MACD_hist'].iloc[latest_idx]) if 'MACD_hist' in indicators and not indicators['MACD_hist'].empty else None
-            
-            # KDJ
-            analysis_data['KDJ_K'] = float(indicators['K'].iloc[latest_idx]) if 'K' in indicators and not indicators['K'].empty else None
-            analysis_data['KDJ_D'] = float(indicators['D'].iloc[latest_idx]) if 'D' in indicators and not indicators['D'].empty else None
-            analysis_data['KDJ_J'] = float(indicators['J'].iloc[latest_idx]) if 'J' in indicators and not indicators['J'].empty else None
-            
-            # RSI
-            analysis_data['RSI6'] = float(indicators['RSI6'].iloc[latest_idx]) if 'RSI6' in indicators and not indicators['RSI6'].empty else None
-            analysis_data['RSI12'] = float(indicators['RSI12'].iloc[latest_idx]) if 'RSI12' in indicators and not indicators['RSI12'].empty else None
-            analysis_data['RSI24'] = float(indicators['RSI24'].iloc[latest_idx]) if 'RSI24' in indicators and not indicators['RSI24'].empty else None
-            
-            # 布林带
-            analysis_data['BOLL_upper'] = float(indicators['BOLL_upper'].iloc[latest_idx]) if 'BOLL_upper' in indicators and not indicators['BOLL_upper'].empty else None
-            analysis_data['BOLL_middle'] = float(indicators['BOLL_middle'].iloc[latest_idx]) if 'BOLL_middle' in indicators and not indicators['BOLL_middle'].empty else None
-            analysis_data['BOLL_lower'] = float(indicators['BOLL_lower'].iloc[latest_idx]) if 'BOLL_lower' in indicators and not indicators['BOLL_lower'].empty else None
+            # 移动平均线、MACD、KDJ、RSI、布林带
+            for key, name in self.PROMPT_INDICATORS:
+                analysis_data[key] = self._latest_indicator(indicators, name)
         
         # 提取关键财务数据
         if financial_data:
@@ -1,10 +1,10 @@
 import os
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import pandas as pd
 import requests
 
-from .base_ai_analyzer import BaseAIAnalyzer
+from .base_ai_analyzer import BaseAIAnalyzer, AnalysisError
 
 class DeepSeekAnalyzer(BaseAIAnalyzer):
     """
@@ -53,7 +53,7 @@ class DeepSeekAnalyzer(BaseAIAnalyzer):
     
     def analyze(self, stock_data: pd.DataFrame, indicators: Dict[str, Any], 
                financial_data: Dict[str, Any], news_data: List[Dict[str, Any]], 
-               stock_code: str, save_path: str) -> str:
+               stock_code: str, save_path: Optional[str]) -> str:
         """
         使用DeepSeek分析股票数据并预测未来走势
         """
@@ -78,7 +78,7 @@ class DeepSeekAnalyzer(BaseAIAnalyzer):
             return full_result
             
         except Exception as e:
-            return f"DeepSeek分析过程中出错: {str(e)}"
+            raise AnalysisError(f"DeepSeek分析过程中出错: {str(e)}") from e
     
     def analyze_with_image(self, prompt: str, image_path: str) -> str:
         """
@@ -118,17 +118,3 @@ class DeepSeekAnalyzer(BaseAIAnalyzer):
         
         result = response.json()
         return result['choices'][0]['message']['content']
-    
-    def _get_stock_name(self, stock_code: str) -> str:
-        """
-        获取股票名称
-        """
-        try:
-            import akshare as ak
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            if not stock_info.empty:
-                return stock_info.loc[stock_info['item'] == '股票简称', 'value'].values[0]
-            else:
-                return stock_code
-        except:
-            return stock_code
\ No newline at end of file
@@ -1,12 +1,13 @@
 import os
 import json
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 import pandas as pd
 from PIL import Image
 from google import genai
 from google.genai import types
 
-from .base_ai_analyzer import BaseAIAnalyzer
+from .base_ai_analyzer import BaseAIAnalyzer, AnalysisError
 
 class GeminiAnalyzer(BaseAIAnalyzer):
     """
@@ -53,7 +54,7 @@ class GeminiAnalyzer(BaseAIAnalyzer):
     
     def analyze(self, stock_data: pd.DataFrame, indicators: Dict[str, Any], 
                financial_data: Dict[str, Any], news_data: List[Dict[str, Any]], 
-               stock_code: str, save_path: str) -> str:
+               stock_code: str, save_path: Optional[str]) -> str:
         """
         使用Gemini分析股票数据并预测未来走势
         """
@@ -70,8 +71,8 @@ class GeminiAnalyzer(BaseAIAnalyzer):
             prompt = self._build_prompt(analysis_data, stock_code, stock_name)
             
             # 检查是否有图片，如果有则使用多模态分析
-            image_path = os.path.join(save_path, f"charts/{stock_code}_technical_analysis.png")
-            if os.path.exists(image_path):
+            image_path = self._chart_image_path(save_path, stock_code)
+            if image_path:
                 analysis_result = self.analyze_with_image(prompt, image_path)
             else:
                 # 纯文本分析
@@ -83,7 +84,7 @@ class GeminiAnalyzer(BaseAIAnalyzer):
             return full_result
             
         except Exception as e:
-            return f"Gemini分析过程中出错: {str(e)}"
+            raise AnalysisError(f"Gemini分析过程中出错: {str(e)}") from e
     
     def analyze_with_image(self, prompt: str, image_path: str) -> str:
         """
@@ -91,7 +92,10 @@ class GeminiAnalyzer(BaseAIAnalyzer):
         """
         try:
             # 加载图片
+            start = time.perf_counter()
             image = Image.open(image_path)
+            image.load()
+            encoded = time.perf_counter()
             
             # 调用Gemini API
             response = self.client.models.generate_content(
@@ -108,6 +112,7 @@ class GeminiAnalyzer(BaseAIAnalyzer):
                 ),
                 contents=[image, prompt]
             )
+            self._report_upload(image_path, start, encoded)
             
             return response.text
             
@@ -136,17 +141,3 @@ class GeminiAnalyzer(BaseAIAnalyzer):
         )
         
         return response.text
-    
-    def _get_stock_name(self, stock_code: str) -> str:
-        """
-        获取股票名称
-        """
-        try:
-            import akshare as ak
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            if not stock_info.empty:
-                return stock_info.loc[stock_info['item'] == '股票简称', 'value'].values[0]
-            else:
-                return stock_code
-        except:
-            return stock_code
\ No newline at end of file
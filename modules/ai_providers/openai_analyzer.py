@@ -1,12 +1,14 @@
 import os
 import json
+import time
 import base64
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import pandas as pd
 from openai import OpenAI
 from PIL import Image
 
-from .base_ai_analyzer import BaseAIAnalyzer
+from .base_ai_analyzer import BaseAIAnalyzer, AnalysisError
+from ..render_profiles import image_mime_type
 
 class OpenAIAnalyzer(BaseAIAnalyzer):
     """
@@ -54,7 +56,7 @@ class OpenAIAnalyzer(BaseAIAnalyzer):
     
     def analyze(self, stock_data: pd.DataFrame, indicators: Dict[str, Any], 
                financial_data: Dict[str, Any], news_data: List[Dict[str, Any]], 
-               stock_code: str, save_path: str) -> str:
+               stock_code: str, save_path: Optional[str]) -> str:
         """
         使用OpenAI分析股票数据并预测未来走势
         """
@@ -71,8 +73,8 @@ class OpenAIAnalyzer(BaseAIAnalyzer):
             prompt = self._build_prompt(analysis_data, stock_code, stock_name)
             
             # 检查是否有图片，如果有则使用多模态分析
-            image_path = os.path.join(save_path, f"charts/{stock_code}_technical_analysis.png")
-            if os.path.exists(image_path):
+            image_path = self._chart_image_path(save_path, stock_code)
+            if image_path:
                 analysis_result = self.analyze_with_image(prompt, image_path)
             else:
                 # 纯文本分析
@@ -84,7 +86,7 @@ class OpenAIAnalyzer(BaseAIAnalyzer):
             return full_result
             
         except Exception as e:
-            return f"OpenAI分析过程中出错: {str(e)}"
+            raise AnalysisError(f"OpenAI分析过程中出错: {str(e)}") from e
     
     def analyze_with_image(self, prompt: str, image_path: str) -> str:
         """
@@ -92,7 +94,9 @@ class OpenAIAnalyzer(BaseAIAnalyzer):
         """
         try:
             # 编码图片为base64
+            start = time.perf_counter()
             image_base64 = self._encode_image(image_path)
+            encoded = time.perf_counter()
             
             messages = [
                 {
@@ -109,7 +113,7 @@ class OpenAIAnalyzer(BaseAIAnalyzer):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/png;base64,{image_base64}",
+                                "url": f"data:{image_mime_type(image_path)};base64,{image_base64}",
                                 "detail": "high"
                             }
                         }
@@ -123,6 +127,7 @@ class OpenAIAnalyzer(BaseAIAnalyzer):
                 max_tokens=self.max_tokens,
                 temperature=self.temperature
             )
+            self._report_upload(image_path, start, encoded)
             
             return response.choices[0].message.content
             
@@ -161,17 +166,3 @@ class OpenAIAnalyzer(BaseAIAnalyzer):
         """
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
-    
-    def _get_stock_name(self, stock_code: str) -> str:
-        """
-        获取股票名称
-        """
-        try:
-            import akshare as ak
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            if not stock_info.empty:
-                return stock_info.loc[stock_info['item'] == '股票简称', 'value'].values[0]
-            else:
-                return stock_code
-        except:
-            return stock_code
\ No newline at end of file
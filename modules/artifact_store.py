@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from .indicator_cache import data_fingerprint, registry_fingerprint
+from .technical_analyzer import default_registry
+from .render_profiles import DEFAULT_RENDER_PROFILE
+from .ai_providers import AnalysisError
+
+# 产物格式版本，图表或分析结果的生成方式变化时递增，使旧的产物失效
+ARTIFACT_VERSION = 1
+
+
+def artifact_key(stock_data, **params):
+    """
+    计算产物的内容地址：K线数据的内容指纹加上生成参数（周期、渲染配置、AI供应商等）的哈希
+
+    参数:
+        stock_data (pandas.DataFrame): 股票历史数据
+        **params: 影响产物内容的其他输入，需可序列化为JSON（不可序列化的值按 str 处理）
+
+    返回:
+        str: 十六进制键
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(data_fingerprint(stock_data).encode())
+    digest.update(json.dumps({'version': ARTIFACT_VERSION, **params}, sort_keys=True, ensure_ascii=False,
+                             default=str).encode())
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    按内容寻址的产物仓库，保存图表和AI分析结果
+
+    每个产物是目录 {root}/{key}/，键由输入内容计算（见 artifact_key），相同输入的请求直接复用已有产物，
+    不同周期、渲染配置或AI供应商的结果互不覆盖。产物先写入临时目录，完成后整体重命名为最终目录，
+    并发生成同一产物时先完成的一方生效，读取方不会看到写了一半的文件。
+    """
+
+    def __init__(self, root='./output/artifacts', max_age_days=7):
+        """
+        参数:
+            root (str): 产物仓库目录
+            max_age_days (int): 产物的保留天数，超过的在初始化时清理
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.prune(max_age_days)
+
+    def path(self, key, *parts):
+        """
+        获取产物目录或其中文件的路径
+        """
+        return os.path.join(self.root, key, *parts)
+
+    def exists(self, key):
+        return os.path.isdir(self.path(key))
+
+    def touch(self, key):
+        """
+        更新产物的修改时间，命中的产物按最近使用时间保留
+        """
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+    def files(self, key):
+        """
+        列出产物中的全部文件（相对于产物目录的路径）
+        """
+        base = self.path(key)
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), base)
+            for directory, _, names in os.walk(base) for name in names
+        )
+
+    @contextmanager
+    def create(self, key):
+        """
+        生成产物：在返回的临时目录中写入文件，正常退出时发布为 {root}/{key}/，出错时丢弃
+        """
+        staging = os.path.join(self.root, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        os.makedirs(staging)
+        try:
+            yield staging
+            try:
+                os.rename(staging, self.path(key))
+            except OSError:
+                # 其他请求已发布了同一产物，内容相同，保留先发布的
+                if not self.exists(key):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def prune(self, max_age_days):
+        """
+        删除超过保留天数未被使用的产物
+        """
+        cutoff = time.time() - max_age_days * 86400
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+    def charts(self, visualizer, stock_data, indicators, stock_code, period, timeframe='daily',
+               profiles=(DEFAULT_RENDER_PROFILE,), registry=None):
+        """
+        获取图表产物，不存在时调用 visualizer.create_charts 生成；命中时不渲染，惰性指标也不会被计算
+
+        图表保存在产物目录的 charts/ 下，文件名与 create_charts 相同，
+        因此产物目录可以直接作为 AI分析器 analyze 的 save_path。
+
+        参数:
+            registry (IndicatorRegistry): 计算 indicators 使用的指标注册表，默认为 default_registry；
+                                          指标定义变化时产物键随之变化
+
+        返回:
+            str: 产物键，数据为空时返回None
+        """
+        if stock_data.empty:
+            return None
+        key = artifact_key(stock_data, kind='charts', stock_code=stock_code, period=period,
+                           timeframe=timeframe, profiles=list(profiles),
+                           indicators=registry_fingerprint(registry or default_registry))
+        if self.exists(key):
+            self.touch(key)
+        else:
+            with self.create(key) as staging:
+                visualizer.create_charts(stock_data, indicators, stock_code, staging,
+                                         timeframe=timeframe, profiles=profiles)
+        return key
+
+    def analysis(self, ai_analyzer, stock_data, indicators, financial_data, news_data, stock_code, period,
+                 chart_key=None, timeframe='daily', registry=None):
+        """
+        获取AI分析结果产物，不存在时调用 ai_analyzer.analyze 生成
+
+        键包含实际使用的AI供应商、模型和多模态渲染配置、指标注册表，以及财务和新闻数据的内容；
+        分析器抛出 AnalysisError 时不保存，返回错误说明。
+
+        参数:
+            chart_key (str): 图表产物键，多模态分析使用其中的图表；为None时只做纯文本分析
+            registry (IndicatorRegistry): 计算 indicators 使用的指标注册表，默认为 default_registry
+
+        返回:
+            tuple: (产物键, 分析结果文本)，分析出错时产物键为None
+        """
+        analyzer = getattr(ai_analyzer, 'analyzer', ai_analyzer)
+        provider_info = ai_analyzer.get_provider_info() if hasattr(ai_analyzer, 'get_provider_info') else {}
+        key = artifact_key(
+            stock_data, kind='analysis', stock_code=stock_code, period=period, timeframe=timeframe,
+            provider=provider_info.get('provider', type(analyzer).__name__),
+            model=getattr(analyzer, 'model', None), temperature=getattr(analyzer, 'temperature', None),
+            render_profile=getattr(analyzer, 'render_profile', None) if chart_key else None,
+            chart_key=chart_key, financial_data=financial_data, news_data=news_data,
+            indicators=registry_fingerprint(registry or default_registry),
+        )
+        result_path = self.path(key, 'analysis_result.txt')
+        if os.path.exists(result_path):
+            self.touch(key)
+            with open(result_path, 'r', encoding='utf-8') as f:
+                return key, f.read()
+
+        # 没有图表时不传保存路径，分析器只做纯文本分析，不会读取目录中残留的图表
+        save_path = self.path(chart_key) if chart_key else None
+        # AIAnalyzer 用 analyze_or_raise 区分失败；直接传入的供应商分析器 analyze 失败时即抛出 AnalysisError
+        analyze = getattr(ai_analyzer, 'analyze_or_raise', ai_analyzer.analyze)
+        try:
+            analysis_result = analyze(stock_data, indicators, financial_data, news_data, stock_code, save_path)
+        except AnalysisError as e:
+            return None, str(e)
+
+        with self.create(key) as staging:
+            with open(os.path.join(staging, 'analysis_result.txt'), 'w', encoding='utf-8') as f:
+                f.write(analysis_result)
+        return key, analysis_result
+
+
+# 进程内共享的产物仓库，按目录区分
+_default_stores = {}
+_default_store_lock = threading.Lock()
+
+
+def get_default_artifact_store(root='./output/artifacts'):
+    """
+    获取进程内共享的 ArtifactStore，同一目录（按绝对路径）共用一个实例
+    """
+    root = os.path.abspath(root)
+    with _default_store_lock:
+        store = _default_stores.get(root)
+        if store is None:
+            store = _default_stores[root] = ArtifactStore(root)
+        return store
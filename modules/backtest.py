@@ -0,0 +1,242 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .universe_panel import UniversePanel
+from .screener import SignalExpression, panel_variables, stock_variables
+
+# A股每年的交易日数量，用于计算年化收益
+TRADING_DAYS_PER_YEAR = 244
+
+
+def _evaluate_rule(rule, variables, params, cache):
+    """
+    对入场/出场规则求值，返回 (交易日 × 股票) 布尔数组
+
+    rule 可以是信号表达式字符串（可包含 {参数名} 占位符，按 params 替换），
+    也可以是模块级函数 rule(variables, **params)。
+    """
+    if callable(rule):
+        result = rule(variables, **params)
+    else:
+        result = SignalExpression(rule.format(**params)).evaluate(variables, cache)
+    return np.broadcast_to(np.asarray(result, dtype=bool), variables['close'].shape)
+
+
+def simulate_positions(entry, exit):
+    """
+    根据入场和出场信号计算每个交易日收盘后的持仓（1为持有，0为空仓）
+
+    持仓等于最近一次信号的状态：入场信号后持有，出场信号后空仓，同一天同时出现时以出场为准。
+    按列取最近一次信号所在的行号，对所有股票一次性前向填充，不逐日循环。
+
+    参数:
+        entry (numpy.ndarray): 入场信号 (交易日 × 股票)
+        exit (numpy.ndarray): 出场信号，形状与 entry 相同
+
+    返回:
+        numpy.ndarray: 持仓 (交易日 × 股票)，float64
+    """
+    events = np.where(exit, 0.0, np.where(entry, 1.0, np.nan))
+    rows = np.where(np.isnan(events), 0, np.arange(len(events))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    positions = np.take_along_axis(events, rows, axis=0)
+    return np.nan_to_num(positions, nan=0.0)
+
+
+def forward_fill(values):
+    """
+    按列用最近一个有效值填充NaN（停牌日沿用停牌前的收盘价），首个有效值之前保持NaN
+
+    与 simulate_positions 相同，按列取最近一个有效值所在的行号后一次性取值，不逐日循环。
+
+    参数:
+        values (numpy.ndarray): (交易日 × 股票) 数组
+
+    返回:
+        numpy.ndarray: 填充后的数组
+    """
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(values, rows, axis=0)
+
+
+class VectorizedBacktester:
+    """
+    向量化回测引擎，检验技术指标信号的历史表现
+
+    入场和出场规则为信号表达式（语法见 SignalExpression）或返回布尔数组的函数，
+    在 (交易日 × 股票) 数组上整体求值；持仓、收益、逐笔交易和回撤均以numpy向量运算得到，没有逐日循环。
+    信号在当日收盘时成交，次日起计入收益；买卖各收取一次手续费。持仓期间停牌的股票按复牌日收盘价
+    相对停牌前最后收盘价的涨跌计入复牌当日的收益。参数网格可在多个进程中并行回测，
+    各进程以内存映射方式共享同一个 UniversePanel，技术指标在每个进程中只计算一次。
+    """
+
+    def __init__(self, fee=0.0005, periods_per_year=TRADING_DAYS_PER_YEAR):
+        """
+        参数:
+            fee (float): 单边交易成本（手续费与滑点之和），按成交金额的比例计算
+            periods_per_year (int): 每年的K线数量，用于计算年化收益
+        """
+        self.fee = fee
+        self.periods_per_year = periods_per_year
+
+    def run(self, variables, entry, exit, params=None, cache=None):
+        """
+        在一组股票上回测入场和出场规则
+
+        参数:
+            variables (dict): 信号变量，见 panel_variables / stock_variables
+            entry (str | callable): 入场规则
+            exit (str | callable): 出场规则
+            params (dict): 替换规则中占位符的参数
+            cache (dict): 表达式中函数调用结果的缓存，见 SignalExpression.evaluate；
+                          对同一组变量回测多组参数时复用，例如各组参数共用的 ma(close, 20) 只计算一次
+
+        返回:
+            pandas.DataFrame: 每只股票一行，列为 total_return（总收益）、annual_return（年化收益）、
+                              max_drawdown（最大回撤，负数）、trades（交易次数）、hit_rate（盈利交易占比）、
+                              exposure（持仓天数占比）；回测结束时未平仓的交易按最后收盘价计入
+        """
+        params = params or {}
+        cache = {} if cache is None else cache
+        close = variables['close']
+        tradable = ~np.isnan(close)
+        entry = _evaluate_rule(entry, variables, params, cache) & tradable
+        exit = _evaluate_rule(exit, variables, params, cache)
+        positions = simulate_positions(entry, exit)
+
+        returns = np.zeros(close.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            filled = forward_fill(close)
+            returns[1:] = filled[1:] / filled[:-1] - 1
+        # 首个有效交易日之前没有价格，收益记为0
+        returns[~np.isfinite(returns)] = 0.0
+
+        held = np.zeros(close.shape)
+        held[1:] = positions[:-1]
+        turnover = np.abs(positions - held)
+        strategy = held * returns - turnover * self.fee
+
+        stats = self._summarize(strategy, positions, held, tradable)
+        return pd.DataFrame(stats, index=pd.Index(variables['symbol'], name='symbol'))
+
+    def _summarize(self, strategy, positions, held, tradable):
+        log_returns = np.log1p(strategy)
+        total_log = log_returns.sum(axis=0)
+        bars = np.maximum(tradable.sum(axis=0), 1)
+
+        # 最大回撤：净值相对历史最高点的最大跌幅
+        equity = np.exp(np.cumsum(log_returns, axis=0))
+        drawdown = equity / np.maximum(np.maximum.accumulate(equity, axis=0), 1.0) - 1
+
+        # 逐笔交易：按入场次数为每根K线编号，持仓期间（以及入场当日的手续费）计入对应交易
+        starts = (positions == 1) & (held == 0)
+        trade_ids = np.cumsum(starts, axis=0)
+        active = (held == 1) | starts
+        trades = trade_ids[-1]
+        offsets = np.concatenate([[0], np.cumsum(trades + 1)[:-1]])
+        keys = (trade_ids + offsets)[active]
+        trade_returns = np.bincount(keys, weights=log_returns[active], minlength=int((trades + 1).sum()))
+        trade_columns = np.repeat(np.arange(len(trades)), trades + 1)
+        wins = np.bincount(trade_columns, weights=trade_returns > 0, minlength=len(trades))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hit_rate = np.where(trades > 0, wins / trades, np.nan)
+        return {
+            'total_return': np.expm1(total_log),
+            'annual_return': np.expm1(total_log * self.periods_per_year / bars),
+            'max_drawdown': drawdown.min(axis=0),
+            'trades': trades,
+            'hit_rate': hit_rate,
+            'exposure': held.sum(axis=0) / bars,
+        }
+
+    def run_stock(self, stock_data, indicators, entry, exit, params=None, symbol=''):
+        """
+        回测单只股票，indicators 为 TechnicalAnalyzer.calculate_indicators 的返回值
+
+        返回:
+            pandas.Series: 同 run 返回值中的一行
+        """
+        variables = stock_variables(stock_data, indicators, symbol)
+        return self.run(variables, entry, exit, params).iloc[0]
+
+    def run_grid(self, panel_dir, entry, exit, grid, symbols=None, lookback=None, max_workers=None):
+        """
+        在全市场面板上回测参数网格中的每一组参数
+
+        参数:
+            panel_dir (str): UniversePanel 目录
+            entry (str | callable): 入场规则，字符串中的 {参数名} 按参数替换，
+                                    例如 'cross_above(ma(close, {fast}), ma(close, {slow}))'
+            exit (str | callable): 出场规则
+            grid (dict): 参数名到候选值列表的映射，回测其全部组合
+            symbols (list): 股票代码列表，默认为面板中的全部股票
+            lookback (int): 只使用最近的交易日数量，默认使用全部交易日
+            max_workers (int): 进程数，默认为CPU核数；为1时在当前进程中依次回测
+
+        返回:
+            pandas.DataFrame: 每组参数一行，包含参数列和汇总指标：
+                              mean_return / median_return（各股票总收益的平均值/中位数）、
+                              mean_annual_return、hit_rate（全部交易中盈利交易的占比）、trades、
+                              mean_max_drawdown、worst_drawdown、exposure
+        """
+        names = list(grid)
+        combos = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+        tasks = [(entry, exit, params) for params in combos]
+        worker_args = (panel_dir, symbols, lookback, self.fee, self.periods_per_year)
+
+        if max_workers == 1:
+            _init_worker(*worker_args)
+            summaries = [_run_task(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=worker_args) as executor:
+                summaries = list(executor.map(_run_task, tasks))
+
+        return pd.concat([pd.DataFrame(combos), pd.DataFrame(summaries)], axis=1)
+
+
+def summarize_results(results):
+    """
+    将 run 的逐股票结果汇总为一行
+    """
+    trades = results['trades'].sum()
+    wins = (results['hit_rate'] * results['trades']).sum()
+    return {
+        'mean_return': results['total_return'].mean(),
+        'median_return': results['total_return'].median(),
+        'mean_annual_return': results['annual_return'].mean(),
+        'hit_rate': wins / trades if trades else np.nan,
+        'trades': int(trades),
+        'mean_max_drawdown': results['max_drawdown'].mean(),
+        'worst_drawdown': results['max_drawdown'].min(),
+        'exposure': results['exposure'].mean(),
+    }
+
+
+# 工作进程中跨参数组合保留的表达式缓存条目上限
+WORKER_CACHE_SIZE = 64
+
+_worker_backtester = None
+_worker_variables = None
+_worker_cache = {}
+
+
+def _init_worker(panel_dir, symbols, lookback, fee, periods_per_year):
+    # 每个工作进程只打开一次面板并计算一次技术指标，之后的参数组合复用
+    global _worker_backtester, _worker_variables
+    _worker_backtester = VectorizedBacktester(fee=fee, periods_per_year=periods_per_year)
+    _worker_variables = panel_variables(UniversePanel(panel_dir), lookback, symbols)
+    _worker_cache.clear()
+
+
+def _run_task(task):
+    entry, exit, params = task
+    if len(_worker_cache) > WORKER_CACHE_SIZE:
+        _worker_cache.clear()
+    results = _worker_backtester.run(_worker_variables, entry, exit, params, _worker_cache)
+    return summarize_results(results)
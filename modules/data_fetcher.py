@@ -1,24 +1,94 @@
-import akshare as ak
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import time
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .data_store import StockDataStore, MARKET_CLOSE_TIME
+from .timeframes import ResampledBarCache, resample_bars
+from .financial_cache import FinancialDataCache
+from .news_store import NewsStore
+from .symbol_info import get_symbol_info_cache
+from .data_sources import get_default_data_source
+
+# 下游（技术指标、图表、AI分析）实际使用的列
+COMPACT_COLUMNS = ['date', 'open', 'close', 'high', 'low', 'volume']
+
+
+def compact_stock_data(stock_data):
+    """
+    将K线数据转换为紧凑格式：只保留下游使用的列，价格降为float32，成交量为int64
+    
+    紧凑格式用于在内存中同时持有大量股票进行选股筛查，TechnicalAnalyzer 和 Visualizer 均可直接使用；
+    float32价格在转换为Python浮点数时会带有尾差，送入AI分析的提示词时建议使用完整格式。
+    
+    参数:
+        stock_data (pandas.DataFrame): fetch_stock_data 返回的完整格式数据
+        
+    返回:
+        pandas.DataFrame: 紧凑格式数据
+    """
+    return pd.DataFrame({
+        'date': stock_data['date'].values,
+        'open': stock_data['open'].to_numpy(dtype=np.float32),
+        'close': stock_data['close'].to_numpy(dtype=np.float32),
+        'high': stock_data['high'].to_numpy(dtype=np.float32),
+        'low': stock_data['low'].to_numpy(dtype=np.float32),
+        'volume': stock_data['volume'].to_numpy(dtype=np.int64),
+    })
+
+
+def memory_usage_report(full_bytes, compact_bytes):
+    """
+    生成内存占用对比说明
+    """
+    saving = (1 - compact_bytes / full_bytes) * 100 if full_bytes else 0.0
+    return (f"内存占用: {full_bytes / 1024 / 1024:.2f} MB -> {compact_bytes / 1024 / 1024:.2f} MB"
+            f"（节省 {saving:.1f}%）")
+
 
 class StockDataFetcher:
     """
     股票数据获取类，负责从AKShare获取股票的历史K线数据、财务数据和新闻信息
     """
     
-    def __init__(self):
+    # 各分析周期对应的自然日天数
+    PERIOD_DAYS = {
+        '1年': 365,
+        '6个月': 183,
+        '3个月': 91,
+        '1个月': 30,
+        '1周': 7,
+    }
+    
+    def __init__(self, data_dir='./data', use_store=True, data_source=None):
+        """
+        初始化数据获取器
+        
+        参数:
+            data_dir (str): 本地数据目录
+            use_store (bool): 是否使用本地数据仓库和缓存（K线、财务、新闻数据），关闭后每次都从网络获取完整数据
+            data_source (BaseDataSource): 行情数据源，默认使用进程内默认数据源（AKShare）
+        """
         self.today = datetime.now().strftime('%Y%m%d')
+        self.data_dir = data_dir
+        self.data_source = data_source or get_default_data_source()
+        self.data_store = StockDataStore(data_dir) if use_store else None
+        self.bar_cache = ResampledBarCache(data_dir) if use_store else None
+        self.financial_cache = FinancialDataCache(data_dir) if use_store else None
+        self.news_store = NewsStore(data_dir) if use_store else None
     
-    def fetch_stock_data(self, stock_code, period='1年'):
+    def fetch_stock_data(self, stock_code, period='1年', compact=False, timeframe='daily'):
         """
         获取股票的历史K线数据
         
         参数:
             stock_code (str): 股票代码，如 '000001'
             period (str): 获取数据的时间周期，默认为'1年'
+            compact (bool): 是否返回紧凑格式（只保留下游使用的列，价格为float32），见 compact_stock_data
+            timeframe (str): K线周期，'daily'、'weekly'、'monthly' 或 'quarterly'，
+                             周线及以上由日线在本地合成，见 modules.timeframes
             
         返回:
             pandas.DataFrame: 包含股票历史数据的DataFrame
@@ -36,49 +106,119 @@ class StockDataFetcher:
             stock_code = stock_code.rstrip('.sz').rstrip('.sh').rstrip('.SZ').rstrip('.SH')
         
         # 计算开始日期
-        if period == '1年':
-            start_date = (datetime.now() - timedelta(days=365)).strftime('%Y%m%d')
-        elif period == '6个月':
-            start_date = (datetime.now() - timedelta(days=183)).strftime('%Y%m%d')
-        elif period == '3个月':
-            start_date = (datetime.now() - timedelta(days=91)).strftime('%Y%m%d')
-        elif period == '1个月':
-            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y%m%d')
-        elif period == '1周':
-            start_date = (datetime.now() - timedelta(days=7)).strftime('%Y%m%d')
-        else:
-            start_date = (datetime.now() - timedelta(days=365)).strftime('%Y%m%d')
+        start_date = self._period_start_date(period)
         
         try:
-            # 使用akshare获取股票历史数据
-            stock_data = ak.stock_zh_a_hist(symbol=stock_code, period="daily", 
-                                           start_date=start_date, end_date=self.today, 
-                                           adjust="qfq")
-            
-            # 重命名列以便后续处理
-            stock_data.rename(columns={
-                '日期': 'date',
-                '开盘': 'open',
-                '收盘': 'close',
-                '最高': 'high',
-                '最低': 'low',
-                '成交量': 'volume',
-                '成交额': 'amount',
-                '振幅': 'amplitude',
-                '涨跌幅': 'pct_change',
-                '涨跌额': 'change',
-                '换手率': 'turnover'
-            }, inplace=True)
-            
-            # 将日期列转换为日期时间格式
-            stock_data['date'] = pd.to_datetime(stock_data['date'])
+            if self.data_store is None:
+                stock_data = self._download_stock_data(stock_code, start_date, datetime.now().strftime('%Y%m%d'))
+                stock_data = resample_bars(stock_data, timeframe)
+            else:
+                # 从本地数据仓库读取，只向网络请求缺失的交易日
+                stock_data = self._sync_stock_data(stock_code, start_date)
+                if timeframe != 'daily':
+                    stock_data = self.bar_cache.get(stock_code, stock_data, timeframe)
+                if not stock_data.empty:
+                    # 按周期截取数据
+                    stock_data = stock_data[stock_data['date'] >= pd.to_datetime(start_date)]
+                    stock_data = stock_data.reset_index(drop=True)
             
+            if compact and not stock_data.empty:
+                stock_data = compact_stock_data(stock_data)
             return stock_data
             
         except Exception as e:
             print(f"获取股票数据时出错: {e}")
             return pd.DataFrame()
     
+    def _period_start_date(self, period):
+        """
+        根据周期计算开始日期，未知周期按1年处理
+        """
+        days = self.PERIOD_DAYS.get(period, 365)
+        return (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
+    
+    def _download_stock_data(self, stock_code, start_date, end_date):
+        """
+        从数据源下载指定区间的日线数据并统一列名
+        """
+        stock_data = self.data_source.stock_hist(stock_code, start_date, end_date, adjust="qfq")
+        if stock_data.empty:
+            return stock_data
+        
+        # 重命名列以便后续处理
+        stock_data.rename(columns={
+            '日期': 'date',
+            '开盘': 'open',
+            '收盘': 'close',
+            '最高': 'high',
+            '最低': 'low',
+            '成交量': 'volume',
+            '成交额': 'amount',
+            '振幅': 'amplitude',
+            '涨跌幅': 'pct_change',
+            '涨跌额': 'change',
+            '换手率': 'turnover'
+        }, inplace=True)
+        
+        # 将日期列转换为日期时间格式
+        stock_data['date'] = pd.to_datetime(stock_data['date'])
+        
+        return stock_data
+    
+    def _sync_stock_data(self, stock_code, start_date):
+        """
+        将本地数据仓库与网络数据同步，返回同步后的完整日线数据
+        
+        - 本地无数据：下载 [start_date, 今天] 的全部数据
+        - 请求的起始日期早于已覆盖范围：向前补齐缺失区间
+        - 本地数据已过期：从最后一个已保存交易日开始增量下载并追加。
+          前复权价格在除权除息后会整体变化，若重叠交易日的收盘价不一致，则重新下载整段数据
+        """
+        now = datetime.now()
+        today = now.strftime('%Y%m%d')
+        stored = self.data_store.load(stock_code)
+        meta = self.data_store.load_meta(stock_code)
+        
+        if stored.empty or 'start_date' not in meta:
+            stock_data = self._download_stock_data(stock_code, start_date, today)
+            if not stock_data.empty:
+                self.data_store.save(stock_code, self.data_store.completed_bars(stock_data, now),
+                                     {'start_date': start_date, 'checked_at': now.isoformat()})
+            return stock_data
+        
+        changed = False
+        stock_data = stored
+        
+        try:
+            # 向前补齐
+            if start_date < meta['start_date']:
+                earlier = self._download_stock_data(stock_code, start_date, meta['start_date'])
+                stock_data = self.data_store.merge(earlier, stock_data)
+                meta['start_date'] = start_date
+                changed = True
+            
+            # 向后追加
+            if self.data_store.needs_update(meta, now):
+                last_date = stock_data['date'].iloc[-1]
+                newer = self._download_stock_data(stock_code, last_date.strftime('%Y%m%d'), today)
+                # 没有返回数据（停牌、非交易日等，可能连列也没有）视为已检查、无新数据，沿用本地数据
+                if not newer.empty:
+                    overlap = newer[newer['date'] == last_date]
+                    if not overlap.empty and abs(float(overlap['close'].iloc[0]) - float(stock_data['close'].iloc[-1])) > 1e-6:
+                        # 复权因子发生变化，重新下载整段数据
+                        stock_data = self._download_stock_data(stock_code, meta['start_date'], today)
+                    else:
+                        stock_data = self.data_store.merge(stock_data, newer)
+                meta['checked_at'] = now.isoformat()
+                changed = True
+        except Exception as e:
+            print(f"增量更新股票数据时出错，使用本地数据: {e}")
+        
+        if changed and not stock_data.empty:
+            self.data_store.save(stock_code, self.data_store.completed_bars(stock_data, now), meta)
+        
+        return stock_data
+    
     def fetch_financial_data(self, stock_code):
         """
         获取股票的财务数据
@@ -93,15 +233,25 @@ class StockDataFetcher:
         
         try:
             # 获取股票基本信息
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            if not stock_info.empty:
-                financial_data['基本信息'] = stock_info.set_index('item').to_dict()['value']
-            
-            # 获取关键指标
-            financial_abstract = ak.stock_financial_abstract(symbol=stock_code)
-            if not financial_abstract.empty:
-                # 只取最新的财务指标
-                latest_indicator = financial_abstract.iloc[:, 1:3].dropna().set_index('指标').to_dict()
+            stock_info = get_symbol_info_cache().get_info(stock_code)
+            if stock_info:
+                financial_data['基本信息'] = stock_info
+            
+            # 获取关键指标，优先读取未过期的本地缓存
+            latest_indicator = None
+            if self.financial_cache is not None:
+                latest_indicator = self.financial_cache.get(stock_code)
+            
+            if latest_indicator is None:
+                financial_abstract = self.data_source.financial_abstract(stock_code)
+                if not financial_abstract.empty:
+                    # 只取最新的财务指标
+                    latest_indicator = financial_abstract.iloc[:, 1:3].dropna().set_index('指标').to_dict()
+                    if self.financial_cache is not None:
+                        report_date = str(financial_abstract.columns[2])
+                        self.financial_cache.put(stock_code, latest_indicator, report_date)
+            
+            if latest_indicator:
                 financial_data['关键指标'] = latest_indicator
 
             return financial_data
@@ -124,28 +274,200 @@ class StockDataFetcher:
         news_list = []
         
         try:
-            # 获取股票名称
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            if not stock_info.empty:
-                stock_name = stock_info.loc[stock_info['item'] == '股票简称', 'value'].values[0]
-                
-                # 获取股票相关新闻
-                news_data = ak.stock_news_em(symbol=stock_code)
-                
-                if not news_data.empty:
-                    # 限制新闻条数
-                    news_data = news_data.head(max_items)
-                    
-                    for _, row in news_data.iterrows():
-                        news_item = {
-                            'title': row['新闻标题'],
-                            'date': row['发布时间'],
-                            'content': row['新闻内容'] if '新闻内容' in row else '',
-                        }
-                        news_list.append(news_item)
-                
+            # 本地新闻仍在刷新间隔内，直接读取
+            if self.news_store is not None and not self.news_store.needs_refresh(stock_code):
+                return self.news_store.latest(stock_code, max_items)
+            
+            # 获取股票相关新闻
+            news_data = self.data_source.stock_news(stock_code)
+            
+            if self.news_store is not None:
+                # 只追加比本地更新的新闻
+                self.news_store.ingest(stock_code, news_data)
+                return self.news_store.latest(stock_code, max_items)
+            
+            news_list = NewsStore.to_records(NewsStore.normalize(news_data).head(max_items))
             return news_list
             
         except Exception as e:
             print(f"获取新闻数据时出错: {e}")
-            return news_list
\ No newline at end of file
+            if self.news_store is not None:
+                return self.news_store.latest(stock_code, max_items)
+            return news_list
+    
+    def fetch_many(self, symbols, period='1年', max_workers=8, show_progress=False, compact=False):
+        """
+        并发获取多只股票的历史K线数据，按完成顺序逐个返回结果
+        
+        参数:
+            symbols (list): 股票代码列表
+            period (str): 获取数据的时间周期，默认为'1年'
+            max_workers (int): 最大并发线程数
+            show_progress (bool): 是否显示进度条
+            compact (bool): 是否返回紧凑格式的数据
+            
+        返回:
+            generator: 逐个产出 (stock_code, pandas.DataFrame)，获取失败的股票对应空DataFrame
+        """
+        return self._run_many(self.fetch_stock_data, symbols, pd.DataFrame,
+                              max_workers, show_progress, period, compact)
+    
+    def fetch_universe(self, symbols, period='1年', max_workers=8, show_progress=False):
+        """
+        大规模选股模式：并发获取多只股票的数据并合并为一张紧凑格式的长表
+        
+        参数:
+            symbols (list): 股票代码列表
+            period (str): 获取数据的时间周期，默认为'1年'
+            max_workers (int): 最大并发线程数
+            show_progress (bool): 是否显示进度条
+            
+        返回:
+            pandas.DataFrame: 包含 symbol(categorical), date, open, close, high, low, volume 列的长表，
+                并打印相对完整格式节省的内存
+        """
+        frames = {}
+        full_bytes = 0
+        for symbol, stock_data in self.fetch_many(symbols, period, max_workers, show_progress):
+            if stock_data.empty:
+                continue
+            full_bytes += stock_data.memory_usage(deep=True).sum()
+            frames[symbol] = compact_stock_data(stock_data)
+        
+        if not frames:
+            return pd.DataFrame(columns=['symbol'] + COMPACT_COLUMNS)
+        
+        symbols = sorted(frames)
+        universe = pd.concat([frames[symbol] for symbol in symbols], ignore_index=True)
+        universe.insert(0, 'symbol', pd.Categorical.from_codes(
+            np.repeat(np.arange(len(symbols)), [len(frames[symbol]) for symbol in symbols]),
+            categories=symbols
+        ))
+        print(memory_usage_report(full_bytes, universe.memory_usage(deep=True).sum()))
+        return universe
+    
+    def fetch_financial_many(self, symbols, max_workers=8, show_progress=False):
+        """
+        并发获取多只股票的财务数据，按完成顺序逐个返回 (stock_code, dict)
+        """
+        return self._run_many(self.fetch_financial_data, symbols, dict,
+                              max_workers, show_progress)
+    
+    def fetch_news_many(self, symbols, max_items=10, max_workers=8, show_progress=False):
+        """
+        并发获取多只股票的新闻数据，按完成顺序逐个返回 (stock_code, list)
+        """
+        return self._run_many(self.fetch_news_data, symbols, list,
+                              max_workers, show_progress, max_items)
+    
+    def ingest_daily_snapshot(self, include_new=False, max_workers=8):
+        """
+        收盘后通过一次全市场行情快照请求，为本地数据仓库中的所有股票追加当日K线
+        
+        逐只股票调用 fetch_stock_data 的增量路径仅用于补齐缺失的历史数据。
+        
+        参数:
+            include_new (bool): 是否为本地尚无数据的股票新建数据（之后按需向前补齐历史）
+            max_workers (int): 写入本地文件的并发线程数
+            
+        返回:
+            dict: {状态: [股票代码, ...]}，状态见 StockDataStore.append_daily_bar
+        """
+        if self.data_store is None:
+            raise ValueError("未启用本地数据仓库，无法批量更新")
+        
+        now = datetime.now()
+        # 工作日的节假日休市时快照仍是上一个交易日的行情，不能记为当日K线
+        if not self._is_trading_day(now.date()):
+            print("今天不是交易日，跳过全市场快照更新")
+            return {}
+        if now.time() < MARKET_CLOSE_TIME:
+            print("尚未收盘，全市场快照不是完整的日线数据，请在收盘后运行")
+            return {}
+        
+        spot = self.data_source.spot()
+        if spot.empty:
+            print("未获取到全市场行情快照")
+            return {}
+        
+        # 整表转换为统一列名的当日K线
+        bars = pd.DataFrame({
+            'date': pd.Timestamp(now.date()),
+            '股票代码': spot['代码'].astype(str),
+            'open': pd.to_numeric(spot['今开'], errors='coerce'),
+            'close': pd.to_numeric(spot['最新价'], errors='coerce'),
+            'high': pd.to_numeric(spot['最高'], errors='coerce'),
+            'low': pd.to_numeric(spot['最低'], errors='coerce'),
+            'volume': pd.to_numeric(spot['成交量'], errors='coerce'),
+            'amount': pd.to_numeric(spot['成交额'], errors='coerce'),
+            'amplitude': pd.to_numeric(spot['振幅'], errors='coerce'),
+            'pct_change': pd.to_numeric(spot['涨跌幅'], errors='coerce'),
+            'change': pd.to_numeric(spot['涨跌额'], errors='coerce'),
+            'turnover': pd.to_numeric(spot['换手率'], errors='coerce'),
+        })
+        prev_close = pd.to_numeric(spot['昨收'], errors='coerce')
+        
+        # 去掉停牌（无成交）的股票
+        valid = bars['close'].notna() & bars['open'].notna() & (bars['volume'].fillna(0) > 0)
+        if not include_new:
+            valid &= bars['股票代码'].isin(set(self.data_store.symbols()))
+        bars = bars[valid].astype({'volume': 'int64'})
+        prev_close = prev_close[valid]
+        
+        records = bars.to_dict('records')
+        prev_closes = [None if pd.isna(value) else float(value) for value in prev_close]
+        
+        result = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.data_store.append_daily_bar, record['股票代码'], record, prev, now): record['股票代码']
+                for record, prev in zip(records, prev_closes)
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    status = future.result()
+                except Exception as e:
+                    print(f"更新 {symbol} 的本地数据时出错: {e}")
+                    status = 'failed'
+                result.setdefault(status, []).append(symbol)
+        
+        print("全市场快照更新完成: " + ", ".join(f"{status} {len(symbols)}" for status, symbols in result.items()))
+        return result
+    
+    def _is_trading_day(self, day):
+        """
+        按交易日历判断是否为交易日；数据源不提供交易日历时只排除周末
+        """
+        try:
+            calendar = self.data_source.trade_dates()
+        except Exception as e:
+            print(f"获取交易日历时出错，仅按周末判断是否为交易日: {e}")
+            calendar = pd.DataFrame()
+        if calendar.empty:
+            return day.weekday() < 5
+        trade_dates = pd.to_datetime(calendar['trade_date']).dt.date
+        return day in set(trade_dates)
+    
+    def _run_many(self, func, symbols, default, max_workers, show_progress, *args):
+        """
+        在有界线程池中对每只股票执行 func，单只股票失败不影响其他股票。
+        各数据接口的请求频率由共享限速器控制
+        """
+        symbols = list(dict.fromkeys(symbols))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        progress = tqdm(total=len(symbols), disable=not show_progress)
+        try:
+            futures = {executor.submit(func, symbol, *args): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"获取 {symbol} 的数据时出错: {e}")
+                    result = default()
+                progress.update(1)
+                yield symbol, result
+        finally:
+            progress.close()
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,271 @@
+import os
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from .rate_limiter import get_rate_limiter
+
+
+class BaseDataSource(ABC):
+    """
+    行情数据源抽象类，返回的数据格式与对应的akshare接口保持一致（中文列名）
+    """
+
+    @abstractmethod
+    def stock_hist(self, symbol, start_date, end_date, adjust='qfq'):
+        """
+        日线数据，对应 ak.stock_zh_a_hist(period='daily')
+
+        参数:
+            symbol (str): 股票代码
+            start_date (str): 开始日期，格式 'YYYYMMDD'
+            end_date (str): 结束日期，格式 'YYYYMMDD'
+            adjust (str): 复权方式
+        """
+        pass
+
+    @abstractmethod
+    def individual_info(self, symbol):
+        """
+        个股基本信息（item, value 两列），对应 ak.stock_individual_info_em
+        """
+        pass
+
+    @abstractmethod
+    def financial_abstract(self, symbol):
+        """
+        财务摘要，对应 ak.stock_financial_abstract
+        """
+        pass
+
+    @abstractmethod
+    def stock_news(self, symbol):
+        """
+        个股新闻，对应 ak.stock_news_em
+        """
+        pass
+
+    def spot(self):
+        """
+        沪深京A股全市场实时行情快照，对应 ak.stock_zh_a_spot_em
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持全市场行情快照")
+
+    def trade_dates(self):
+        """
+        A股历史及当年的交易日历（trade_date 一列），对应 ak.tool_trade_date_hist_sina
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持交易日历")
+
+
+class AkshareDataSource(BaseDataSource):
+    """
+    默认数据源，通过AKShare从网络获取数据，各接口共享进程内限速器
+    """
+
+    def __init__(self):
+        import akshare as ak
+        self.ak = ak
+
+    def stock_hist(self, symbol, start_date, end_date, adjust='qfq'):
+        get_rate_limiter('stock_zh_a_hist').acquire()
+        return self.ak.stock_zh_a_hist(symbol=symbol, period="daily",
+                                       start_date=start_date, end_date=end_date,
+                                       adjust=adjust)
+
+    def individual_info(self, symbol):
+        get_rate_limiter('stock_individual_info_em').acquire()
+        return self.ak.stock_individual_info_em(symbol=symbol)
+
+    def financial_abstract(self, symbol):
+        get_rate_limiter('stock_financial_abstract').acquire()
+        return self.ak.stock_financial_abstract(symbol=symbol)
+
+    def stock_news(self, symbol):
+        get_rate_limiter('stock_news_em').acquire()
+        return self.ak.stock_news_em(symbol=symbol)
+
+    def spot(self):
+        get_rate_limiter('stock_zh_a_spot_em').acquire()
+        return self.ak.stock_zh_a_spot_em()
+
+    def trade_dates(self):
+        get_rate_limiter('tool_trade_date_hist_sina').acquire()
+        return self.ak.tool_trade_date_hist_sina()
+
+
+class ReplayDataSource(BaseDataSource):
+    """
+    回放数据源，从本地录制的CSV文件读取数据，用于离线压测和基准测试
+
+    文件布局：
+        {fixture_dir}/hist/{symbol}.csv       日线数据（ak.stock_zh_a_hist 原始列名）
+        {fixture_dir}/info/{symbol}.csv       个股基本信息
+        {fixture_dir}/financial/{symbol}.csv  财务摘要
+        {fixture_dir}/news/{symbol}.csv       个股新闻
+        {fixture_dir}/spot.csv                全市场行情快照
+        {fixture_dir}/trade_dates.csv         交易日历
+    """
+
+    def __init__(self, fixture_dir='./fixtures', latency=0.0):
+        """
+        参数:
+            fixture_dir (str): 录制数据所在目录
+            latency (float | tuple): 每次请求模拟的延迟秒数，传入 (最小值, 最大值) 时在区间内随机
+        """
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def _sleep(self):
+        if isinstance(self.latency, (tuple, list)):
+            delay = random.uniform(*self.latency)
+        else:
+            delay = self.latency
+        if delay and delay > 0:
+            time.sleep(delay)
+
+    def _read(self, kind, symbol, **read_kwargs):
+        # 解析后的数据缓存在内存中，避免把CSV解析时间计入被测组件
+        key = (kind, symbol)
+        with self._lock:
+            frame = self._frames.get(key)
+        if frame is None:
+            path = os.path.join(self.fixture_dir, kind, f"{symbol}.csv")
+            frame = pd.read_csv(path, **read_kwargs) if os.path.exists(path) else pd.DataFrame()
+            with self._lock:
+                self._frames[key] = frame
+        return frame.copy()
+
+    def stock_hist(self, symbol, start_date, end_date, adjust='qfq'):
+        self._sleep()
+        frame = self._read('hist', symbol, dtype={'股票代码': str})
+        if frame.empty:
+            return frame
+        dates = pd.to_datetime(frame['日期'])
+        mask = (dates >= pd.to_datetime(start_date)) & (dates <= pd.to_datetime(end_date))
+        return frame[mask].reset_index(drop=True)
+
+    def individual_info(self, symbol):
+        self._sleep()
+        return self._read('info', symbol, dtype=str)
+
+    def financial_abstract(self, symbol):
+        self._sleep()
+        return self._read('financial', symbol)
+
+    def stock_news(self, symbol):
+        self._sleep()
+        return self._read('news', symbol, dtype=str)
+
+    def spot(self):
+        self._sleep()
+        path = os.path.join(self.fixture_dir, 'spot.csv')
+        return pd.read_csv(path, dtype={'代码': str}) if os.path.exists(path) else pd.DataFrame()
+
+    def trade_dates(self):
+        path = os.path.join(self.fixture_dir, 'trade_dates.csv')
+        return pd.read_csv(path) if os.path.exists(path) else pd.DataFrame()
+
+
+class RecordingDataSource(BaseDataSource):
+    """
+    录制数据源，包装另一个数据源并将每次返回的数据保存为 ReplayDataSource 可读取的文件
+    """
+
+    def __init__(self, source, fixture_dir='./fixtures'):
+        self.source = source
+        self.fixture_dir = fixture_dir
+        self._lock = threading.Lock()
+
+    def _write(self, kind, symbol, frame):
+        if frame is None or frame.empty:
+            return
+        directory = os.path.join(self.fixture_dir, kind)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{symbol}.csv")
+        with self._lock:
+            if kind == 'hist' and os.path.exists(path):
+                # 多次请求的日线数据按日期合并
+                stored = pd.read_csv(path, dtype={'股票代码': str})
+                frame = pd.concat([stored, frame.astype({'日期': str})], ignore_index=True)
+                frame = frame.drop_duplicates(subset='日期', keep='last').sort_values('日期')
+            frame.to_csv(path, index=False)
+
+    def stock_hist(self, symbol, start_date, end_date, adjust='qfq'):
+        frame = self.source.stock_hist(symbol, start_date, end_date, adjust)
+        self._write('hist', symbol, frame)
+        return frame
+
+    def individual_info(self, symbol):
+        frame = self.source.individual_info(symbol)
+        self._write('info', symbol, frame)
+        return frame
+
+    def financial_abstract(self, symbol):
+        frame = self.source.financial_abstract(symbol)
+        self._write('financial', symbol, frame)
+        return frame
+
+    def stock_news(self, symbol):
+        frame = self.source.stock_news(symbol)
+        self._write('news', symbol, frame)
+        return frame
+
+    def spot(self):
+        frame = self.source.spot()
+        if not frame.empty:
+            os.makedirs(self.fixture_dir, exist_ok=True)
+            frame.to_csv(os.path.join(self.fixture_dir, 'spot.csv'), index=False)
+        return frame
+
+    def trade_dates(self):
+        frame = self.source.trade_dates()
+        if not frame.empty:
+            os.makedirs(self.fixture_dir, exist_ok=True)
+            frame.to_csv(os.path.join(self.fixture_dir, 'trade_dates.csv'), index=False)
+        return frame
+
+
+_default_source = None
+_default_source_lock = threading.Lock()
+
+
+def create_data_source_from_env():
+    """
+    根据环境变量创建数据源：
+        DATA_SOURCE           akshare（默认）或 replay
+        REPLAY_FIXTURE_DIR    回放数据目录，默认 ./fixtures
+        REPLAY_LATENCY        回放时每次请求的模拟延迟（秒）
+    """
+    source_type = os.getenv('DATA_SOURCE', 'akshare').lower()
+    if source_type == 'replay':
+        return ReplayDataSource(
+            fixture_dir=os.getenv('REPLAY_FIXTURE_DIR', './fixtures'),
+            latency=float(os.getenv('REPLAY_LATENCY', '0')),
+        )
+    return AkshareDataSource()
+
+
+def get_default_data_source():
+    """
+    获取进程内默认的数据源
+    """
+    global _default_source
+    with _default_source_lock:
+        if _default_source is None:
+            _default_source = create_data_source_from_env()
+        return _default_source
+
+
+def set_default_data_source(source):
+    """
+    替换进程内默认的数据源，例如在压测时切换到 ReplayDataSource
+    """
+    global _default_source
+    with _default_source_lock:
+        _default_source = source
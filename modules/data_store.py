@@ -0,0 +1,188 @@
+import os
+import json
+import threading
+import pandas as pd
+from datetime import datetime, time as dt_time, timedelta
+
+# A股收盘后数据基本稳定的时间点
+MARKET_CLOSE_TIME = dt_time(15, 30)
+MARKET_OPEN_TIME = dt_time(9, 15)
+
+
+class StockDataStore:
+    """
+    本地K线数据仓库，按股票代码以Parquet格式保存日线数据，支持增量追加
+
+    每只股票对应两个文件：
+        {data_dir}/ohlcv/{stock_code}.parquet  日线数据
+        {data_dir}/ohlcv/{stock_code}.json     元数据（已覆盖的起始日期、最后检查时间）
+    """
+
+    def __init__(self, data_dir='./data', subdir='ohlcv'):
+        """
+        参数:
+            data_dir (str): 本地数据目录
+            subdir (str): 数据子目录，默认 'ohlcv' 保存日线；周线等其他周期的K线使用各自的子目录
+        """
+        self.data_dir = os.path.join(data_dir, subdir)
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def _data_path(self, stock_code):
+        return os.path.join(self.data_dir, f"{stock_code}.parquet")
+
+    def _meta_path(self, stock_code):
+        return os.path.join(self.data_dir, f"{stock_code}.json")
+
+    def has(self, stock_code):
+        """
+        判断本地是否已保存该股票的数据
+        """
+        return os.path.exists(self._data_path(stock_code))
+
+    def symbols(self):
+        """
+        返回本地已保存的所有股票代码
+        """
+        return sorted(
+            name[:-len('.parquet')] for name in os.listdir(self.data_dir)
+            if name.endswith('.parquet')
+        )
+
+    def load(self, stock_code):
+        """
+        读取本地保存的日线数据
+
+        参数:
+            stock_code (str): 股票代码
+
+        返回:
+            pandas.DataFrame: 日线数据，不存在时返回空DataFrame
+        """
+        path = self._data_path(stock_code)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"读取本地K线数据时出错: {e}")
+            return pd.DataFrame()
+
+    def load_meta(self, stock_code):
+        """
+        读取元数据，包括 start_date（已覆盖的最早请求日期）和 checked_at（最后一次同步时间）
+        """
+        path = self._meta_path(stock_code)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def save(self, stock_code, stock_data, meta):
+        """
+        保存日线数据和元数据，先写临时文件再替换，避免并发读取到不完整的文件
+        """
+        data_path = self._data_path(stock_code)
+        tmp_path = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        stock_data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, data_path)
+
+        meta_path = self._meta_path(stock_code)
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def merge(stored, new_data):
+        """
+        合并新旧数据，按日期去重（以新数据为准）并排序
+        """
+        if stored.empty:
+            return new_data.reset_index(drop=True)
+        if new_data.empty:
+            return stored.reset_index(drop=True)
+        merged = pd.concat([stored, new_data], ignore_index=True)
+        merged = merged.drop_duplicates(subset='date', keep='last')
+        return merged.sort_values('date').reset_index(drop=True)
+
+    @staticmethod
+    def last_close_cutoff(now=None):
+        """
+        返回最近一个已收盘交易时段的截止时间，早于该时间的同步结果视为过期
+        """
+        now = now or datetime.now()
+        cutoff = datetime.combine(now.date(), MARKET_CLOSE_TIME)
+        if now < cutoff:
+            cutoff -= timedelta(days=1)
+        return cutoff
+
+    @staticmethod
+    def in_trading_session(now=None):
+        """
+        判断当前是否处于交易时段（仅按工作日和时间粗略判断，不考虑节假日）
+        """
+        now = now or datetime.now()
+        return now.weekday() < 5 and MARKET_OPEN_TIME <= now.time() < MARKET_CLOSE_TIME
+
+    def needs_update(self, meta, now=None):
+        """
+        判断本地数据是否需要向后增量同步
+        """
+        now = now or datetime.now()
+        checked_at = meta.get('checked_at')
+        if not checked_at:
+            return True
+        if self.in_trading_session(now):
+            return True
+        return datetime.fromisoformat(checked_at) < self.last_close_cutoff(now)
+
+    @staticmethod
+    def completed_bars(stock_data, now=None):
+        """
+        去掉尚未收盘的当日K线，只持久化已完成的数据
+        """
+        now = now or datetime.now()
+        if stock_data.empty or now.time() >= MARKET_CLOSE_TIME:
+            return stock_data
+        today = pd.Timestamp(now.date())
+        return stock_data[stock_data['date'] < today]
+
+    def append_daily_bar(self, stock_code, bar, prev_close=None, now=None):
+        """
+        将单个交易日的K线追加到本地数据，用于收盘后的全市场批量更新
+
+        参数:
+            stock_code (str): 股票代码
+            bar (dict): 当日K线，键为统一后的列名（date, open, close, ...）
+            prev_close (float): 行情快照中的昨收价，用于校验本地数据是否连续
+
+        返回:
+            str: 'appended' 已追加; 'created' 新建本地数据; 'exists' 本地已有该交易日;
+                 'needs_backfill' 本地数据缺少交易日或复权价格已变化，需要走逐只下载的补齐流程
+        """
+        now = now or datetime.now()
+        stored = self.load(stock_code)
+        meta = self.load_meta(stock_code)
+        row = pd.DataFrame([bar])
+
+        if stored.empty:
+            meta = {'start_date': bar['date'].strftime('%Y%m%d'), 'checked_at': now.isoformat()}
+            self.save(stock_code, row, meta)
+            return 'created'
+
+        last = stored.iloc[-1]
+        if last['date'] >= bar['date']:
+            return 'exists'
+        # 昨收与本地最后收盘价不一致：中间缺少交易日，或当日除权除息导致前复权价格整体变化
+        if prev_close is not None and abs(float(last['close']) - float(prev_close)) > 0.005:
+            return 'needs_backfill'
+
+        row = row.reindex(columns=stored.columns)
+        stock_data = pd.concat([stored, row.astype(stored.dtypes.to_dict(), errors='ignore')],
+                               ignore_index=True)
+        meta['checked_at'] = now.isoformat()
+        self.save(stock_code, stock_data, meta)
+        return 'appended'
@@ -0,0 +1,131 @@
+import os
+import json
+import threading
+from datetime import date, datetime
+
+
+# 各报告期（月, 日）及其法定披露截止日（相对报告期年份的年份偏移, 月, 日）
+REPORT_PERIODS = [
+    ((3, 31), (0, 4, 30)),    # 一季报
+    ((6, 30), (0, 8, 31)),    # 半年报
+    ((9, 30), (0, 10, 31)),   # 三季报
+    ((12, 31), (1, 4, 30)),   # 年报
+]
+
+
+def latest_due_report_date(day):
+    """
+    返回在 day 当天已过法定披露截止日的最新报告期，格式为 'YYYYMMDD'
+    """
+    due = []
+    for year in (day.year - 2, day.year - 1, day.year):
+        for (month, dom), (offset, deadline_month, deadline_day) in REPORT_PERIODS:
+            if date(year + offset, deadline_month, deadline_day) <= day:
+                due.append(date(year, month, dom))
+    return max(due).strftime('%Y%m%d')
+
+
+def latest_ended_report_date(day):
+    """
+    返回在 day 之前已经结束的最新报告期（报告可能尚未披露），格式为 'YYYYMMDD'
+    """
+    ended = [
+        date(year, month, dom)
+        for year in (day.year - 1, day.year)
+        for (month, dom), _ in REPORT_PERIODS
+        if date(year, month, dom) < day
+    ]
+    return max(ended).strftime('%Y%m%d')
+
+
+def in_disclosure_window(day):
+    """
+    判断 day 是否处于定期报告披露期（1-4月年报及一季报、7-8月半年报、10月三季报）
+    """
+    return day.month in (1, 2, 3, 4, 7, 8, 10)
+
+
+class FinancialDataCache:
+    """
+    财务关键指标缓存，按报告期判断是否过期，并持久化到磁盘
+
+    缓存文件为 {data_dir}/financial/{stock_code}.json，只保存 fetch_financial_data 实际返回的最新一期指标。
+    判断规则：
+        - 同一天内最多从网络获取一次
+        - 已过披露截止日的报告期比缓存的报告期更新时，缓存过期
+        - 在披露期内，只有缓存已包含最新结束的报告期时才继续有效
+        - 非披露期内，缓存一直有效直到下一个披露期
+    """
+
+    def __init__(self, data_dir='./data'):
+        self.cache_dir = os.path.join(data_dir, 'financial')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, stock_code):
+        return os.path.join(self.cache_dir, f"{stock_code}.json")
+
+    def get(self, stock_code, now=None):
+        """
+        读取未过期的财务关键指标
+
+        参数:
+            stock_code (str): 股票代码
+
+        返回:
+            dict: 财务关键指标，缓存不存在或已过期时返回None
+        """
+        path = self._path(stock_code)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception:
+            return None
+        if not self.is_fresh(entry, now):
+            return None
+        return entry['data']
+
+    def put(self, stock_code, data, report_date, now=None):
+        """
+        保存财务关键指标
+
+        参数:
+            stock_code (str): 股票代码
+            data (dict): fetch_financial_data 返回的关键指标
+            report_date (str): 指标对应的报告期，格式为 'YYYYMMDD'
+        """
+        now = now or datetime.now()
+        entry = {
+            'report_date': report_date,
+            'fetched_at': now.isoformat(),
+            'data': data,
+        }
+        path = self._path(stock_code)
+        with self._lock:
+            try:
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False, default=str)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"保存财务数据缓存时出错: {e}")
+
+    @staticmethod
+    def is_fresh(entry, now=None):
+        """
+        根据报告披露日历判断缓存是否仍然有效
+        """
+        now = now or datetime.now()
+        today = now.date()
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        if fetched_at.date() == today:
+            return True
+
+        report_date = str(entry.get('report_date', ''))
+        if report_date < latest_due_report_date(today):
+            return False
+        if in_disclosure_window(today):
+            return report_date >= latest_ended_report_date(today)
+        return True
@@ -0,0 +1,244 @@
+import os
+import math
+import copy
+import json
+import threading
+from collections import deque
+
+# 各类窗口的长度，与 TechnicalAnalyzer 的默认参数一致
+MA_WINDOWS = (5, 10, 20, 30, 60)
+BIAS_PERIODS = (6, 12, 24)
+RSI_PERIODS = (6, 12, 24)
+VOLUME_MA_WINDOWS = (5, 10)
+BOLL_WINDOW = 20
+BOLL_STD = 2
+MACD_PERIODS = (12, 26, 9)
+KDJ_PARAMS = (9, 3, 3)
+
+
+def _window_mean(buffer, window):
+    """
+    环形缓冲区中最近 window 个值的平均值，数据不足时返回NaN
+    """
+    if len(buffer) < window:
+        return math.nan
+    values = list(buffer)[-window:]
+    return math.fsum(values) / window
+
+
+class IncrementalIndicatorCalculator:
+    """
+    增量技术指标计算器，保存单只股票各指标的运行状态，每根新K线以常数时间更新
+
+    状态包括MACD的EMA值、KDJ的K/D值，以及均线、布林带、RSI所需的定长环形缓冲区，
+    输出与 TechnicalAnalyzer.calculate_indicators 最后一行一致。状态可通过 to_dict/from_dict
+    或 save/load 序列化，便于保存后在下一根K线到来时恢复。
+    """
+
+    def __init__(self):
+        close_size = max(MA_WINDOWS + BIAS_PERIODS + (BOLL_WINDOW,))
+        self.closes = deque(maxlen=close_size)
+        self.highs = deque(maxlen=KDJ_PARAMS[0])
+        self.lows = deque(maxlen=KDJ_PARAMS[0])
+        self.volumes = deque(maxlen=max(VOLUME_MA_WINDOWS))
+        self.gains = deque(maxlen=max(RSI_PERIODS))
+        self.losses = deque(maxlen=max(RSI_PERIODS))
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal = None
+        self.k = None
+        self.d = None
+        self.last_date = None
+        self.count = 0
+
+    @classmethod
+    def from_history(cls, stock_data):
+        """
+        用历史数据初始化计算器
+
+        参数:
+            stock_data (pandas.DataFrame): 股票历史数据，包含 high/low/close/volume 列
+
+        返回:
+            IncrementalIndicatorCalculator: 已处理完全部历史K线的计算器
+        """
+        calculator = cls()
+        has_date = 'date' in stock_data.columns
+        for row in stock_data.itertuples(index=False):
+            bar = {'high': row.high, 'low': row.low, 'close': row.close, 'volume': row.volume}
+            if has_date:
+                bar['date'] = row.date
+            calculator.update(bar)
+        return calculator
+
+    def update(self, bar):
+        """
+        处理一根新的已完成K线并返回更新后的指标
+
+        参数:
+            bar (dict | pandas.Series): 包含 high/low/close/volume，可选 date
+
+        返回:
+            dict: 指标名称到最新值的字典，键与 TechnicalAnalyzer.calculate_indicators 一致，数据不足时为NaN
+        """
+        close = float(bar['close'])
+        high = float(bar['high'])
+        low = float(bar['low'])
+        volume = float(bar['volume'])
+
+        # RSI：首根K线的涨跌记为0
+        delta = close - self.closes[-1] if self.closes else 0.0
+        self.gains.append(delta if delta > 0 else 0.0)
+        self.losses.append(-delta if delta < 0 else 0.0)
+
+        self.closes.append(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.volumes.append(volume)
+
+        # MACD：EMA从首根K线的收盘价开始递推
+        fast, slow, signal = MACD_PERIODS
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = close
+        else:
+            self.ema_fast += 2 / (fast + 1) * (close - self.ema_fast)
+            self.ema_slow += 2 / (slow + 1) * (close - self.ema_slow)
+        macd = self.ema_fast - self.ema_slow
+        if self.macd_signal is None:
+            self.macd_signal = macd
+        else:
+            self.macd_signal += 2 / (signal + 1) * (macd - self.macd_signal)
+
+        # KDJ：首根K线K、D取50，窗口不足时RSV取50
+        n, m1, m2 = KDJ_PARAMS
+        rsv = 50.0
+        if len(self.highs) >= n:
+            low_min = min(self.lows)
+            high_max = max(self.highs)
+            if high_max != low_min:
+                rsv = 100 * (close - low_min) / (high_max - low_min)
+        if self.k is None:
+            self.k = self.d = 50.0
+        else:
+            self.k = (m1 - 1) * self.k / m1 + rsv / m1
+            self.d = (m2 - 1) * self.d / m2 + self.k / m2
+
+        if bar.get('date') is not None:
+            self.last_date = str(bar['date'])[:10]
+        self.count += 1
+        return self.current()
+
+    def preview(self, bar):
+        """
+        计算加入一根K线后的指标但不保存状态，用于盘中尚未收盘的K线反复更新
+        """
+        return self.copy().update(bar)
+
+    def current(self):
+        """
+        返回当前状态对应的最新指标
+        """
+        if not self.count:
+            return {}
+
+        indicators = {}
+        for window in MA_WINDOWS:
+            indicators[f'MA{window}'] = _window_mean(self.closes, window)
+
+        indicators['MACD'] = self.ema_fast - self.ema_slow
+        indicators['MACD_signal'] = self.macd_signal
+        indicators['MACD_hist'] = indicators['MACD'] - self.macd_signal
+
+        indicators['K'] = self.k
+        indicators['D'] = self.d
+        indicators['J'] = 3 * self.k - 2 * self.d
+
+        for period in RSI_PERIODS:
+            avg_gain = _window_mean(self.gains, period)
+            avg_loss = _window_mean(self.losses, period)
+            if math.isnan(avg_gain) or (avg_gain == 0 and avg_loss == 0):
+                indicators[f'RSI{period}'] = math.nan
+            elif avg_loss == 0:
+                indicators[f'RSI{period}'] = 100.0
+            else:
+                indicators[f'RSI{period}'] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+        middle = _window_mean(self.closes, BOLL_WINDOW)
+        if math.isnan(middle):
+            std = math.nan
+        else:
+            window = list(self.closes)[-BOLL_WINDOW:]
+            std = math.sqrt(math.fsum((value - middle) ** 2 for value in window) / (BOLL_WINDOW - 1))
+        indicators['BOLL_upper'] = middle + std * BOLL_STD
+        indicators['BOLL_middle'] = middle
+        indicators['BOLL_lower'] = middle - std * BOLL_STD
+
+        for window in VOLUME_MA_WINDOWS:
+            indicators[f'volume_ma{window}'] = _window_mean(self.volumes, window)
+
+        close = self.closes[-1]
+        for period in BIAS_PERIODS:
+            ma = _window_mean(self.closes, period)
+            indicators[f'BIAS{period}'] = (close - ma) / ma * 100 if ma else math.nan
+
+        return indicators
+
+    def copy(self):
+        """
+        复制计算器状态
+        """
+        return copy.deepcopy(self)
+
+    def to_dict(self):
+        """
+        将运行状态转换为可JSON序列化的字典
+        """
+        return {
+            'closes': list(self.closes),
+            'highs': list(self.highs),
+            'lows': list(self.lows),
+            'volumes': list(self.volumes),
+            'gains': list(self.gains),
+            'losses': list(self.losses),
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'macd_signal': self.macd_signal,
+            'k': self.k,
+            'd': self.d,
+            'last_date': self.last_date,
+            'count': self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        从 to_dict 的结果恢复计算器
+        """
+        calculator = cls()
+        for name in ('closes', 'highs', 'lows', 'volumes', 'gains', 'losses'):
+            getattr(calculator, name).extend(state[name])
+        for name in ('ema_fast', 'ema_slow', 'macd_signal', 'k', 'd', 'last_date', 'count'):
+            setattr(calculator, name, state[name])
+        return calculator
+
+    def save(self, path):
+        """
+        将运行状态保存为JSON文件
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        从JSON文件恢复计算器，文件不存在时返回None
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
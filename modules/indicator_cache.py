@@ -0,0 +1,214 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 参与指纹计算的K线列
+FINGERPRINT_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+
+def data_fingerprint(stock_data):
+    """
+    计算K线数据的内容指纹：对各列的数据类型和原始字节以及行索引做哈希，数据完全相同时指纹相同
+
+    参数:
+        stock_data (pandas.DataFrame): 股票历史数据
+
+    返回:
+        str: 十六进制指纹
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    index = stock_data.index
+    if isinstance(index, pd.RangeIndex):
+        digest.update(f"range:{index.start}:{index.stop}:{index.step}".encode())
+    else:
+        digest.update(np.ascontiguousarray(index.to_numpy()).tobytes())
+    for column in FINGERPRINT_COLUMNS:
+        if column not in stock_data.columns:
+            continue
+        values = np.ascontiguousarray(stock_data[column].to_numpy())
+        digest.update(f"{column}:{values.dtype.str}:".encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def registry_fingerprint(registry):
+    """
+    计算指标注册表的指纹：各指标的计算函数、参数、依赖和输出，注册表变化时指纹随之变化
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for spec in registry.specs():
+        func = f"{spec.func.__module__}.{spec.func.__qualname__}"
+        digest.update(repr((spec.name, func, sorted(spec.params.items()), sorted(spec.depends.items()),
+                            sorted((spec.outputs or {}).items()))).encode())
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """
+    技术指标结果缓存，键为输入K线数据和指标注册表的内容指纹
+
+    内存中按LRU保留最近使用的若干只股票的指标；可选的磁盘层将全部指标保存为一个 (交易日 × 指标) 数组
+    {cache_dir}/{key}.npz，进程重启后（如命令行每次运行）同一份数据的指标可直接读取。
+    缓存的值为指标名称到 pandas.Series 的字典；get 返回字典的副本，put 将新增的指标合并到已缓存的条目，
+    指标数量增加时重写磁盘文件。
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None, max_age_days=7):
+        """
+        参数:
+            max_entries (int): 内存中最多保留的条目数
+            cache_dir (str): 磁盘缓存目录，为None时只使用内存
+            max_age_days (int): 磁盘缓存文件的保留天数，超过的在初始化时清理
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._persisted = {}
+        self._lock = threading.Lock()
+        # 串行化磁盘写入，避免并发时较早合并的（指标较少的）文件覆盖较新的
+        self._save_lock = threading.Lock()
+        self._saved = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.prune(max_age_days)
+
+    @staticmethod
+    def make_key(stock_data, registry):
+        """
+        生成缓存键
+        """
+        return f"{data_fingerprint(stock_data)}{registry_fingerprint(registry)}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key):
+        """
+        读取缓存的指标字典，先查内存再查磁盘
+
+        返回:
+            dict: 指标名称到 pandas.Series 的字典（缓存条目的副本），未命中时返回None
+        """
+        with self._lock:
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(values)
+
+        values = self._load(key)
+        with self._lock:
+            if values is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._persisted[key] = len(values)
+            self._saved[key] = max(self._saved.get(key, 0), len(values))
+            self._insert(key, values)
+            return dict(values)
+
+    def put(self, key, values):
+        """
+        保存指标字典，与已缓存的同一条目合并；磁盘层只在指标数量比已保存的更多时重写文件
+        """
+        with self._lock:
+            values = {**self._entries.get(key, {}), **values}
+            self._insert(key, values)
+            if not self.cache_dir or self._persisted.get(key, 0) >= len(values):
+                return
+            self._persisted[key] = len(values)
+
+        with self._save_lock:
+            if self._saved.get(key, 0) >= len(values):
+                return
+            try:
+                self._save(key, values)
+                self._saved[key] = len(values)
+            except Exception as e:
+                print(f"保存技术指标缓存时出错: {e}")
+
+    def _insert(self, key, values):
+        self._entries[key] = values
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._persisted.pop(evicted, None)
+            self._saved.pop(evicted, None)
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as arrays:
+                matrix, names, index = arrays['values'], arrays['names'], arrays['index']
+        except Exception as e:
+            print(f"读取技术指标缓存时出错: {e}")
+            return None
+        if np.array_equal(index, np.arange(len(index))):
+            index = pd.RangeIndex(len(index))
+        return {
+            str(name): pd.Series(matrix[:, i], index=index, name=str(name), copy=False)
+            for i, name in enumerate(names)
+        }
+
+    def _save(self, key, values):
+        values = dict(values)
+        names = list(values)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f,
+                     values=np.column_stack([values[name].to_numpy(dtype=np.float64) for name in names]),
+                     names=np.array(names),
+                     index=values[names[0]].index.to_numpy())
+        os.replace(tmp_path, path)
+
+    def prune(self, max_age_days):
+        """
+        删除超过保留天数的磁盘缓存文件
+        """
+        if not self.cache_dir:
+            return
+        cutoff = time.time() - max_age_days * 86400
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.npz') and entry.stat().st_mtime < cutoff:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def clear(self):
+        """
+        清空内存缓存
+        """
+        with self._lock:
+            self._entries.clear()
+            self._persisted.clear()
+            self._saved.clear()
+
+
+# 进程内共享的指标缓存，命令行、Web服务和MCP服务共用同一个磁盘目录
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_indicator_cache(data_dir='./data'):
+    """
+    获取进程内共享的 IndicatorCache，磁盘层位于 {data_dir}/indicators
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = IndicatorCache(cache_dir=os.path.join(data_dir, 'indicators'))
+        return _default_cache
@@ -0,0 +1,128 @@
+import os
+import json
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+
+
+class NewsStore:
+    """
+    本地新闻仓库，按股票代码保存新闻，以 (标题, 发布时间) 去重
+
+    每只股票对应两个文件：
+        {data_dir}/news/{stock_code}.parquet  新闻数据（title, date, content）
+        {data_dir}/news/{stock_code}.json     元数据（最后一次从网络获取的时间）
+    """
+
+    NEWS_COLUMNS = ['title', 'date', 'content']
+
+    def __init__(self, data_dir='./data', refresh_minutes=30, max_stored=200):
+        """
+        参数:
+            data_dir (str): 本地数据目录
+            refresh_minutes (int): 距上次获取超过该分钟数后才重新请求网络
+            max_stored (int): 每只股票最多保存的新闻条数
+        """
+        self.news_dir = os.path.join(data_dir, 'news')
+        os.makedirs(self.news_dir, exist_ok=True)
+        self.refresh_interval = timedelta(minutes=refresh_minutes)
+        self.max_stored = max_stored
+
+    def _data_path(self, stock_code):
+        return os.path.join(self.news_dir, f"{stock_code}.parquet")
+
+    def _meta_path(self, stock_code):
+        return os.path.join(self.news_dir, f"{stock_code}.json")
+
+    def load(self, stock_code):
+        """
+        读取本地保存的新闻，按发布时间从新到旧排列
+        """
+        path = self._data_path(stock_code)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=self.NEWS_COLUMNS)
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"读取本地新闻数据时出错: {e}")
+            return pd.DataFrame(columns=self.NEWS_COLUMNS)
+
+    def needs_refresh(self, stock_code, now=None):
+        """
+        判断是否需要重新从网络获取新闻
+        """
+        now = now or datetime.now()
+        path = self._meta_path(stock_code)
+        if not os.path.exists(path):
+            return True
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checked_at = datetime.fromisoformat(json.load(f)['checked_at'])
+        except Exception:
+            return True
+        return now - checked_at >= self.refresh_interval
+
+    @classmethod
+    def normalize(cls, news_data):
+        """
+        将 ak.stock_news_em 返回的数据转换为 title, date, content 三列
+        """
+        if news_data.empty:
+            return pd.DataFrame(columns=cls.NEWS_COLUMNS)
+        normalized = pd.DataFrame({
+            'title': news_data['新闻标题'].astype(str),
+            'date': news_data['发布时间'].astype(str),
+            'content': news_data['新闻内容'].astype(str) if '新闻内容' in news_data.columns else '',
+        })
+        return normalized
+
+    def ingest(self, stock_code, news_data, now=None):
+        """
+        合并新获取的新闻，只保留比本地最新一条更新或尚未保存过的新闻
+
+        参数:
+            stock_code (str): 股票代码
+            news_data (pandas.DataFrame): ak.stock_news_em 返回的原始数据
+
+        返回:
+            int: 新增的新闻条数
+        """
+        now = now or datetime.now()
+        stored = self.load(stock_code)
+        incoming = self.normalize(news_data).drop_duplicates(subset=['title', 'date'])
+
+        if not stored.empty and not incoming.empty:
+            last_date = stored['date'].max()
+            known = pd.MultiIndex.from_frame(stored[['title', 'date']])
+            keys = pd.MultiIndex.from_frame(incoming[['title', 'date']])
+            incoming = incoming[(incoming['date'] >= last_date) & ~keys.isin(known)]
+
+        added = len(incoming)
+        if added:
+            merged = pd.concat([incoming, stored], ignore_index=True)
+            merged = merged.sort_values('date', ascending=False, kind='stable').head(self.max_stored)
+            path = self._data_path(stock_code)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            merged.reset_index(drop=True).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+        meta_path = self._meta_path(stock_code)
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'checked_at': now.isoformat()}, f)
+        os.replace(tmp_path, meta_path)
+
+        return added
+
+    @classmethod
+    def to_records(cls, news_frame):
+        """
+        按列批量转换为新闻字典列表
+        """
+        return news_frame[cls.NEWS_COLUMNS].to_dict('records')
+
+    def latest(self, stock_code, max_items=10):
+        """
+        返回最新的 max_items 条新闻，格式为 [{'title', 'date', 'content'}, ...]
+        """
+        return self.to_records(self.load(stock_code).head(max_items))
@@ -0,0 +1,299 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_array(values):
+    """
+    转换为float64的二维数组 (交易日 × 股票)
+    """
+    if isinstance(values, pd.DataFrame):
+        values = values.to_numpy()
+    return np.asarray(values, dtype=np.float64)
+
+
+def prefix_sums(values):
+    """
+    按列计算累加和及NaN个数的前缀和（首行补0），供多个窗口长度的 rolling_mean 共用
+    """
+    missing = np.isnan(values)
+    zeros = np.zeros((1, values.shape[1]))
+    csum = np.concatenate([zeros, np.cumsum(np.where(missing, 0.0, values), axis=0)])
+    nans = np.concatenate([zeros.astype(np.int32), np.cumsum(missing, axis=0, dtype=np.int32)])
+    return csum, nans
+
+
+def rolling_mean(values, window, prefix=None):
+    """
+    按列计算简单移动平均，窗口内有NaN时结果为NaN（与 pandas rolling(window).mean() 一致）
+
+    使用前缀和差分，与窗口长度无关；同一数组计算多个窗口时可传入 prefix_sums 的结果复用。
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return out
+    csum, nans = prefix if prefix is not None else prefix_sums(values)
+    means = csum[window:] - csum[:-window]
+    means /= window
+    means[nans[window:] != nans[:-window]] = np.nan
+    out[window - 1:] = means
+    return out
+
+
+def rolling_min(values, window):
+    """
+    按列计算滚动最小值
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).min(axis=-1)
+    return out
+
+
+def rolling_max(values, window):
+    """
+    按列计算滚动最大值
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).max(axis=-1)
+    return out
+
+
+def rolling_std(values, window, chunk_size=512):
+    """
+    按列计算滚动样本标准差（ddof=1），按列分块计算以限制临时数组的内存占用
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return out
+    for start in range(0, values.shape[1], chunk_size):
+        block = sliding_window_view(values[:, start:start + chunk_size], window, axis=0)
+        out[window - 1:, start:start + chunk_size] = block.std(axis=-1, ddof=1)
+    return out
+
+
+def ewm_mean(values, alpha):
+    """
+    按列计算指数加权平均（与 pandas ewm(alpha=alpha, adjust=False).mean() 一致）
+
+    每个交易日对所有股票做一次向量化递推，上市前的NaN不参与计算，
+    序列从第一个有效值开始；中间的NaN沿用上一个平均值。
+    """
+    out = np.empty(values.shape)
+    prev = values[0].copy()
+    out[0] = prev
+    for i in range(1, len(values)):
+        current = values[i]
+        value = (1 - alpha) * prev + alpha * current
+        gaps = np.isnan(value)
+        if gaps.any():
+            value[gaps] = np.where(np.isnan(prev[gaps]), current[gaps], prev[gaps])
+        out[i] = value
+        prev = value
+    return out
+
+
+class PanelIndicatorEngine:
+    """
+    面板技术指标引擎，对 (交易日 × 股票) 二维数组按列一次性计算全部股票的技术指标
+
+    指标和参数与 TechnicalAnalyzer 保持一致，每个指标只需对整个面板做少数几次numpy运算，
+    避免筛选全市场时逐只股票构建pandas计算流程。
+    """
+
+    def __init__(self, chunk_size=512):
+        """
+        参数:
+            chunk_size (int): 计算滚动标准差时每块的股票数量
+        """
+        self.chunk_size = chunk_size
+
+    def calculate(self, close, high, low, volume):
+        """
+        计算面板中全部股票的各种技术指标
+
+        参数:
+            close (pandas.DataFrame | numpy.ndarray): 收盘价 (交易日 × 股票)，NaN表示未上市或停牌
+            high (pandas.DataFrame | numpy.ndarray): 最高价，形状与 close 相同
+            low (pandas.DataFrame | numpy.ndarray): 最低价，形状与 close 相同
+            volume (pandas.DataFrame | numpy.ndarray): 成交量，形状与 close 相同
+
+        返回:
+            dict: 指标名称到 (交易日 × 股票) DataFrame 的字典，键与 TechnicalAnalyzer.calculate_indicators 一致，
+                  收盘价为NaN的位置结果为NaN
+
+        说明:
+            上市前的NaN不影响结果，单只股票的结果与 TechnicalAnalyzer 逐只计算一致；
+            上市后中间缺失的交易日（停牌）会使窗口类指标在缺口之后的一个窗口内为NaN。
+            KDJ、MACD 在停牌期间沿用停牌前的状态，RSI 复牌日的涨跌相对停牌前的收盘价计算，
+            均与逐只计算（去掉停牌日）一致。
+        """
+        if isinstance(close, pd.DataFrame):
+            index, columns = close.index, close.columns
+        else:
+            index = columns = None
+        close = _as_array(close)
+        high = _as_array(high)
+        low = _as_array(low)
+        volume = _as_array(volume)
+        if close.size == 0:
+            return {}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indicators = self._calculate_all(close, high, low, volume)
+
+        unlisted = np.isnan(close)
+        for values in indicators.values():
+            values[unlisted] = np.nan
+        return {name: pd.DataFrame(values, index=index, columns=columns, copy=False)
+                for name, values in indicators.items()}
+
+    def calculate_panel(self, panel, start_date=None):
+        """
+        计算 UniversePanel 中全部股票的技术指标
+
+        参数:
+            panel (UniversePanel): 全市场面板
+            start_date (str): 起始日期，默认使用面板的全部交易日
+
+        返回:
+            dict: 同 calculate
+        """
+        frames = {name: panel.frame(name) for name in ('close', 'high', 'low', 'volume')}
+        if start_date:
+            frames = {name: frame[frame.index >= pd.to_datetime(start_date)] for name, frame in frames.items()}
+        return self.calculate(frames['close'], frames['high'], frames['low'], frames['volume'])
+
+    @staticmethod
+    def symbol_indicators(panel_indicators, symbol):
+        """
+        从面板指标中取出单只股票的指标，格式与 TechnicalAnalyzer.calculate_indicators 的返回值相同
+
+        只保留该股票收盘价有效的交易日，行顺序与 UniversePanel.to_stock_data 一致。
+
+        参数:
+            panel_indicators (dict): calculate 的返回值
+            symbol (str): 股票代码
+
+        返回:
+            dict: 包含各种技术指标的字典
+        """
+        if not panel_indicators:
+            return {}
+        # MACD从上市首日起即有值，用于确定有效的交易日
+        rows = panel_indicators['MACD'][symbol].notna().to_numpy()
+        return {
+            name: values[symbol][rows].reset_index(drop=True)
+            for name, values in panel_indicators.items()
+        }
+
+    def _calculate_all(self, close, high, low, volume):
+        indicators = {}
+
+        # 计算移动平均线，BIAS使用的均线一并计算，各窗口共用同一份前缀和
+        close_prefix = prefix_sums(close)
+        ma = {window: rolling_mean(close, window, close_prefix) for window in (5, 6, 10, 12, 20, 24, 30, 60)}
+        for window in (5, 10, 20, 30, 60):
+            indicators[f'MA{window}'] = ma[window]
+
+        # 计算MACD
+        macd = self._calculate_macd(close)
+        indicators['MACD'] = macd['MACD']
+        indicators['MACD_signal'] = macd['signal']
+        indicators['MACD_hist'] = macd['hist']
+
+        # 计算KDJ
+        kdj = self._calculate_kdj(close, high, low)
+        indicators['K'] = kdj['K']
+        indicators['D'] = kdj['D']
+        indicators['J'] = kdj['J']
+
+        # 计算RSI
+        for period, rsi in self._calculate_rsi(close, (6, 12, 24)).items():
+            indicators[f'RSI{period}'] = rsi
+
+        # 计算布林带，中轨即20日均线
+        std = rolling_std(close, 20, self.chunk_size)
+        indicators['BOLL_upper'] = ma[20] + std * 2
+        indicators['BOLL_middle'] = ma[20]
+        indicators['BOLL_lower'] = ma[20] - std * 2
+
+        # 计算成交量变化
+        volume_prefix = prefix_sums(volume)
+        indicators['volume_ma5'] = rolling_mean(volume, 5, volume_prefix)
+        indicators['volume_ma10'] = rolling_mean(volume, 10, volume_prefix)
+
+        # 计算BIAS乖离率
+        for period in (6, 12, 24):
+            indicators[f'BIAS{period}'] = (close - ma[period]) / ma[period] * 100
+
+        return indicators
+
+    def _calculate_macd(self, close, fast_period=12, slow_period=26, signal_period=9):
+        ema_fast = ewm_mean(close, 2 / (fast_period + 1))
+        ema_slow = ewm_mean(close, 2 / (slow_period + 1))
+        macd_line = ema_fast - ema_slow
+        # 停牌日的MACD沿用停牌前的值，不参与信号线的递推
+        macd_line[np.isnan(close)] = np.nan
+        signal_line = ewm_mean(macd_line, 2 / (signal_period + 1))
+        return {
+            'MACD': macd_line,
+            'signal': signal_line,
+            'hist': macd_line - signal_line
+        }
+
+    def _calculate_kdj(self, close, high, low, n=9, m1=3, m2=3):
+        listed = ~np.isnan(close)
+        low_min = rolling_min(low, n)
+        high_max = rolling_max(high, n)
+
+        # 上市后有停牌的股票：窗口按有效交易日计算，与逐只计算（去掉停牌日）一致
+        gapped = np.flatnonzero((np.logical_or.accumulate(listed, axis=0) & ~listed).any(axis=0))
+        for j in gapped:
+            rows = np.flatnonzero(listed[:, j])
+            low_min[:, j] = np.nan
+            high_max[:, j] = np.nan
+            low_min[rows, j] = rolling_min(low[rows, j:j + 1], n)[:, 0]
+            high_max[rows, j] = rolling_max(high[rows, j:j + 1], n)[:, 0]
+
+        rsv = 100 * ((close - low_min) / (high_max - low_min))
+        # 预热期（以及最高价等于最低价）的RSV取50；停牌日保持NaN，K、D沿用停牌前的值
+        rsv[np.isnan(rsv) & listed] = 50
+
+        # 上市首日K、D取50，与逐只计算一致；上市前为NaN，不参与递推
+        first = listed.argmax(axis=0)
+        columns = np.flatnonzero(listed.any(axis=0))
+        rsv[first[columns], columns] = 50
+        k = ewm_mean(rsv, 1 / m1)
+        k[~listed] = np.nan
+        d = ewm_mean(k, 1 / m2)
+        return {
+            'K': k,
+            'D': d,
+            'J': 3 * k - 2 * d
+        }
+
+    def _calculate_rsi(self, close, periods):
+        # 复牌日的涨跌相对停牌前最后一个收盘价计算，与逐只计算（去掉停牌日）一致
+        rows = np.where(np.isnan(close), 0, np.arange(len(close))[:, None])
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        last_close = np.take_along_axis(close, rows, axis=0)
+        delta = np.full(close.shape, np.nan)
+        delta[1:] = close[1:] - last_close[:-1]
+
+        # 与逐只计算一致，首日的涨跌记为0；上市前保持NaN
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        unlisted = np.isnan(close)
+        gain[unlisted] = np.nan
+        loss[unlisted] = np.nan
+
+        # 不同周期共用涨跌幅的前缀和
+        gain_prefix = prefix_sums(gain)
+        loss_prefix = prefix_sums(loss)
+        result = {}
+        for period in periods:
+            rs = rolling_mean(gain, period, gain_prefix) / rolling_mean(loss, period, loss_prefix)
+            result[period] = 100 - (100 / (1 + rs))
+        return result
@@ -0,0 +1,64 @@
+import time
+import threading
+
+
+class RateLimiter:
+    """
+    线程安全的限速器，保证相邻两次请求之间至少间隔 1/rate 秒
+    """
+
+    def __init__(self, rate):
+        """
+        参数:
+            rate (float): 每秒允许的最大请求数，<=0 表示不限速
+        """
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        阻塞直到允许发出下一次请求
+        """
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+# 各数据接口的默认限速（每秒请求数）
+DEFAULT_RATES = {
+    'stock_zh_a_hist': 5,
+    'stock_individual_info_em': 5,
+    'stock_financial_abstract': 2,
+    'stock_news_em': 2,
+    'stock_zh_a_spot_em': 1,
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(endpoint):
+    """
+    获取指定数据接口的进程内共享限速器
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(endpoint)
+        if limiter is None:
+            limiter = RateLimiter(DEFAULT_RATES.get(endpoint, 5))
+            _limiters[endpoint] = limiter
+        return limiter
+
+
+def configure_rate_limit(endpoint, rate):
+    """
+    修改指定数据接口的限速，rate<=0 表示不限速
+    """
+    with _limiters_lock:
+        DEFAULT_RATES[endpoint] = rate
+        _limiters[endpoint] = RateLimiter(rate)
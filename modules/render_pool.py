@@ -0,0 +1,173 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .symbol_info import get_symbol_info_cache
+from .render_profiles import DEFAULT_RENDER_PROFILE, chart_filename
+
+# 图表中用到的K线列（date 单独保存）
+CHART_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def pack_chart_inputs(stock_data, indicators, names=None):
+    """
+    将K线和图表用到的技术指标打包为紧凑形式，用于发送到渲染进程
+
+    只保留图表需要的列，数值合并为一个 (交易日 × 列) 的float64数组，日期为datetime64数组，
+    序列化时没有DataFrame和逐个Series的开销。惰性计算的指标在这里计算。
+
+    参数:
+        stock_data (pandas.DataFrame): 股票历史数据
+        indicators (dict): 技术指标数据
+        names (list): 需要的技术指标，默认为 visualizer.CHART_INDICATORS
+
+    返回:
+        dict: {'dates': 日期数组, 'values': 数值数组, 'columns': 列名列表, 'dtypes': K线各列的原始数据类型}
+    """
+    if names is None:
+        from .visualizer import CHART_INDICATORS
+        names = CHART_INDICATORS
+    names = [name for name in names if name in indicators]
+    columns = CHART_COLUMNS + names
+    values = np.empty((len(stock_data), len(columns)), dtype=np.float64)
+    for i, column in enumerate(CHART_COLUMNS):
+        values[:, i] = stock_data[column].to_numpy(dtype=np.float64)
+    for i, name in enumerate(names, start=len(CHART_COLUMNS)):
+        values[:, i] = np.asarray(indicators[name], dtype=np.float64)
+    return {
+        'dates': stock_data['date'].to_numpy(dtype='datetime64[ns]'),
+        'values': values,
+        'columns': columns,
+        'dtypes': [stock_data[column].dtype.str for column in CHART_COLUMNS],
+    }
+
+
+def unpack_chart_inputs(packed):
+    """
+    还原 pack_chart_inputs 打包的数据
+
+    返回:
+        tuple: (stock_data, indicators)，indicators 为指标名称到 pandas.Series 的字典
+    """
+    values = packed['values']
+    columns = packed['columns']
+    stock_data = pd.DataFrame({'date': packed['dates']})
+    for i, (column, dtype) in enumerate(zip(CHART_COLUMNS, packed['dtypes'])):
+        stock_data[column] = values[:, i].astype(dtype, copy=False)
+    indicators = {
+        name: pd.Series(values[:, i], name=name)
+        for i, name in enumerate(columns[len(CHART_COLUMNS):], start=len(CHART_COLUMNS))
+    }
+    return stock_data, indicators
+
+
+def chart_artifacts(chart_dir, stock_code, profiles):
+    """
+    create_charts 为一只股票生成的文件路径：各渲染配置的静态图和交互式HTML
+    """
+    paths = [os.path.join(chart_dir, chart_filename(stock_code, profile)) for profile in profiles]
+    paths.append(os.path.join(chart_dir, f"{stock_code}_interactive_chart.html"))
+    return paths
+
+
+class ChartRenderPool:
+    """
+    并行图表渲染服务，在多个进程中为一批股票生成图表
+
+    matplotlib不是线程安全的，且渲染是CPU密集型的，单进程只能逐张生成。渲染进程常驻：
+    matplotlib、pyecharts和字体在每个进程启动时只加载一次，之后的任务直接复用。
+    任务以 pack_chart_inputs 的紧凑形式发送，股票名称在当前进程中解析，渲染进程不访问网络。
+
+        with ChartRenderPool(profiles=('print', 'llm')) as pool:
+            for stock_code, paths in pool.render_many(jobs, './output'):
+                ...
+    """
+
+    def __init__(self, max_workers=None, profiles=(DEFAULT_RENDER_PROFILE,)):
+        """
+        参数:
+            max_workers (int): 渲染进程数，默认为CPU核数
+            profiles (tuple): 默认的渲染配置，见 render_profiles.RENDER_PROFILES
+        """
+        self.profiles = tuple(profiles)
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+
+    def submit(self, stock_data, indicators, stock_code, save_path, timeframe='daily', profiles=None):
+        """
+        提交一只股票的图表任务
+
+        参数同 Visualizer.create_charts，profiles 默认为初始化时的渲染配置
+
+        返回:
+            concurrent.futures.Future: 结果为生成的文件路径列表，数据为空或渲染出错时为空列表
+        """
+        packed = pack_chart_inputs(stock_data, indicators)
+        stock_name = get_symbol_info_cache().get_name(stock_code)
+        task = (packed, stock_code, stock_name, save_path, timeframe, tuple(profiles or self.profiles))
+        return self._executor.submit(_render_task, task)
+
+    def render_many(self, jobs, save_path, timeframe='daily', profiles=None):
+        """
+        为一批股票生成图表，所有任务先全部提交，再按输入顺序产出结果
+
+        参数:
+            jobs (iterable): (stock_code, stock_data, indicators) 的序列
+            save_path (str): 保存路径
+
+        返回:
+            generator: 逐个产出 (stock_code, 文件路径列表)
+        """
+        futures = [
+            (stock_code, self.submit(stock_data, indicators, stock_code, save_path, timeframe, profiles))
+            for stock_code, stock_data, indicators in jobs
+        ]
+        for stock_code, future in futures:
+            yield stock_code, future.result()
+
+    def close(self):
+        """
+        关闭渲染进程
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_worker_visualizer = None
+
+
+def _init_worker():
+    # 每个渲染进程只导入一次matplotlib和pyecharts并加载字体，之后的任务复用
+    global _worker_visualizer
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from .visualizer import Visualizer
+
+    _worker_visualizer = Visualizer()
+    fig = plt.figure(figsize=(1, 1))
+    fig.text(0.5, 0.5, '0')
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+
+
+def _render_task(task):
+    packed, stock_code, stock_name, save_path, timeframe, profiles = task
+    try:
+        stock_data, indicators = unpack_chart_inputs(packed)
+        chart_dir = _worker_visualizer.create_charts(stock_data, indicators, stock_code, save_path,
+                                                     timeframe=timeframe, profiles=profiles,
+                                                     stock_name=stock_name)
+    except Exception as e:
+        print(f"生成 {stock_code} 的图表时出错: {e}")
+        return []
+    if not chart_dir:
+        return []
+    return chart_artifacts(chart_dir, stock_code, profiles)
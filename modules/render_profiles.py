@@ -0,0 +1,65 @@
+import os
+
+# 静态图表的渲染配置：图幅（英寸）、分辨率和图片格式
+# print: 原有的高分辨率图（4800×3600），用于打印和存档
+# web:   网页展示（1600×1200）
+# llm:   多模态模型的输入（1536×1152）。各模型会把图片缩放到约2048像素以内再切块识别，更高的分辨率只增加渲染、编码和上传耗时
+RENDER_PROFILES = {
+    'print': {'figsize': (16, 12), 'dpi': 300, 'format': 'png'},
+    'web': {'figsize': (16, 12), 'dpi': 100, 'format': 'png'},
+    'llm': {'figsize': (16, 12), 'dpi': 96, 'format': 'png'},
+}
+
+# 保存到 charts 目录的默认渲染配置
+DEFAULT_RENDER_PROFILE = 'print'
+
+# 多模态分析默认使用的渲染配置
+LLM_RENDER_PROFILE = 'llm'
+
+_MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+}
+
+
+def chart_filename(stock_code, profile=DEFAULT_RENDER_PROFILE):
+    """
+    获取技术分析图的文件名；print 配置沿用原有的 {stock_code}_technical_analysis.png
+
+    参数:
+        stock_code (str): 股票代码
+        profile (str): 渲染配置名称
+
+    返回:
+        str: 文件名
+    """
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"不支持的渲染配置: {profile}，可选: {list(RENDER_PROFILES)}")
+    extension = RENDER_PROFILES[profile]['format']
+    if profile == DEFAULT_RENDER_PROFILE:
+        return f"{stock_code}_technical_analysis.{extension}"
+    return f"{stock_code}_technical_analysis_{profile}.{extension}"
+
+
+def find_chart_image(chart_dir, stock_code, profile=LLM_RENDER_PROFILE):
+    """
+    查找指定渲染配置的技术分析图，不存在时依次回退到 web、print 配置
+
+    返回:
+        str: 图片路径，均不存在时返回None
+    """
+    for candidate in dict.fromkeys([profile, 'web', DEFAULT_RENDER_PROFILE]):
+        path = os.path.join(chart_dir, chart_filename(stock_code, candidate))
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def image_mime_type(image_path):
+    """
+    根据扩展名获取图片的MIME类型，用于 data URL
+    """
+    extension = os.path.splitext(image_path)[1].lstrip('.').lower()
+    return _MIME_TYPES.get(extension, 'image/png')
@@ -0,0 +1,427 @@
+import os
+import ast
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .data_store import StockDataStore
+from .universe_panel import UniversePanel, PANEL_FIELDS
+from .panel_indicators import PanelIndicatorEngine, rolling_mean, ewm_mean
+
+# 预置信号，可在表达式中按名称引用并与其他条件组合
+SIGNAL_PRESETS = {
+    'macd_golden_cross': 'cross_above(MACD, MACD_signal)',
+    'macd_dead_cross': 'cross_below(MACD, MACD_signal)',
+    'kdj_golden_cross': 'cross_above(K, D)',
+    'kdj_oversold': 'J < 0',
+    'kdj_overbought': 'J > 100',
+    'boll_break_lower': 'close < BOLL_lower',
+    'boll_break_upper': 'close > BOLL_upper',
+    'rsi_oversold': 'RSI6 < 20',
+    'rsi_overbought': 'RSI6 > 80',
+    'ma_bullish': 'MA5 > MA10 and MA10 > MA20',
+    'volume_surge': 'volume > 2 * volume_ma5',
+}
+
+# 默认排序依据：相对成交量（当日成交量 / 5日均量），放量越明显越靠前
+DEFAULT_SORT_BY = 'volume / volume_ma5'
+
+
+def _shift(values, n=1):
+    """
+    将 (交易日 × 股票) 数组向后平移 n 行，前 n 行为NaN
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+def _cross_above(a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+    return (a > b) & (_shift(a) <= _shift(b))
+
+
+def _cross_below(a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+    return (a < b) & (_shift(a) >= _shift(b))
+
+
+def _ma(values, window):
+    return rolling_mean(np.atleast_2d(np.asarray(values, dtype=np.float64).T).T, int(window))
+
+
+def _ema(values, period):
+    return ewm_mean(np.atleast_2d(np.asarray(values, dtype=np.float64).T).T, 2 / (int(period) + 1))
+
+
+# 表达式中可用的函数
+SIGNAL_FUNCTIONS = {
+    'cross_above': _cross_above,
+    'cross_below': _cross_below,
+    'prev': _shift,
+    'abs': np.abs,
+    'ma': _ma,
+    'ema': _ema,
+}
+
+# 各函数的参数个数范围 (最少, 最多)
+_FUNCTION_ARITY = {
+    'cross_above': (2, 2),
+    'cross_below': (2, 2),
+    'prev': (1, 2),
+    'abs': (1, 1),
+    'ma': (2, 2),
+    'ema': (2, 2),
+}
+
+# 必须为整数常量的参数：函数名 -> (参数位置, 最小值)
+_INTEGER_ARGS = {
+    'prev': (1, 0),
+    'ma': (1, 1),
+    'ema': (1, 1),
+}
+
+_COMPARE_OPS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.BitAnd: np.logical_and,
+    ast.BitOr: np.logical_or,
+}
+
+
+def panel_variables(panel, lookback=None, symbols=None, engine=None):
+    """
+    计算面板中各股票的技术指标，整理为信号表达式可用的变量
+
+    参数:
+        panel (UniversePanel): 全市场面板
+        lookback (int): 只使用最近的交易日数量，默认使用全部交易日
+        symbols (list): 股票代码列表，默认为面板中的全部股票
+        engine (PanelIndicatorEngine): 面板技术指标引擎
+
+    返回:
+        dict: 价格字段和技术指标名称到 (交易日 × 股票) 数组的映射，另含 date（交易日）和 symbol（股票代码）
+    """
+    engine = engine or PanelIndicatorEngine()
+    rows = slice(-lookback, None) if lookback else slice(None)
+    if symbols is None:
+        symbols = panel.symbols
+        columns = slice(None)
+    else:
+        columns = [panel.symbols.index(symbol) for symbol in symbols]
+
+    prices = {name: np.asarray(panel.field(name)[rows][:, columns], dtype=np.float64) for name in PANEL_FIELDS}
+    indicators = engine.calculate(prices['close'], prices['high'], prices['low'], prices['volume'])
+    variables = {name: values.to_numpy() for name, values in indicators.items()}
+    variables.update(prices)
+    variables['date'] = panel.dates[rows]
+    variables['symbol'] = np.asarray(symbols)
+    return variables
+
+
+def stock_variables(stock_data, indicators, symbol=''):
+    """
+    将单只股票的数据和 TechnicalAnalyzer.calculate_indicators 的结果整理为信号表达式可用的变量
+
+    返回:
+        dict: 同 panel_variables，各数组为 (交易日 × 1)
+    """
+    variables = {
+        name: np.asarray(indicators[name], dtype=np.float64).reshape(-1, 1)
+        for name in indicators
+    }
+    for name in PANEL_FIELDS:
+        variables[name] = stock_data[name].to_numpy(dtype=np.float64).reshape(-1, 1)
+    variables['date'] = pd.DatetimeIndex(stock_data['date'])
+    variables['symbol'] = np.asarray([symbol])
+    return variables
+
+
+class SignalExpression:
+    """
+    选股信号表达式，对 (交易日 × 股票) 数组整体求值
+
+    语法为Python表达式的一个安全子集：
+        - 名称：技术指标（MA5、MACD、K、RSI6、BOLL_lower 等）、价格字段（open/high/low/close/volume）
+          以及 SIGNAL_PRESETS 中的预置信号
+        - 运算：+ - * /、比较（可连写，如 20 < RSI6 < 30）、and/or/not（或 &、|、~）
+        - 函数：cross_above(a, b)、cross_below(a, b)、prev(x, n)（n天前的值，n可省略，默认为1）、abs(x)、
+          ma(x, n)（简单移动平均）、ema(x, n)（指数移动平均），可用于 TechnicalAnalyzer 未预置的周期；
+          prev 的 n 须为非负整数，ma/ema 的 n 须为正整数
+
+    例如 'macd_golden_cross and RSI6 < 30'、'close < BOLL_lower or kdj_oversold'。
+    """
+
+    def __init__(self, expression):
+        """
+        参数:
+            expression (str): 信号表达式
+
+        异常:
+            ValueError: 表达式语法错误或包含不支持的语法
+        """
+        self.expression = expression
+        try:
+            self.tree = ast.parse(expression, mode='eval').body
+        except SyntaxError as e:
+            raise ValueError(f"信号表达式语法错误: {expression} ({e.msg})")
+        self.names = self._collect_names(self.tree)
+
+    def _collect_names(self, node):
+        """
+        收集表达式引用的指标和价格字段名称，预置信号展开为其引用的名称
+        """
+        names = []
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call):
+                self._check_call(child)
+            elif isinstance(child, ast.Name) and child.id not in SIGNAL_FUNCTIONS:
+                if child.id in SIGNAL_PRESETS:
+                    names.extend(SignalExpression(SIGNAL_PRESETS[child.id]).names)
+                elif child.id not in names:
+                    names.append(child.id)
+        return list(dict.fromkeys(names))
+
+    @staticmethod
+    def _check_call(node):
+        """
+        检查函数调用：函数在白名单中，参数个数正确，周期和平移天数为整数常量
+        """
+        if not isinstance(node.func, ast.Name) or node.func.id not in SIGNAL_FUNCTIONS:
+            raise ValueError(f"信号表达式中不支持的函数: {ast.unparse(node.func)}")
+        name = node.func.id
+        if node.keywords:
+            raise ValueError(f"信号表达式中的函数不支持关键字参数: {ast.unparse(node)}")
+        min_args, max_args = _FUNCTION_ARITY[name]
+        if not min_args <= len(node.args) <= max_args:
+            expected = min_args if min_args == max_args else f"{min_args}~{max_args}"
+            raise ValueError(f"函数 {name} 需要 {expected} 个参数: {ast.unparse(node)}")
+        if name in _INTEGER_ARGS:
+            position, minimum = _INTEGER_ARGS[name]
+            if position < len(node.args):
+                arg = node.args[position]
+                value = arg.value if isinstance(arg, ast.Constant) else None
+                if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+                    raise ValueError(f"函数 {name} 的第{position + 1}个参数必须是不小于 {minimum} 的整数: "
+                                     f"{ast.unparse(node)}")
+
+    def evaluate(self, variables, cache=None):
+        """
+        对表达式求值
+
+        参数:
+            variables (dict): 名称到 (交易日 × 股票) numpy数组的映射
+            cache (dict): 函数调用结果的缓存，键为调用的表达式文本；对同一组变量求值多个表达式时传入同一个字典，
+                          相同的子表达式（如 ma(close, 20)）只计算一次
+
+        返回:
+            numpy.ndarray: 求值结果，比较和逻辑运算得到布尔数组；NaN参与比较的结果为False
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._eval(self.tree, variables, cache)
+
+    def _eval(self, node, variables, cache):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id in variables:
+                return variables[node.id]
+            if node.id in SIGNAL_PRESETS:
+                return SignalExpression(SIGNAL_PRESETS[node.id]).evaluate(variables, cache)
+            raise ValueError(f"信号表达式中未知的名称: {node.id}")
+        if isinstance(node, ast.BoolOp):
+            func = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = self._eval(node.values[0], variables, cache)
+            for value in node.values[1:]:
+                result = func(result, self._eval(value, variables, cache))
+            return result
+        if isinstance(node, ast.UnaryOp):
+            operand = self._eval(node.operand, variables, cache)
+            if isinstance(node.op, (ast.Not, ast.Invert)):
+                return np.logical_not(operand)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            return _BINARY_OPS[type(node.op)](self._eval(node.left, variables, cache),
+                                              self._eval(node.right, variables, cache))
+        if isinstance(node, ast.Compare):
+            left = self._eval(node.left, variables, cache)
+            result = True
+            for op, comparator in zip(node.ops, node.comparators):
+                if type(op) not in _COMPARE_OPS:
+                    raise ValueError(f"信号表达式中不支持的比较运算: {ast.unparse(node)}")
+                right = self._eval(comparator, variables, cache)
+                result = np.logical_and(result, _COMPARE_OPS[type(op)](left, right))
+                left = right
+            return result
+        if isinstance(node, ast.Call):
+            key = ast.unparse(node)
+            if cache is not None and key in cache:
+                return cache[key]
+            args = [self._eval(arg, variables, cache) for arg in node.args]
+            result = SIGNAL_FUNCTIONS[node.func.id](*args)
+            if cache is not None:
+                cache[key] = result
+            return result
+        raise ValueError(f"信号表达式中不支持的语法: {ast.unparse(node)}")
+
+
+class SignalScreener:
+    """
+    全市场信号选股器，在全市场面板上以向量化方式对所有股票同时求值信号表达式
+
+    技术指标由 PanelIndicatorEngine 按 TechnicalAnalyzer 的定义一次性计算，面板和指标在进程内缓存，
+    本地数据仓库更新后自动重建面板，重复筛选只需对缓存的数组重新求值。
+    """
+
+    def __init__(self, data_dir='./data', panel_dir=None, lookback=250):
+        """
+        参数:
+            data_dir (str): 本地数据目录
+            panel_dir (str): 面板目录，默认为 {data_dir}/panel
+            lookback (int): 计算技术指标使用的最近交易日数量，需覆盖MA60和MACD的预热期
+        """
+        self.data_store = StockDataStore(data_dir)
+        self.panel_dir = panel_dir or os.path.join(data_dir, 'panel')
+        self.lookback = lookback
+        self.engine = PanelIndicatorEngine()
+        self._variables = None
+        self._panel_mtime = None
+        self._fresh_state = None
+        self._lock = threading.Lock()
+
+    def _panel_is_stale(self):
+        """
+        面板不存在，或数据仓库中有比面板更新的K线文件
+
+        K线文件通过替换写入，会更新数据仓库目录的修改时间；目录和面板都没有变化时沿用上次的检查结果，
+        不再逐个查看文件
+        """
+        meta_path = os.path.join(self.panel_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return True
+        panel_mtime = os.path.getmtime(meta_path)
+        store_mtime_ns = os.stat(self.data_store.data_dir).st_mtime_ns
+        state = (store_mtime_ns, panel_mtime)
+        if state == self._fresh_state:
+            return False
+
+        with os.scandir(self.data_store.data_dir) as entries:
+            stale = any(entry.name.endswith('.parquet') and entry.stat().st_mtime > panel_mtime
+                        for entry in entries)
+        # 修改时间精度有限，刚刚变化的目录不缓存，避免同一时间片内的后续写入被忽略
+        if not stale and time.time_ns() - store_mtime_ns > 2_000_000_000:
+            self._fresh_state = state
+        return stale
+
+    def load_panel(self, rebuild=False):
+        """
+        打开全市场面板，面板过期或 rebuild=True 时先从本地数据仓库重建
+
+        返回:
+            UniversePanel: 全市场面板
+        """
+        if rebuild or self._panel_is_stale():
+            print("正在从本地数据仓库构建全市场面板...")
+            return UniversePanel.build(self.data_store, self.panel_dir)
+        return UniversePanel(self.panel_dir)
+
+    def _load_variables(self, rebuild=False):
+        """
+        返回表达式可用的全部变量（价格字段和技术指标），面板未变化时复用缓存
+        """
+        with self._lock:
+            return self._load_variables_locked(rebuild)
+
+    def _load_variables_locked(self, rebuild):
+        panel = self.load_panel(rebuild)
+        panel_mtime = os.path.getmtime(os.path.join(self.panel_dir, 'meta.json'))
+        if self._variables is not None and panel_mtime == self._panel_mtime:
+            return self._variables
+
+        variables = panel_variables(panel, self.lookback, engine=self.engine)
+        self._variables = variables
+        self._panel_mtime = panel_mtime
+        return variables
+
+    def screen(self, expression, sort_by=DEFAULT_SORT_BY, ascending=False, limit=50, date=None, rebuild=False):
+        """
+        筛选满足信号表达式的股票并排序
+
+        参数:
+            expression (str): 信号表达式，见 SignalExpression
+            sort_by (str): 排序表达式，默认为相对成交量
+            ascending (bool): 是否升序排列
+            limit (int): 最多返回的股票数量，None表示不限制
+            date (str): 筛选日期，默认为面板中的最后一个交易日
+            rebuild (bool): 是否强制重建面板
+
+        返回:
+            pandas.DataFrame: 命中的股票，列为 symbol、date、close、score 以及表达式引用的各项指标，按 score 排序
+        """
+        signal = SignalExpression(expression)
+        ranking = SignalExpression(sort_by)
+        variables = self._load_variables(rebuild)
+
+        dates = variables['date']
+        if date is None:
+            row = len(dates) - 1
+        else:
+            row = dates.searchsorted(pd.to_datetime(date), side='right') - 1
+            if row < 0:
+                raise ValueError(f"面板中没有 {date} 及之前的交易数据")
+
+        cache = {}
+        matched = np.broadcast_to(signal.evaluate(variables, cache), variables['close'].shape)[row]
+        # 当日停牌或未上市的股票不参与筛选
+        matched = matched & ~np.isnan(variables['close'][row])
+        columns = np.flatnonzero(matched)
+
+        score = np.broadcast_to(ranking.evaluate(variables, cache), variables['close'].shape)[row, columns]
+        result = pd.DataFrame({
+            'symbol': variables['symbol'][columns],
+            'date': dates[row],
+            'close': variables['close'][row, columns],
+            'score': score,
+        })
+        for name in signal.names:
+            if name not in result.columns:
+                result[name] = variables[name][row, columns]
+
+        result = result.sort_values('score', ascending=ascending, na_position='last', kind='stable')
+        if limit is not None:
+            result = result.head(limit)
+        return result.reset_index(drop=True)
+
+
+# 进程内共享的选股器，面板和技术指标在多次筛选之间复用
+_default_screener = None
+_default_screener_lock = threading.Lock()
+
+
+def get_default_screener():
+    """
+    获取进程内共享的 SignalScreener 实例
+    """
+    global _default_screener
+    with _default_screener_lock:
+        if _default_screener is None:
+            _default_screener = SignalScreener()
+        return _default_screener
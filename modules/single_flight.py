@@ -0,0 +1,67 @@
+import threading
+
+
+class _Call:
+    """
+    一次正在执行的调用
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    请求合并：同一个key的并发调用只执行一次，其余调用者等待并共享同一个结果
+
+    调用结束后立即移除该key，之后的调用会重新执行。共享的结果对象不应被调用者修改。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        执行 func(*args, **kwargs)，若相同key的调用正在进行则等待其结果
+
+        参数:
+            key (hashable): 合并请求使用的key，如 (股票代码, 周期, AI供应商)
+            func (callable): 实际执行的函数
+
+        返回:
+            func 的返回值；func 抛出的异常会传递给所有等待者
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result
+
+    def in_flight(self):
+        """
+        返回正在执行的key列表
+        """
+        with self._lock:
+            return list(self._calls)
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from .data_sources import get_default_data_source
+from .single_flight import SingleFlight
+
+
+class SymbolInfoCache:
+    """
+    股票基本信息缓存，避免同一次分析中多次调用 ak.stock_individual_info_em
+
+    - 内存缓存按LRU淘汰，超过 max_size 时移除最久未使用的股票
+    - 缓存以自然日为有效期，同一只股票每天最多从网络获取一次；并发的未命中请求合并为一次获取
+    - 设置 persist_path 后缓存会保存到磁盘，进程重启后仍然有效。新条目累积到 flush_every 条
+      或距上次保存超过 flush_interval 秒时才整体写入一次，进程退出时写入剩余的条目
+    """
+
+    def __init__(self, max_size=2048, persist_path=None, data_source=None, flush_every=64, flush_interval=30):
+        """
+        初始化缓存
+
+        参数:
+            max_size (int): 内存中最多缓存的股票数量
+            persist_path (str): 持久化文件路径，为None时只使用内存缓存
+            data_source (BaseDataSource): 数据源，为None时使用进程内默认数据源
+            flush_every (int): 未保存的条目达到该数量时写入磁盘
+            flush_interval (float): 距上次保存超过该秒数时写入磁盘
+        """
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.data_source = data_source
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = 0
+        self._last_save = time.monotonic()
+        self._flight = SingleFlight()
+        if persist_path:
+            self._load()
+            atexit.register(self.flush)
+
+    def get_info(self, stock_code):
+        """
+        获取股票基本信息
+
+        参数:
+            stock_code (str): 股票代码，如 '000001'
+
+        返回:
+            dict: {item: value} 形式的基本信息，股票不存在时返回空字典
+        """
+        today = datetime.now().strftime('%Y%m%d')
+        with self._lock:
+            entry = self._cache.get(stock_code)
+            if entry is not None and entry['date'] == today:
+                self._cache.move_to_end(stock_code)
+                return dict(entry['info'])
+
+        return dict(self._flight.do((stock_code, today), self._fetch, stock_code, today))
+
+    def _fetch(self, stock_code, today):
+        # 从数据源获取并写入缓存，同一只股票的并发未命中只执行一次
+        data_source = self.data_source or get_default_data_source()
+        stock_info = data_source.individual_info(stock_code)
+        info = {}
+        if not stock_info.empty:
+            info = {
+                item: self._to_builtin(value)
+                for item, value in zip(stock_info['item'], stock_info['value'])
+            }
+
+        with self._lock:
+            self._cache[stock_code] = {'date': today, 'info': info}
+            self._cache.move_to_end(stock_code)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+            self._dirty += 1
+            should_flush = (self._dirty >= self.flush_every
+                            or time.monotonic() - self._last_save >= self.flush_interval)
+
+        if should_flush:
+            self.flush()
+        return info
+
+    def get_name(self, stock_code):
+        """
+        获取股票简称，获取失败时返回股票代码
+        """
+        try:
+            return self.get_info(stock_code).get('股票简称', stock_code)
+        except Exception:
+            return stock_code
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._cache.clear()
+            self._dirty += 1
+        self.flush()
+
+    def flush(self):
+        """
+        将未保存的条目写入磁盘；快照在锁内复制，写文件在锁外进行，不阻塞查询
+        """
+        if not self.persist_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = dict(self._cache)
+                dirty = self._dirty
+                self._dirty = 0
+                self._last_save = time.monotonic()
+            if not self._save(snapshot):
+                with self._lock:
+                    self._dirty += dirty
+
+    @staticmethod
+    def _to_builtin(value):
+        # numpy标量转换为Python内置类型，便于JSON序列化
+        return value.item() if hasattr(value, 'item') else value
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            for stock_code, entry in list(entries.items())[-self.max_size:]:
+                self._cache[stock_code] = entry
+        except Exception as e:
+            print(f"读取股票信息缓存时出错: {e}")
+
+    def _save(self, entries):
+        try:
+            os.makedirs(os.path.dirname(self.persist_path) or '.', exist_ok=True)
+            tmp_path = f"{self.persist_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+            return True
+        except Exception as e:
+            print(f"保存股票信息缓存时出错: {e}")
+            return False
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_symbol_info_cache():
+    """
+    获取进程内共享的股票基本信息缓存，默认持久化到 ./data/symbol_info.json
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SymbolInfoCache(persist_path=os.path.join('./data', 'symbol_info.json'))
+        return _default_cache
+
+
+def configure_symbol_info_cache(max_size=2048, persist_path=None):
+    """
+    替换进程内共享的股票基本信息缓存，persist_path 为None时关闭磁盘持久化
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is not None:
+            _default_cache.flush()
+        _default_cache = SymbolInfoCache(max_size=max_size, persist_path=persist_path)
+        return _default_cache
@@ -1,20 +1,209 @@
+import math
+from collections.abc import Mapping
+
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 快照模式下，递推类指标（MACD、KDJ）只取最近一段数据预热，初始值带来的误差衰减到该比例以下
+SNAPSHOT_TOLERANCE = 1e-6
+
+
+class IndicatorSpec:
+    """
+    指标定义：计算函数、参数、依赖的其他指标以及输出的指标名称
+    """
+
+    def __init__(self, name, func, params=None, depends=None, outputs=None, public=True,
+                 tail_func=None, lookback=None):
+        """
+        参数:
+            name (str): 指标名称
+            func (callable): 计算函数 func(data, **params, **依赖指标)，返回Series或dict
+            params (dict): 计算参数
+            depends (dict): 计算函数的参数名到所依赖指标名称的映射，计算前会先得到这些指标
+            outputs (dict): 计算函数返回dict时，结果键到输出指标名称的映射；为None时输出名即 name
+            public (bool): 是否包含在默认的指标集合中，False表示仅供其他指标依赖的中间结果
+            tail_func (callable): 快照模式的计算函数 tail_func(arrays, tail, **params)，
+                                  arrays 为各列的numpy数组，只返回最后 tail 个值（数组或dict）
+            lookback (int): 没有 tail_func 时，计算最后一个值所需的最少行数，为None时使用全部数据
+        """
+        self.name = name
+        self.func = func
+        self.params = dict(params or {})
+        self.depends = dict(depends or {})
+        self.outputs = dict(outputs) if outputs else None
+        self.public = public
+        self.tail_func = tail_func
+        self.lookback = lookback
+
+    @property
+    def output_names(self):
+        return list(self.outputs.values()) if self.outputs else [self.name]
+
+
+class IndicatorRegistry:
+    """
+    指标注册表，记录每个输出指标由哪个定义计算
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._producers = {}
+
+    def register(self, name, func, params=None, depends=None, outputs=None, public=True,
+                 tail_func=None, lookback=None):
+        """
+        注册指标，参数同 IndicatorSpec；同名指标会被覆盖
+        """
+        spec = IndicatorSpec(name, func, params, depends, outputs, public, tail_func, lookback)
+        self._specs[name] = spec
+        for output in spec.output_names:
+            self._producers[output] = spec
+        return spec
+
+    def specs(self):
+        """
+        返回全部指标定义
+        """
+        return list(self._specs.values())
+
+    def names(self, include_hidden=False):
+        """
+        返回全部输出指标的名称，默认不包括中间结果
+        """
+        return [output for spec in self._specs.values() if include_hidden or spec.public
+                for output in spec.output_names]
+
+    def producer(self, name):
+        """
+        返回计算某个输出指标的定义
+        """
+        if name not in self._producers:
+            raise KeyError(f"未注册的技术指标: {name}")
+        return self._producers[name]
+
+    def resolve(self, names):
+        """
+        按依赖关系展开指标，返回计算顺序
+
+        参数:
+            names (list): 需要的指标名称
+
+        返回:
+            list: 需要计算的指标定义，被依赖的定义排在前面，共用的中间结果只出现一次
+        """
+        order = []
+        visiting = set()
+        done = set()
+
+        def visit(spec):
+            if spec.name in done:
+                return
+            if spec.name in visiting:
+                raise ValueError(f"技术指标存在循环依赖: {spec.name}")
+            visiting.add(spec.name)
+            for dependency in spec.depends.values():
+                visit(self.producer(dependency))
+            visiting.discard(spec.name)
+            done.add(spec.name)
+            order.append(spec)
+
+        for name in names:
+            visit(self.producer(name))
+        return order
+
+    def copy(self):
+        """
+        复制注册表，用于在不影响默认注册表的情况下增加指标
+        """
+        registry = IndicatorRegistry()
+        registry._specs = dict(self._specs)
+        registry._producers = dict(self._producers)
+        return registry
+
+
+class LazyIndicators(Mapping):
+    """
+    按需计算的指标字典，每个指标在第一次访问时才计算（连同其依赖），结果缓存供后续访问
+
+    访问时返回指标序列的副本，调用方修改返回值不会影响已缓存的结果。
+    """
+
+    def __init__(self, registry, stock_data, names, values=None, on_compute=None):
+        self._registry = registry
+        self._data = stock_data
+        self._names = list(names)
+        # 已计算的指标，可传入 IndicatorCache 中缓存的指标
+        self._values = {} if values is None else values
+        # 有新计算的指标时以全部已计算的指标调用，用于写回 IndicatorCache
+        self._on_compute = on_compute
+
+    def __getitem__(self, name):
+        if name not in self._names:
+            raise KeyError(name)
+        count = len(self._values)
+        value = self._compute(name)
+        if self._on_compute is not None and len(self._values) > count:
+            self._on_compute(self._values)
+        return value.copy()
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def computed(self):
+        """
+        返回已经计算过的指标名称（包括中间结果）
+        """
+        return list(self._values)
+
+    def compute(self, spec):
+        """
+        计算某个指标定义的全部输出，依赖的指标若尚未计算则先计算
+        """
+        if spec.output_names[0] in self._values:
+            return
+        kwargs = dict(spec.params)
+        for arg, dependency in spec.depends.items():
+            kwargs[arg] = self._compute(dependency)
+        result = spec.func(self._data, **kwargs)
+        if spec.outputs:
+            for key, output in spec.outputs.items():
+                self._values[output] = result[key]
+        else:
+            self._values[spec.name] = result
+
+    def _compute(self, name):
+        if name not in self._values:
+            self.compute(self._registry.producer(name))
+        return self._values[name]
+
 
 class TechnicalAnalyzer:
     """
     技术分析类，负责计算各种技术指标
     """
     
-    def __init__(self):
-        pass
+    def __init__(self, registry=None, cache=None):
+        """
+        参数:
+            registry (IndicatorRegistry): 指标注册表，默认使用模块级的 default_registry
+            cache (IndicatorCache): 指标结果缓存，输入数据和注册表未变化时直接返回已计算的指标；默认不缓存
+        """
+        self.registry = registry or default_registry
+        self.cache = cache
     
-    def calculate_indicators(self, stock_data):
+    def calculate_indicators(self, stock_data, names=None, lazy=False):
         """
         计算各种技术指标
         
         参数:
             stock_data (pandas.DataFrame): 股票历史数据
+            names (list): 需要的指标名称，默认为注册表中的全部公开指标；只计算这些指标及其依赖
+            lazy (bool): 为True时返回按需计算的 LazyIndicators，访问某个指标时才计算
             
         返回:
             dict: 包含各种技术指标的字典
@@ -22,63 +211,92 @@ class TechnicalAnalyzer:
         if stock_data.empty:
             return {}
         
-        # 创建结果字典
-        indicators = {}
+        if names is None:
+            names = self.registry.names()
         
-        # 计算移动平均线
-        indicators['MA5'] = self._calculate_ma(stock_data, 5)
-        indicators['MA10'] = self._calculate_ma(stock_data, 10)
-        indicators['MA20'] = self._calculate_ma(stock_data, 20)
-        indicators['MA30'] = self._calculate_ma(stock_data, 30)
-        indicators['MA60'] = self._calculate_ma(stock_data, 60)
+        values = {}
+        on_compute = None
+        if self.cache is not None:
+            key = self.cache.make_key(stock_data, self.registry)
+            values = self.cache.get(key) or {}
+            # 惰性计算出新的指标时立即写回缓存（包括磁盘层），不依赖之后再次命中
+            on_compute = lambda computed: self.cache.put(key, computed)
+        indicators = LazyIndicators(self.registry, stock_data, names, values, on_compute)
+        if lazy:
+            return indicators
         
-        # 计算MACD
-        macd_result = self._calculate_macd(stock_data)
-        indicators['MACD'] = macd_result['MACD']
-        indicators['MACD_signal'] = macd_result['signal']
-        indicators['MACD_hist'] = macd_result['hist']
-        
-        # 计算KDJ
-        kdj_result = self._calculate_kdj(stock_data)
-        indicators['K'] = kdj_result['K']
-        indicators['D'] = kdj_result['D']
-        indicators['J'] = kdj_result['J']
+        # 按依赖顺序计算，共用的中间结果（均线、涨跌幅等）只计算一次，已缓存的指标直接复用
+        count = len(values)
+        for spec in self.registry.resolve(names):
+            indicators.compute(spec)
+        if on_compute is not None and len(values) > count:
+            on_compute(values)
+        return {name: values[name].copy() for name in names}
+    
+    def calculate_snapshot(self, stock_data, names=None, tail=1):
+        """
+        只计算各指标最后一个（或最后 tail 个）值，用于构建提示词等只需要最新数据的场景
         
-        # 计算RSI
-        indicators['RSI6'] = self._calculate_rsi(stock_data, 6)
-        indicators['RSI12'] = self._calculate_rsi(stock_data, 12)
-        indicators['RSI24'] = self._calculate_rsi(stock_data, 24)
+        每个指标只使用其所需的最少回看数据，不计算完整序列。滑动窗口类指标与 calculate_indicators 完全一致；
+        MACD、KDJ等递推类指标只取最近一段数据预热，与完整计算的差异低于 SNAPSHOT_TOLERANCE。
         
-        # 计算布林带
-        bollinger_result = self._calculate_bollinger_bands(stock_data)
-        indicators['BOLL_upper'] = bollinger_result['upper']
-        indicators['BOLL_middle'] = bollinger_result['middle']
-        indicators['BOLL_lower'] = bollinger_result['lower']
+        参数:
+            stock_data (pandas.DataFrame): 股票历史数据
+            names (list): 需要的指标名称，默认为注册表中的全部公开指标
+            tail (int): 每个指标返回的最新值个数
+            
+        返回:
+            dict: 扁平的指标记录，tail为1时为 {指标名称: 最新值}，否则为 {指标名称: 最近tail个值的列表（时间正序）}
+        """
+        if stock_data.empty:
+            return {}
         
-        # 计算成交量变化
-        indicators['volume_ma5'] = self._calculate_volume_ma(stock_data, 5)
-        indicators['volume_ma10'] = self._calculate_volume_ma(stock_data, 10)
+        if names is None:
+            names = self.registry.names()
+        arrays = {column: stock_data[column].to_numpy(dtype=np.float64)
+                  for column in ('open', 'high', 'low', 'close', 'volume') if column in stock_data.columns}
         
-        # 计算BIAS乖离率
-        indicators['BIAS6'] = self._calculate_bias(stock_data, 6)
-        indicators['BIAS12'] = self._calculate_bias(stock_data, 12)
-        indicators['BIAS24'] = self._calculate_bias(stock_data, 24)
+        values = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name in names:
+                if name in values:
+                    continue
+                spec = self.registry.producer(name)
+                if spec.tail_func is not None:
+                    result = spec.tail_func(arrays, tail, **spec.params)
+                else:
+                    # 没有快照实现的指标：在最少所需的数据上按常规方式计算
+                    rows = len(stock_data) if spec.lookback is None else spec.lookback + tail - 1
+                    sliced = stock_data.tail(rows).reset_index(drop=True)
+                    series = LazyIndicators(self.registry, sliced, spec.output_names)
+                    result = {output: series[output].to_numpy()[-tail:] for output in spec.output_names}
+                    result = result if spec.outputs else result[spec.name]
+                if spec.outputs:
+                    for key, output in spec.outputs.items():
+                        values[output] = result[output if spec.tail_func is None else key]
+                else:
+                    values[spec.name] = result
         
-        return indicators
+        if tail == 1:
+            return {name: float(values[name][-1]) for name in names}
+        return {name: [float(value) for value in values[name]] for name in names}
     
-    def _calculate_ma(self, data, window):
+    @staticmethod
+    def _calculate_ma(data, window):
         """
         计算移动平均线
         """
         return data['close'].rolling(window=window).mean()
     
-    def _calculate_volume_ma(self, data, window):
+    @staticmethod
+    def _calculate_volume_ma(data, window):
         """
         计算成交量移动平均线
         """
         return data['volume'].rolling(window=window).mean()
     
-    def _calculate_macd(self, data, fast_period=12, slow_period=26, signal_period=9):
+    @staticmethod
+    def _calculate_macd(data, fast_period=12, slow_period=26, signal_period=9):
         """
         计算MACD指标
         """
@@ -101,7 +319,8 @@ class TechnicalAnalyzer:
             'hist': histogram
         }
     
-    def _calculate_kdj(self, data, n=9, m1=3, m2=3):
+    @staticmethod
+    def _calculate_kdj(data, n=9, m1=3, m2=3):
         """
         计算KDJ指标
         """
@@ -113,19 +332,14 @@ class TechnicalAnalyzer:
         rsv = 100 * ((data['close'] - low_min) / (high_max - low_min))
         rsv = rsv.fillna(50)
         
-        # 计算K值
-        k = pd.Series(0.0, index=data.index)
-        d = pd.Series(0.0, index=data.index)
-        j = pd.Series(0.0, index=data.index)
-        
-        for i in range(len(data)):
-            if i == 0:
-                k[i] = 50
-                d[i] = 50
-            else:
-                k[i] = (m1 - 1) * k[i-1] / m1 + rsv[i] / m1
-                d[i] = (m2 - 1) * d[i-1] / m2 + k[i] / m2
-            j[i] = 3 * k[i] - 2 * d[i]
+        # 计算K、D、J值
+        # K、D为平滑系数1/m的递推平均，首日取50：k[i] = (m1-1)/m1 * k[i-1] + rsv[i]/m1，
+        # 等价于首项替换为50后 adjust=False 的指数加权平均，由pandas向量化计算
+        k_input = rsv.copy()
+        k_input.iloc[0] = 50
+        k = k_input.ewm(alpha=1 / m1, adjust=False).mean()
+        d = k.ewm(alpha=1 / m2, adjust=False).mean()
+        j = 3 * k - 2 * d
         
         return {
             'K': k,
@@ -133,16 +347,34 @@ class TechnicalAnalyzer:
             'J': j
         }
     
-    def _calculate_rsi(self, data, period):
+    @staticmethod
+    def _calculate_price_change(data):
         """
-        计算RSI指标
+        计算收盘价的逐日变化
+        """
+        return data['close'].diff()
+    
+    @staticmethod
+    def _calculate_gain_loss(data, delta=None):
+        """
+        分离逐日上涨和下跌幅度，delta 为已计算好的收盘价变化
+        """
+        if delta is None:
+            delta = TechnicalAnalyzer._calculate_price_change(data)
+        return {
+            'gain': delta.where(delta > 0, 0),
+            'loss': -delta.where(delta < 0, 0)
+        }
+    
+    @staticmethod
+    def _calculate_rsi(data, period, gain=None, loss=None):
+        """
+        计算RSI指标，gain/loss 为已分离好的上涨和下跌幅度
         """
-        # 计算价格变化
-        delta = data['close'].diff()
-        
         # 分离上涨和下跌
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
+        if gain is None or loss is None:
+            gain_loss = TechnicalAnalyzer._calculate_gain_loss(data)
+            gain, loss = gain_loss['gain'], gain_loss['loss']
         
         # 计算平均上涨和下跌
         avg_gain = gain.rolling(window=period).mean()
@@ -156,12 +388,13 @@ class TechnicalAnalyzer:
         
         return rsi
     
-    def _calculate_bollinger_bands(self, data, window=20, num_std=2):
+    @staticmethod
+    def _calculate_bollinger_bands(data, window=20, num_std=2, middle=None):
         """
-        计算布林带
+        计算布林带，middle 为已计算好的同周期均线
         """
         # 计算中轨线（简单移动平均线）
-        middle_band = data['close'].rolling(window=window).mean()
+        middle_band = middle if middle is not None else data['close'].rolling(window=window).mean()
         
         # 计算标准差
         std = data['close'].rolling(window=window).std()
@@ -176,10 +409,176 @@ class TechnicalAnalyzer:
             'lower': lower_band
         }
     
-    def _calculate_bias(self, data, period):
+    @staticmethod
+    def _calculate_bias(data, period, ma=None):
         """
-        计算乖离率
+        计算乖离率，ma 为已计算好的同周期均线
         """
-        ma = self._calculate_ma(data, period)
+        if ma is None:
+            ma = TechnicalAnalyzer._calculate_ma(data, period)
         bias = (data['close'] - ma) / ma * 100
-        return bias
\ No newline at end of file
+        return bias
+
+
+def _ema_warmup(alpha):
+    """
+    指数平滑的预热长度，使初始值的影响衰减到 SNAPSHOT_TOLERANCE 以下
+    """
+    return int(math.ceil(math.log(SNAPSHOT_TOLERANCE) / math.log(1 - alpha)))
+
+
+def _tail_windows(values, window, tail):
+    """
+    返回最后 tail 个位置各自的长度为 window 的窗口 (tail × window)，数据不足时前面补NaN
+    """
+    needed = window + tail - 1
+    values = values[-needed:]
+    if len(values) < needed:
+        values = np.concatenate([np.full(needed - len(values), np.nan), values])
+    return sliding_window_view(values, window)
+
+
+def _tail_last(values, tail):
+    """
+    最后 tail 个值，数据不足时前面补NaN
+    """
+    values = values[-tail:]
+    if len(values) < tail:
+        values = np.concatenate([np.full(tail - len(values), np.nan), values])
+    return values
+
+
+def _ewm_tail(values, alpha):
+    """
+    从第一个值开始递推的指数平滑（与 pandas ewm(alpha=alpha, adjust=False) 一致）
+    """
+    out = []
+    current = None
+    for value in values.tolist():
+        current = value if current is None else (1 - alpha) * current + alpha * value
+        out.append(current)
+    return np.array(out)
+
+
+def _tail_ma(arrays, tail, window):
+    return _tail_windows(arrays['close'], window, tail).mean(axis=1)
+
+
+def _tail_volume_ma(arrays, tail, window):
+    return _tail_windows(arrays['volume'], window, tail).mean(axis=1)
+
+
+def _tail_bias(arrays, tail, period):
+    ma = _tail_ma(arrays, tail, period)
+    return (_tail_last(arrays['close'], tail) - ma) / ma * 100
+
+
+def _tail_bollinger_bands(arrays, tail, window=20, num_std=2):
+    windows = _tail_windows(arrays['close'], window, tail)
+    middle = windows.mean(axis=1)
+    std = windows.std(axis=1, ddof=1)
+    return {'upper': middle + std * num_std, 'middle': middle, 'lower': middle - std * num_std}
+
+
+def _tail_rsi(arrays, tail, period):
+    close = arrays['close'][-(period + tail):]
+    delta = np.diff(close)
+    if len(close) == len(arrays['close']):
+        # 包含首日时，首日的涨跌记为0
+        delta = np.concatenate([[0.0], delta])
+    avg_gain = _tail_windows(np.where(delta > 0, delta, 0.0), period, tail).mean(axis=1)
+    avg_loss = _tail_windows(np.where(delta < 0, -delta, 0.0), period, tail).mean(axis=1)
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def _tail_macd(arrays, tail, fast_period=12, slow_period=26, signal_period=9):
+    warmup = _ema_warmup(2 / (slow_period + 1)) + _ema_warmup(2 / (signal_period + 1))
+    close = arrays['close'][-(warmup + tail):]
+    macd_line = _ewm_tail(close, 2 / (fast_period + 1)) - _ewm_tail(close, 2 / (slow_period + 1))
+    signal_line = _ewm_tail(macd_line, 2 / (signal_period + 1))
+    return {
+        'MACD': _tail_last(macd_line, tail),
+        'signal': _tail_last(signal_line, tail),
+        'hist': _tail_last(macd_line - signal_line, tail)
+    }
+
+
+def _tail_kdj(arrays, tail, n=9, m1=3, m2=3):
+    rows = len(arrays['close'])
+    start = max(0, rows - (_ema_warmup(1 / m1) + _ema_warmup(1 / m2) + tail))
+    
+    # 预热区间内每一行的RSV，窗口向前多取 n-1 行，不足时补NaN；窗口不足或最高价等于最低价时取50
+    window_start = max(0, start - (n - 1))
+    padding = np.full(n - 1 - (start - window_start), np.nan)
+    low_min = sliding_window_view(np.concatenate([padding, arrays['low'][window_start:]]), n).min(axis=1)
+    high_max = sliding_window_view(np.concatenate([padding, arrays['high'][window_start:]]), n).max(axis=1)
+    rsv = 100 * ((arrays['close'][start:] - low_min) / (high_max - low_min))
+    rsv[np.isnan(rsv)] = 50
+    rsv[0] = 50
+    
+    k = _ewm_tail(rsv, 1 / m1)
+    d = _ewm_tail(k, 1 / m2)
+    return {
+        'K': _tail_last(k, tail),
+        'D': _tail_last(d, tail),
+        'J': _tail_last(3 * k - 2 * d, tail)
+    }
+
+
+def _register_builtin_indicators(registry):
+    """
+    注册内置的技术指标
+    """
+    for window in (5, 10, 20, 30, 60):
+        registry.register(f'MA{window}', TechnicalAnalyzer._calculate_ma, params={'window': window},
+                          tail_func=_tail_ma)
+    
+    registry.register('MACD', TechnicalAnalyzer._calculate_macd,
+                      params={'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
+                      outputs={'MACD': 'MACD', 'signal': 'MACD_signal', 'hist': 'MACD_hist'},
+                      tail_func=_tail_macd)
+    
+    registry.register('KDJ', TechnicalAnalyzer._calculate_kdj, params={'n': 9, 'm1': 3, 'm2': 3},
+                      outputs={'K': 'K', 'D': 'D', 'J': 'J'}, tail_func=_tail_kdj)
+    
+    # 各周期RSI共用同一次收盘价差分和涨跌分离
+    registry.register('price_change', TechnicalAnalyzer._calculate_price_change, public=False)
+    registry.register('gain_loss', TechnicalAnalyzer._calculate_gain_loss, depends={'delta': 'price_change'},
+                      outputs={'gain': 'gain', 'loss': 'loss'}, public=False)
+    for period in (6, 12, 24):
+        registry.register(f'RSI{period}', TechnicalAnalyzer._calculate_rsi, params={'period': period},
+                          depends={'gain': 'gain', 'loss': 'loss'}, tail_func=_tail_rsi)
+    
+    # 布林带中轨即20日均线
+    registry.register('BOLL', TechnicalAnalyzer._calculate_bollinger_bands, params={'window': 20, 'num_std': 2},
+                      depends={'middle': 'MA20'},
+                      outputs={'upper': 'BOLL_upper', 'middle': 'BOLL_middle', 'lower': 'BOLL_lower'},
+                      tail_func=_tail_bollinger_bands)
+    
+    for window in (5, 10):
+        registry.register(f'volume_ma{window}', TechnicalAnalyzer._calculate_volume_ma, params={'window': window},
+                          tail_func=_tail_volume_ma)
+    
+    # 乖离率依赖同周期均线，MA6/MA12/MA24只作为中间结果
+    for period in (6, 12, 24):
+        registry.register(f'MA{period}', TechnicalAnalyzer._calculate_ma, params={'window': period}, public=False)
+        registry.register(f'BIAS{period}', TechnicalAnalyzer._calculate_bias, params={'period': period},
+                          depends={'ma': f'MA{period}'}, tail_func=_tail_bias)
+
+
+# 默认的指标注册表
+default_registry = IndicatorRegistry()
+_register_builtin_indicators(default_registry)
+
+
+def register_indicator(name, func, params=None, depends=None, outputs=None, public=True,
+                       tail_func=None, lookback=None):
+    """
+    在默认注册表中注册新的技术指标，参数同 IndicatorSpec
+
+    示例:
+        register_indicator('MA120', TechnicalAnalyzer._calculate_ma, params={'window': 120}, lookback=120)
+        register_indicator('MA5_MA20_gap', lambda data, fast, slow: fast - slow,
+                           depends={'fast': 'MA5', 'slow': 'MA20'}, lookback=20)
+    """
+    return default_registry.register(name, func, params, depends, outputs, public, tail_func, lookback)
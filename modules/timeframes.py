@@ -0,0 +1,154 @@
+import pandas as pd
+
+from .data_store import StockDataStore
+
+# 由日线合成的K线周期及对应的pandas周期代码（周线以周五为一周的结束）
+TIMEFRAME_FREQS = {
+    'weekly': 'W-FRI',
+    'monthly': 'M',
+    'quarterly': 'Q',
+}
+
+# 支持的全部K线周期
+TIMEFRAMES = ['daily'] + list(TIMEFRAME_FREQS)
+
+# 图表标题中使用的周期名称
+TIMEFRAME_LABELS = {
+    'daily': '日',
+    'weekly': '周',
+    'monthly': '月',
+    'quarterly': '季',
+}
+
+
+def resample_bars(daily, timeframe):
+    """
+    将日线合成为周线、月线或季线
+
+    开盘取周期内第一个交易日、收盘取最后一个交易日，最高/最低取极值，成交量、成交额、换手率求和；
+    日期为周期内最后一个交易日。涨跌额、涨跌幅和振幅按上一周期收盘价重新计算。
+
+    参数:
+        daily (pandas.DataFrame): 日线数据（fetch_stock_data 的列格式）
+        timeframe (str): 'daily'、'weekly'、'monthly' 或 'quarterly'
+
+    返回:
+        pandas.DataFrame: 对应周期的K线，列与输入相同
+    """
+    if timeframe == 'daily' or daily.empty:
+        return daily
+    if timeframe not in TIMEFRAME_FREQS:
+        raise ValueError(f"不支持的K线周期: {timeframe}")
+
+    aggregations = {'date': 'last', 'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    for column in ('amount', 'turnover'):
+        if column in daily.columns:
+            aggregations[column] = 'sum'
+
+    periods = daily['date'].dt.to_period(TIMEFRAME_FREQS[timeframe])
+    bars = daily.groupby(periods.to_numpy(), sort=True).agg(aggregations).reset_index(drop=True)
+    return _with_change_columns(bars, daily.columns)
+
+
+def _with_change_columns(bars, columns):
+    """
+    按上一根K线的收盘价计算涨跌额、涨跌幅和振幅，并按原始列顺序排列
+    """
+    prev_close = bars['close'].shift(1)
+    if 'change' in columns:
+        bars['change'] = bars['close'] - prev_close
+    if 'pct_change' in columns:
+        bars['pct_change'] = (bars['close'] - prev_close) / prev_close * 100
+    if 'amplitude' in columns:
+        bars['amplitude'] = (bars['high'] - bars['low']) / prev_close * 100
+    return bars[[column for column in columns if column in bars.columns]]
+
+
+def _resample_since(bars, daily, since, timeframe):
+    """
+    用 since 所在周期起的日线重新合成K线，替换 bars 中对应的部分
+    """
+    period_start = since.to_period(TIMEFRAME_FREQS[timeframe]).start_time
+    head = bars[bars['date'] < period_start]
+    tail = resample_bars(daily[daily['date'] >= period_start], timeframe)
+    merged = pd.concat([head, tail], ignore_index=True)
+    return _with_change_columns(merged, daily.columns)
+
+
+class ResampledBarCache:
+    """
+    多周期K线缓存，将由日线合成的周线、月线、季线按股票代码保存在本地
+
+    每个周期使用独立的 StockDataStore 子目录（{data_dir}/ohlcv_weekly 等），元数据记录合成时使用的日线范围。
+    有新的日线时只重新合成最后一根K线所在周期及之后的部分；日线被向前补齐或因复权整体变化时全部重新合成。
+    """
+
+    def __init__(self, data_dir='./data'):
+        """
+        参数:
+            data_dir (str): 本地数据目录
+        """
+        self.stores = {
+            timeframe: StockDataStore(data_dir, subdir=f"ohlcv_{timeframe}")
+            for timeframe in TIMEFRAME_FREQS
+        }
+
+    def get(self, stock_code, daily, timeframe, now=None):
+        """
+        获取由日线合成的K线，必要时更新本地缓存
+
+        参数:
+            stock_code (str): 股票代码
+            daily (pandas.DataFrame): 该股票的全部日线，可以包含盘中尚未收盘的当日K线
+            timeframe (str): 'weekly'、'monthly' 或 'quarterly'
+
+        返回:
+            pandas.DataFrame: 对应周期的K线；包含当日K线时，最后一根为尚未完成的周期
+        """
+        if timeframe == 'daily' or daily.empty:
+            return daily
+        if timeframe not in TIMEFRAME_FREQS:
+            raise ValueError(f"不支持的K线周期: {timeframe}")
+
+        # 只缓存由已收盘日线合成的K线
+        completed = StockDataStore.completed_bars(daily, now)
+        bars = self._update(stock_code, completed, timeframe) if not completed.empty else completed
+
+        if len(completed) < len(daily):
+            bars = _resample_since(bars, daily, daily['date'].iloc[len(completed)], timeframe)
+        return bars
+
+    def _update(self, stock_code, daily, timeframe):
+        store = self.stores[timeframe]
+        meta = store.load_meta(stock_code)
+        last_date = daily['date'].iloc[-1]
+
+        cached = store.load(stock_code) if self._is_valid(meta, daily) else pd.DataFrame()
+        if not cached.empty and pd.Timestamp(meta['daily_last_date']) == last_date:
+            return cached
+
+        if cached.empty:
+            bars = resample_bars(daily, timeframe)
+        else:
+            # 最后一根K线所在周期可能尚未结束，从该周期起重新合成
+            bars = _resample_since(cached, daily, cached['date'].iloc[-1], timeframe)
+
+        try:
+            store.save(stock_code, bars, {
+                'daily_first_date': daily['date'].iloc[0].strftime('%Y-%m-%d'),
+                'daily_last_date': last_date.strftime('%Y-%m-%d'),
+                'daily_last_close': float(daily['close'].iloc[-1]),
+            })
+        except Exception as e:
+            print(f"保存{TIMEFRAME_LABELS[timeframe]}K线缓存时出错: {e}")
+        return bars
+
+    @staticmethod
+    def _is_valid(meta, daily):
+        """
+        缓存对应的日线范围仍然有效：起始日期未变，且上次合成时最后一个交易日的收盘价未因复权而变化
+        """
+        if not meta or daily['date'].iloc[0].strftime('%Y-%m-%d') != meta.get('daily_first_date'):
+            return False
+        last = daily[daily['date'] == pd.Timestamp(meta['daily_last_date'])]
+        return not last.empty and abs(float(last['close'].iloc[0]) - meta['daily_last_close']) <= 1e-6
@@ -0,0 +1,188 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# 面板中保存的字段
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class UniversePanel:
+    """
+    全市场面板数据：每个字段保存为一个 (交易日 × 股票) 的numpy数组文件，以内存映射方式只读打开
+
+    目录布局：
+        {panel_dir}/meta.json     交易日、股票代码和字段列表
+        {panel_dir}/{field}.npy   (len(dates), len(symbols)) 数组，未上市或停牌的交易日为NaN
+
+    多个进程打开同一个面板时共享操作系统的页缓存，内存占用不随进程数增加。
+
+    数组按行优先存储，同一交易日的全部股票在磁盘上连续，适合横截面计算（按交易日遍历全市场，
+    见 PanelIndicatorEngine 和 SignalScreener）。单只股票的一列（symbol_view、to_stock_data）
+    是跨步读取，每个交易日都要触及不同的页，只适合少量股票的取用，不宜用于逐只遍历全市场。
+
+    重建面板时新数据先写入临时文件，再整体替换原文件；已打开的面板继续读取替换前的数据，
+    需要新数据时重新打开。
+    """
+
+    def __init__(self, panel_dir):
+        """
+        以只读内存映射方式打开面板
+
+        参数:
+            panel_dir (str): 面板目录
+        """
+        self.panel_dir = panel_dir
+        with open(os.path.join(panel_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.dates = pd.DatetimeIndex(pd.to_datetime(meta['dates']), name='date')
+        self.symbols = list(meta['symbols'])
+        self.fields = list(meta['fields'])
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._arrays = {
+            field: np.load(os.path.join(panel_dir, f"{field}.npy"), mmap_mode='r')
+            for field in self.fields
+        }
+        shape = (len(self.dates), len(self.symbols))
+        for field, array in self._arrays.items():
+            if array.shape != shape:
+                raise ValueError(f"面板字段 {field} 的形状 {array.shape} 与 meta.json 不一致 {shape}，"
+                                 f"面板可能正在重建，请稍后重新打开")
+
+    @classmethod
+    def build(cls, data_store, panel_dir, symbols=None, start_date=None, dtype='float32'):
+        """
+        从本地K线数据仓库构建面板
+
+        参数:
+            data_store (StockDataStore): 本地K线数据仓库
+            panel_dir (str): 面板保存目录
+            symbols (list): 股票代码列表，默认为数据仓库中的全部股票
+            start_date (str): 起始日期，格式 'YYYYMMDD'，默认保留全部历史
+            dtype (str): 价格字段的数据类型，成交量固定为float64以精确保存整数
+
+        返回:
+            UniversePanel: 构建完成并重新打开的面板
+        """
+        symbols = sorted(symbols or data_store.symbols())
+        frames = {}
+        for symbol in symbols:
+            stock_data = data_store.load(symbol)
+            if stock_data.empty:
+                continue
+            if start_date:
+                stock_data = stock_data[stock_data['date'] >= pd.to_datetime(start_date)]
+            frames[symbol] = stock_data
+        symbols = [symbol for symbol in symbols if symbol in frames]
+
+        dates = pd.DatetimeIndex(sorted(set().union(*(frame['date'] for frame in frames.values()))))
+
+        # 写入临时文件后再替换，其他进程可能正以内存映射方式读取原文件
+        os.makedirs(panel_dir, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        arrays = {}
+        for field in PANEL_FIELDS:
+            field_dtype = 'float64' if field == 'volume' else dtype
+            arrays[field] = np.lib.format.open_memmap(
+                os.path.join(panel_dir, f"{field}.npy{suffix}"), mode='w+',
+                dtype=field_dtype, shape=(len(dates), len(symbols))
+            )
+            arrays[field][:] = np.nan
+
+        for j, symbol in enumerate(symbols):
+            frame = frames[symbol]
+            rows = dates.get_indexer(frame['date'])
+            for field in PANEL_FIELDS:
+                arrays[field][rows, j] = frame[field].to_numpy()
+
+        for array in arrays.values():
+            array.flush()
+        del arrays
+
+        meta_path = os.path.join(panel_dir, 'meta.json')
+        with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump({
+                'dates': dates.strftime('%Y-%m-%d').tolist(),
+                'symbols': symbols,
+                'fields': PANEL_FIELDS,
+            }, f)
+
+        for field in PANEL_FIELDS:
+            path = os.path.join(panel_dir, f"{field}.npy")
+            os.replace(path + suffix, path)
+        os.replace(meta_path + suffix, meta_path)
+
+        return cls(panel_dir)
+
+    def field(self, name):
+        """
+        返回某个字段的 (交易日 × 股票) 只读数组视图
+        """
+        return self._arrays[name]
+
+    def frame(self, name):
+        """
+        返回某个字段的 (交易日 × 股票) DataFrame，数据不复制
+        """
+        return pd.DataFrame(self._arrays[name], index=self.dates, columns=self.symbols, copy=False)
+
+    def symbol_view(self, symbol, name):
+        """
+        返回单只股票某个字段的一维数组视图（按交易日排列，不复制数据）
+        """
+        return self._arrays[name][:, self._symbol_index[symbol]]
+
+    def to_stock_data(self, symbol):
+        """
+        将单只股票转换为 fetch_stock_data 格式的DataFrame（date, open, high, low, close, volume），
+        去掉未上市和停牌的交易日，可直接传给 TechnicalAnalyzer 和 Visualizer
+        """
+        j = self._symbol_index[symbol]
+        close = self._arrays['close'][:, j]
+        rows = np.flatnonzero(~np.isnan(close))
+        stock_data = pd.DataFrame({'date': self.dates[rows]})
+        for name in self.fields:
+            stock_data[name] = self._arrays[name][rows, j]
+        return stock_data
+
+
+_worker_panel = None
+
+
+def _init_worker(panel_dir):
+    # 每个工作进程只打开一次面板
+    global _worker_panel
+    _worker_panel = UniversePanel(panel_dir)
+
+
+def _run_symbol(task):
+    func, symbol = task
+    try:
+        return symbol, func(symbol, _worker_panel.to_stock_data(symbol))
+    except Exception as e:
+        print(f"处理 {symbol} 时出错: {e}")
+        return symbol, None
+
+
+def run_on_panel(func, panel_dir, symbols=None, max_workers=None, chunksize=16):
+    """
+    在多个进程中对面板中的股票逐只执行 func，各进程共享同一份内存映射数据
+
+    参数:
+        func (callable): 模块级函数 func(symbol, stock_data)，需可被pickle
+        panel_dir (str): 面板目录
+        symbols (list): 股票代码列表，默认为面板中的全部股票
+        max_workers (int): 进程数，默认为CPU核数
+        chunksize (int): 每次分发给工作进程的股票数量
+
+    返回:
+        generator: 按输入顺序逐个产出 (symbol, func的返回值)，出错的股票返回None
+    """
+    if symbols is None:
+        symbols = UniversePanel(panel_dir).symbols
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(panel_dir,)) as executor:
+        yield from executor.map(_run_symbol, [(func, symbol) for symbol in symbols],
+                                chunksize=chunksize)
@@ -1,14 +1,131 @@
 import os
+import time
 import matplotlib
 # 确保在导入matplotlib.pyplot之前设置后端
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.path import Path
+from matplotlib.patches import PathPatch
 import pandas as pd
 import numpy as np
 from pyecharts import options as opts
 from pyecharts.charts import Kline, Line, Bar, Grid
 from pyecharts.commons.utils import JsCode
+from pyecharts.globals import CurrentConfig
+from jinja2 import ChoiceLoader, DictLoader
+
+from .symbol_info import get_symbol_info_cache
+from .timeframes import TIMEFRAME_LABELS
+from .render_profiles import RENDER_PROFILES, DEFAULT_RENDER_PROFILE, chart_filename
+
+# 图表中用到的技术指标
+CHART_INDICATORS = [
+    'MA5', 'MA10', 'MA20', 'MA30', 'BOLL_upper', 'BOLL_middle', 'BOLL_lower',
+    'MACD', 'MACD_signal', 'MACD_hist', 'K', 'D', 'J', 'volume_ma5', 'volume_ma10',
+]
+
+# 交互式图表页面的自定义样式和Meta标签，插入在<head>之后
+_INTERACTIVE_HEAD = """
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+        body { 
+            margin: 0; 
+            padding: 0; 
+            font-family: "Microsoft YaHei", Arial, sans-serif; 
+        }
+        .container {
+            width: 100%;
+            height: 100%;
+            padding: 0;
+            margin: 0;
+            overflow: hidden;
+        }
+        /* 标题样式优化 */
+        .title-text {
+            font-size: 16px !important;
+            font-weight: bold !important;
+            padding: 15px 0 !important;
+            margin-bottom: 15px !important;
+        }
+        /* 图例样式优化 */
+        .legend {
+            padding-top: 15px !important;
+            display: flex !important;
+            flex-wrap: wrap !important;
+            justify-content: center !important;
+        }
+        .legend-item {
+            margin: 0 10px !important;
+            display: inline-flex !important;
+            align-items: center !important;
+        }
+        /* 确保各种尺寸屏幕上不出现文字重叠 */
+        @media (max-width: 768px) {
+            .title-text {
+                font-size: 14px !important;
+            }
+            .legend-item {
+                margin: 0 5px !important;
+            }
+        }
+    </style>
+"""
+
+# 图表初始化完成后调整标题和图例样式的脚本，插入在</body>之前
+_INTERACTIVE_SCRIPT = """
+    <script>
+        document.addEventListener('DOMContentLoaded', function() {
+            // 在页面加载完成后执行额外的调整
+            setTimeout(function() {
+                // 处理标题元素
+                var titleElements = document.querySelectorAll('.title');
+                titleElements.forEach(function(el) {
+                    el.classList.add('title-text');
+                });
+                
+                // 处理图例元素
+                var legendElements = document.querySelectorAll('.legend');
+                legendElements.forEach(function(el) {
+                    el.style.paddingTop = '15px';
+                });
+                
+                // 处理图例项
+                var legendItems = document.querySelectorAll('.legend-item');
+                legendItems.forEach(function(el) {
+                    el.style.margin = '0 10px';
+                });
+            }, 500);
+        });
+    </script>
+"""
+
+# 交互式图表页面模板：pyecharts的 simple_chart.html 加上自定义样式和脚本，一次渲染得到完整页面
+INTERACTIVE_TEMPLATE_NAME = 'interactive_chart.html'
+_INTERACTIVE_TEMPLATE = (
+    "{% import 'macro' as macro %}\n"
+    "<!DOCTYPE html>\n"
+    "<html>\n"
+    "<head>\n"
+    + _INTERACTIVE_HEAD +
+    "\n"
+    "    <meta charset=\"UTF-8\">\n"
+    "    <title>{{ chart.page_title }}</title>\n"
+    "    {{ macro.render_chart_dependencies(chart) }}\n"
+    "    {{ macro.render_chart_css(chart) }}\n"
+    "</head>\n"
+    "<body {% if chart.fill_bg %}style=\"background-color: {{ chart.bg_color }}\"{% endif %}>\n"
+    "    {{ macro.render_chart_content(chart) }}\n"
+    + _INTERACTIVE_SCRIPT +
+    "</body>\n"
+    "</html>\n"
+)
+
+# 沿用pyecharts的模板环境设置（空白处理等），优先查找自定义模板
+_PYECHARTS_ENV = CurrentConfig.GLOBAL_ENV.overlay(loader=ChoiceLoader([
+    DictLoader({INTERACTIVE_TEMPLATE_NAME: _INTERACTIVE_TEMPLATE}),
+    CurrentConfig.GLOBAL_ENV.loader,
+]))
 
 class Visualizer:
     """
@@ -23,8 +140,11 @@ class Visualizer:
         plt.rcParams['font.serif'] = ['Times New Roman']
         # 避免内存泄漏警告
         plt.rcParams['figure.max_open_warning'] = 0
+        # 最近一次生成静态图的耗时（秒）：figure 为绘制，其余为各渲染配置的栅格化和保存
+        self.render_times = {}
     
-    def create_charts(self, stock_data, indicators, stock_code, save_path):
+    def create_charts(self, stock_data, indicators, stock_code, save_path, timeframe='daily',
+                      profiles=(DEFAULT_RENDER_PROFILE,), stock_name=None):
         """
         创建K线图和技术指标图表
         
@@ -33,6 +153,10 @@ class Visualizer:
             indicators (dict): 技术指标数据
             stock_code (str): 股票代码
             save_path (str): 保存路径
+            timeframe (str): K线周期，周线、月线、季线会在图表标题中注明
+            profiles (tuple): 静态图的渲染配置（见 render_profiles.RENDER_PROFILES），
+                              同一张图按每个配置各保存一份，例如 ('print', 'llm')
+            stock_name (str): 股票名称，为None时从股票信息缓存中获取
             
         返回:
             str: 图表保存路径
@@ -41,58 +165,53 @@ class Visualizer:
             return ""
         
         # 获取股票名称
-        try:
-            import akshare as ak
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            if not stock_info.empty:
-                stock_name = stock_info.loc[stock_info['item'] == '股票简称', 'value'].values[0]
-            else:
-                stock_name = stock_code
-        except:
-            stock_name = stock_code
+        if stock_name is None:
+            stock_name = get_symbol_info_cache().get_name(stock_code)
+        kline_title = "K线图" if timeframe == 'daily' else f"{TIMEFRAME_LABELS[timeframe]}K线图"
         
         # 创建保存目录
         chart_dir = os.path.join(save_path, 'charts')
         os.makedirs(chart_dir, exist_ok=True)
         
         # 使用matplotlib创建图表
-        self._create_matplotlib_charts(stock_data, indicators, stock_code, stock_name, chart_dir)
+        self._create_matplotlib_charts(stock_data, indicators, stock_code, stock_name, chart_dir, kline_title,
+                                       profiles)
         
         # 使用pyecharts创建交互式图表
-        self._create_pyecharts_charts(stock_data, indicators, stock_code, stock_name, chart_dir)
+        self._create_pyecharts_charts(stock_data, indicators, stock_code, stock_name, chart_dir, kline_title)
         
         return chart_dir
     
-    def _create_matplotlib_charts(self, stock_data, indicators, stock_code, stock_name, save_path):
+    def _create_matplotlib_charts(self, stock_data, indicators, stock_code, stock_name, save_path, kline_title="K线图",
+                                  profiles=(DEFAULT_RENDER_PROFILE,)):
         """
-        使用matplotlib创建图表
+        使用matplotlib创建图表，图形只绘制一次，按各渲染配置的图幅和分辨率分别保存
         """
+        for profile in profiles:
+            if profile not in RENDER_PROFILES:
+                raise ValueError(f"不支持的渲染配置: {profile}，可选: {list(RENDER_PROFILES)}")
+        start = time.perf_counter()
+        
         # 创建一个大图，包含多个子图
-        fig = plt.figure(figsize=(16, 12))
+        fig = plt.figure(figsize=RENDER_PROFILES[profiles[0]]['figsize'])
         
         # 设置网格
         gs = fig.add_gridspec(4, 1, height_ratios=[3, 1, 1, 1])
         
         # 添加K线图和移动平均线
         ax1 = fig.add_subplot(gs[0])
-        ax1.set_title(f"{stock_name}({stock_code}) K线图与技术指标")
-        
-        # 绘制K线图
-        for i in range(len(stock_data)):
-            # 绘制蜡烛图
-            if stock_data['close'].iloc[i] >= stock_data['open'].iloc[i]:
-                # 收盘价大于等于开盘价，为阳线
-                color = 'red'
-            else:
-                # 收盘价小于开盘价，为阴线
-                color = 'green'
-            
-            # 绘制实体部分
-            ax1.plot([i, i], [stock_data['open'].iloc[i], stock_data['close'].iloc[i]], 
-                     color=color, linewidth=8, solid_capstyle='butt')
-            # 绘制上下影线
-            ax1.plot([i, i], [stock_data['low'].iloc[i], stock_data['high'].iloc[i]], 
-                     color=color, linewidth=1)
+        ax1.set_title(f"{stock_name}({stock_code}) {kline_title}与技术指标")
+        
+        # 绘制K线图：收盘价大于等于开盘价为阳线（红），否则为阴线（绿）
+        x = np.arange(len(stock_data))
+        open_ = stock_data['open'].to_numpy(dtype=np.float64)
+        close = stock_data['close'].to_numpy(dtype=np.float64)
+        rising = close >= open_
+        
+        # 同一颜色的实体、上下影线各合并为一条路径，一次绘制全部K线
+        self._plot_segments(ax1, x, open_, close, rising, linewidth=8)
+        self._plot_segments(ax1, x, stock_data['low'].to_numpy(dtype=np.float64),
+                            stock_data['high'].to_numpy(dtype=np.float64), rising, linewidth=1)
         
         # 绘制移动平均线
         ax1.plot(indicators['MA5'], label='MA5', linewidth=1)
@@ -105,21 +224,17 @@ class Visualizer:
         ax1.plot(indicators['BOLL_middle'], label='BOLL中轨', linestyle='-', linewidth=1)
         ax1.plot(indicators['BOLL_lower'], label='BOLL下轨', linestyle='--', linewidth=1)
         
-        # 设置x轴刻度
-        ax1.set_xticks(range(0, len(stock_data), len(stock_data) // 10))
-        ax1.set_xticklabels([d.strftime('%Y-%m-%d') for d in stock_data['date'].iloc[::len(stock_data) // 10]])
+        # 设置x轴刻度，月线、季线的K线数量可能少于10根
+        tick_step = max(len(stock_data) // 10, 1)
+        ax1.set_xticks(range(0, len(stock_data), tick_step))
+        ax1.set_xticklabels([d.strftime('%Y-%m-%d') for d in stock_data['date'].iloc[::tick_step]])
         ax1.legend(loc='best')
         ax1.grid(True)
         
         # 添加成交量图
         ax2 = fig.add_subplot(gs[1], sharex=ax1)
         ax2.set_title("成交量")
-        for i in range(len(stock_data)):
-            if stock_data['close'].iloc[i] >= stock_data['open'].iloc[i]:
-                color = 'red'
-            else:
-                color = 'green'
-            ax2.bar(i, stock_data['volume'].iloc[i], color=color, width=0.8)
+        self._plot_bars(ax2, x, stock_data['volume'].to_numpy(dtype=np.float64), rising)
         
         # 绘制成交量移动平均线
         ax2.plot(indicators['volume_ma5'], label='Volume MA5', color='blue', linewidth=1)
@@ -134,12 +249,8 @@ class Visualizer:
         ax3.plot(indicators['MACD_signal'], label='Signal', color='orange', linewidth=1)
         
         # 绘制MACD柱状图
-        for i in range(len(indicators['MACD_hist'])):
-            if indicators['MACD_hist'].iloc[i] >= 0:
-                color = 'red'
-            else:
-                color = 'green'
-            ax3.bar(i, indicators['MACD_hist'].iloc[i], color=color, width=0.8)
+        macd_hist = np.asarray(indicators['MACD_hist'], dtype=np.float64)
+        self._plot_bars(ax3, np.arange(len(macd_hist)), macd_hist, macd_hist >= 0)
         
         ax3.legend(loc='best')
         ax3.grid(True)
@@ -155,16 +266,91 @@ class Visualizer:
         ax4.legend(loc='best')
         ax4.grid(True)
         
-        # 调整布局
-        plt.tight_layout()
-        
-        # 保存图表
-        plt.savefig(os.path.join(save_path, f"{stock_code}_technical_analysis.png"), dpi=300)
+        self.render_times = {'figure': time.perf_counter() - start}
+        for profile in profiles:
+            spec = RENDER_PROFILES[profile]
+            start = time.perf_counter()
+            # 调整布局
+            fig.set_size_inches(*spec['figsize'])
+            plt.tight_layout()
+            
+            # 保存图表
+            fig.savefig(os.path.join(save_path, chart_filename(stock_code, profile)),
+                        dpi=spec['dpi'], format=spec['format'])
+            self.render_times[profile] = time.perf_counter() - start
         plt.close(fig)  # 关闭图形以释放内存
     
-    def _create_pyecharts_charts(self, stock_data, indicators, stock_code, stock_name, save_path):
+    @staticmethod
+    def _plot_segments(ax, x, bottom, top, rising, linewidth):
         """
-        使用pyecharts创建交互式图表
+        绘制一组竖直线段（K线实体或影线），红、绿两色各用一条以NaN分隔的折线一次绘制，两端为平头
+        
+        与集合（Collection）相比，单条折线在图例自动定位（loc='best'）时只做一次向量化的重叠检测，
+        绘制耗时与K线数量基本无关。
+        """
+        for color, mask in (('red', rising), ('green', ~rising)):
+            if not mask.any():
+                continue
+            count = int(mask.sum())
+            xs = np.column_stack([x[mask], x[mask], np.full(count, np.nan)]).ravel()
+            ys = np.column_stack([bottom[mask], top[mask], np.full(count, np.nan)]).ravel()
+            ax.plot(xs, ys, color=color, linewidth=linewidth, solid_capstyle='butt')
+    
+    @staticmethod
+    def _plot_bars(ax, x, heights, rising, width=0.8):
+        """
+        绘制一组从0开始的柱形（成交量、MACD柱），红、绿两色各合并为一个复合路径一次绘制，
+        效果与逐根调用 bar(x, height, width=0.8) 相同
+        """
+        heights = np.nan_to_num(heights)
+        for color, mask in (('red', rising), ('green', ~rising)):
+            if not mask.any():
+                continue
+            left = x[mask] - width / 2
+            right = x[mask] + width / 2
+            top = heights[mask]
+            zeros = np.zeros(len(top))
+            vertices = np.stack([
+                np.column_stack([left, zeros]),
+                np.column_stack([left, top]),
+                np.column_stack([right, top]),
+                np.column_stack([right, zeros]),
+                np.column_stack([left, zeros]),
+            ], axis=1).reshape(-1, 2)
+            codes = np.tile([Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY], len(top))
+            patch = PathPatch(Path(vertices, codes), facecolor=color, edgecolor='none', linewidth=0)
+            # 与 bar 一致，纵轴不在0以下留白
+            patch.sticky_edges.y.append(0)
+            ax.add_patch(patch)
+        ax.autoscale_view()
+    
+    def create_interactive_chart(self, stock_data, indicators, stock_code, timeframe='daily', stock_name=None):
+        """
+        生成交互式K线图的完整HTML页面，只在内存中生成，不读写文件（供Web和MCP服务直接返回）
+        
+        参数:
+            stock_data (pandas.DataFrame): 股票历史数据
+            indicators (dict): 技术指标数据
+            stock_code (str): 股票代码
+            timeframe (str): K线周期
+            stock_name (str): 股票名称，为None时从股票信息缓存中获取
+            
+        返回:
+            str: HTML文本，数据为空时返回空字符串
+        """
+        if stock_data.empty:
+            return ""
+        if stock_name is None:
+            stock_name = get_symbol_info_cache().get_name(stock_code)
+        kline_title = "K线图" if timeframe == 'daily' else f"{TIMEFRAME_LABELS[timeframe]}K线图"
+        return self._create_pyecharts_charts(stock_data, indicators, stock_code, stock_name, None, kline_title)
+    
+    def _create_pyecharts_charts(self, stock_data, indicators, stock_code, stock_name, save_path, kline_title="K线图"):
+        """
+        使用pyecharts创建交互式图表，自定义样式和脚本在模板中一次渲染，save_path 为None时不写文件
+        
+        返回:
+            str: HTML文本
         """
         # 准备数据
         dates = stock_data['date'].dt.strftime('%Y-%m-%d').tolist()
@@ -190,7 +376,7 @@ class Visualizer:
         # K线图设置标题
         kline.set_global_opts(
             title_opts=opts.TitleOpts(
-                title=f"{stock_name}({stock_code}) K线图与成交量分析", 
+                title=f"{stock_name}({stock_code}) {kline_title}与成交量分析", 
                 pos_left="center",
                 padding=[10, 0, 0, 0],
                 pos_top="1%"
@@ -309,96 +495,8 @@ class Visualizer:
             height="20%"  # 占整体高度的比例
         ))
         
-        # 保存图表
-        grid.render(os.path.join(save_path, f"{stock_code}_interactive_chart.html"))
-        
-        # 读取生成的HTML文件，添加自适应大小的脚本
-        html_path = os.path.join(save_path, f"{stock_code}_interactive_chart.html")
-        try:
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-                
-            # 添加自定义样式和Meta标签
-            meta_tags = """
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        body { 
-            margin: 0; 
-            padding: 0; 
-            font-family: "Microsoft YaHei", Arial, sans-serif; 
-        }
-        .container {
-            width: 100%;
-            height: 100%;
-            padding: 0;
-            margin: 0;
-            overflow: hidden;
-        }
-        /* 标题样式优化 */
-        .title-text {
-            font-size: 16px !important;
-            font-weight: bold !important;
-            padding: 15px 0 !important;
-            margin-bottom: 15px !important;
-        }
-        /* 图例样式优化 */
-        .legend {
-            padding-top: 15px !important;
-            display: flex !important;
-            flex-wrap: wrap !important;
-            justify-content: center !important;
-        }
-        .legend-item {
-            margin: 0 10px !important;
-            display: inline-flex !important;
-            align-items: center !important;
-        }
-        /* 确保各种尺寸屏幕上不出现文字重叠 */
-        @media (max-width: 768px) {
-            .title-text {
-                font-size: 14px !important;
-            }
-            .legend-item {
-                margin: 0 5px !important;
-            }
-        }
-    </style>
-"""
-            # 在head标签后插入
-            html_content = html_content.replace('<head>', '<head>\n' + meta_tags)
-            
-            # 添加初始化完成后的图表调整脚本
-            adjust_script = """
-    <script>
-        document.addEventListener('DOMContentLoaded', function() {
-            // 在页面加载完成后执行额外的调整
-            setTimeout(function() {
-                // 处理标题元素
-                var titleElements = document.querySelectorAll('.title');
-                titleElements.forEach(function(el) {
-                    el.classList.add('title-text');
-                });
-                
-                // 处理图例元素
-                var legendElements = document.querySelectorAll('.legend');
-                legendElements.forEach(function(el) {
-                    el.style.paddingTop = '15px';
-                });
-                
-                // 处理图例项
-                var legendItems = document.querySelectorAll('.legend-item');
-                legendItems.forEach(function(el) {
-                    el.style.margin = '0 10px';
-                });
-            }, 500);
-        });
-    </script>
-"""
-            # 在</body>标签之前插入
-            html_content = html_content.replace('</body>', adjust_script + '</body>')
-            
-            # 写回文件
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-        except Exception as e:
-            print(f"修改HTML文件时出错: {e}")
\ No newline at end of file
+        html = grid.render_embed(template_name=INTERACTIVE_TEMPLATE_NAME, env=_PYECHARTS_ENV)
+        if save_path:
+            with open(os.path.join(save_path, f"{stock_code}_interactive_chart.html"), 'w', encoding='utf-8') as f:
+                f.write(html)
+        return html
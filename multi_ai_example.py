@@ -11,7 +11,9 @@ from dotenv import load_dotenv
 
 from modules.data_fetcher import StockDataFetcher
 from modules.technical_analyzer import TechnicalAnalyzer
+from modules.indicator_cache import get_default_indicator_cache
 from modules.visualizer import Visualizer
+from modules.render_profiles import DEFAULT_RENDER_PROFILE, LLM_RENDER_PROFILE
 from modules.ai_analyzer import AIAnalyzer
 
 # 加载环境变量
@@ -29,7 +31,7 @@ def analyze_with_multiple_providers(stock_code, period='1年', save_path='./outp
     
     # 初始化数据获取和分析模块
     data_fetcher = StockDataFetcher()
-    technical_analyzer = TechnicalAnalyzer()
+    technical_analyzer = TechnicalAnalyzer(cache=get_default_indicator_cache())
     visualizer = Visualizer()
     
     # 获取股票数据
@@ -51,7 +53,8 @@ def analyze_with_multiple_providers(stock_code, period='1年', save_path='./outp
     
     # 生成可视化图表
     print("正在生成K线图和技术指标图...")
-    chart_path = visualizer.create_charts(stock_data, indicators, stock_code, save_path)
+    chart_path = visualizer.create_charts(stock_data, indicators, stock_code, save_path,
+                                          profiles=(DEFAULT_RENDER_PROFILE, LLM_RENDER_PROFILE))
     
     # 显示可用的AI供应商状态
     print("\n当前AI供应商状态:")
@@ -132,7 +135,7 @@ def analyze_with_specific_provider(stock_code, provider='siliconflow', period='1
     
     # 初始化各模块
     data_fetcher = StockDataFetcher()
-    technical_analyzer = TechnicalAnalyzer()
+    technical_analyzer = TechnicalAnalyzer(cache=get_default_indicator_cache())
     visualizer = Visualizer()
     ai_analyzer = AIAnalyzer(provider=provider)
     
@@ -151,7 +154,8 @@ def analyze_with_specific_provider(stock_code, provider='siliconflow', period='1
     
     # 生成可视化图表
     print("正在生成K线图和技术指标图...")
-    chart_path = visualizer.create_charts(stock_data, indicators, stock_code, save_path)
+    chart_path = visualizer.create_charts(stock_data, indicators, stock_code, save_path,
+                                          profiles=(DEFAULT_RENDER_PROFILE, LLM_RENDER_PROFILE))
     
     # AI分析预测
     print("正在使用AI分析预测未来走势...")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI看线 - 全市场信号选股
+
+在本地数据仓库构建的全市场面板上对所有股票同时求值信号表达式，输出按排序依据排列的命中股票。
+表达式语法见 modules/screener.py 中的 SignalExpression，可直接引用预置信号。
+
+    python screen.py "macd_golden_cross and RSI6 < 30"
+    python screen.py "close < BOLL_lower or kdj_oversold" --sort_by RSI6 --ascending --limit 20
+    python screen.py --list_presets
+"""
+
+import argparse
+import pandas as pd
+
+from modules.screener import SignalScreener, SIGNAL_PRESETS, DEFAULT_SORT_BY
+from modules.symbol_info import get_symbol_info_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AI看线 - 全市场信号选股')
+    parser.add_argument('expression', type=str, nargs='?', help='信号表达式，例如："macd_golden_cross and RSI6 < 30"')
+    parser.add_argument('--sort_by', type=str, default=DEFAULT_SORT_BY, help='排序表达式，默认为相对成交量')
+    parser.add_argument('--ascending', action='store_true', help='按升序排列')
+    parser.add_argument('--limit', type=int, default=50, help='最多输出的股票数量')
+    parser.add_argument('--date', type=str, help='筛选日期，默认为最近一个交易日')
+    parser.add_argument('--data_dir', type=str, default='./data', help='本地数据目录')
+    parser.add_argument('--rebuild', action='store_true', help='强制从本地数据仓库重建全市场面板')
+    parser.add_argument('--with_names', action='store_true', help='输出股票名称')
+    parser.add_argument('--list_presets', action='store_true', help='显示所有预置信号')
+    args = parser.parse_args()
+
+    if args.list_presets:
+        for name, expression in SIGNAL_PRESETS.items():
+            print(f"{name:20s} {expression}")
+        return
+    if not args.expression:
+        parser.error('请输入信号表达式')
+
+    screener = SignalScreener(data_dir=args.data_dir)
+    try:
+        result = screener.screen(args.expression, sort_by=args.sort_by, ascending=args.ascending,
+                                 limit=args.limit, date=args.date, rebuild=args.rebuild)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    if result.empty:
+        print("未找到满足条件的股票")
+        return
+
+    if args.with_names:
+        symbol_info = get_symbol_info_cache()
+        result.insert(1, 'name', [symbol_info.get_name(symbol) for symbol in result['symbol']])
+    print(f"✅ {result['date'].iloc[0]:%Y-%m-%d} 满足条件 {args.expression} 的股票（按 {args.sort_by} 排序，显示 {len(result)} 只）：")
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(result.drop(columns='date').to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
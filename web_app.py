@@ -1,12 +1,20 @@
 import os
+import re
 import json
 import matplotlib
 matplotlib.use('Agg')
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 from modules.data_fetcher import StockDataFetcher
 from modules.technical_analyzer import TechnicalAnalyzer
+from modules.timeframes import TIMEFRAMES
+from modules.indicator_cache import get_default_indicator_cache
 from modules.visualizer import Visualizer
+from modules.render_profiles import LLM_RENDER_PROFILE, chart_filename
+from modules.artifact_store import get_default_artifact_store
 from modules.ai_analyzer import AIAnalyzer
+from modules.symbol_info import get_symbol_info_cache
+from modules.single_flight import SingleFlight
+from modules.screener import get_default_screener, SIGNAL_PRESETS, DEFAULT_SORT_BY
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -20,8 +28,12 @@ os.makedirs('./output/charts', exist_ok=True)
 
 # 初始化各模块
 data_fetcher = StockDataFetcher()
-technical_analyzer = TechnicalAnalyzer()
+technical_analyzer = TechnicalAnalyzer(cache=get_default_indicator_cache())
 visualizer = Visualizer()
+artifact_store = get_default_artifact_store()
+
+# 合并同一只股票的并发分析请求
+analysis_flight = SingleFlight()
 
 @app.route('/')
 def index():
@@ -48,78 +60,145 @@ def analyze():
     data = request.form
     stock_code = data.get('stock_code')
     period = data.get('period', '1年')
-    ai_provider = data.get('ai_provider', 'auto')  # 新增AI供应商选择
+    ai_provider = data.get('ai_provider', 'auto') or 'auto'  # 新增AI供应商选择
     save_path = './output'
     
     if not stock_code:
         return jsonify({'error': '请输入股票代码'}), 400
     
     try:
-        # 创建AI分析器
-        try:
-            if ai_provider == 'auto' or ai_provider == '':
-                ai_analyzer = AIAnalyzer()
-            else:
-                ai_analyzer = AIAnalyzer(provider=ai_provider)
-                
-            # 获取使用的供应商信息
-            provider_info = ai_analyzer.get_provider_info()
-            print('$$$$$$$$$$$$$$')
-            print(provider_info)
+        # 相同股票、周期和AI供应商的并发请求只执行一次分析流程，共享结果
+        payload, status = analysis_flight.do(
+            (stock_code, period, ai_provider),
+            run_analysis, stock_code, period, ai_provider, save_path
+        )
+        return jsonify(payload), status
+    
+    except Exception as e:
+        return jsonify({'error': f'分析过程中出错: {str(e)}'}), 500
+
+def run_analysis(stock_code, period, ai_provider, save_path):
+    """
+    执行完整的分析流程：获取数据、计算指标、生成图表、AI分析
+    
+    返回:
+        tuple: (响应数据字典, HTTP状态码)
+    """
+    # 创建AI分析器
+    try:
+        if ai_provider == 'auto':
+            ai_analyzer = AIAnalyzer()
+        else:
+            ai_analyzer = AIAnalyzer(provider=ai_provider)
             
-        except Exception as e:
-            return jsonify({'error': f'AI分析器初始化失败: {str(e)}'}), 500
-        
-        # 获取股票数据
-        stock_data = data_fetcher.fetch_stock_data(stock_code, period)
-        
-        if stock_data.empty:
-            return jsonify({'error': f'未找到股票 {stock_code} 的数据'}), 404
-        
-        # 获取财务和新闻数据
-        financial_data = data_fetcher.fetch_financial_data(stock_code)
-        news_data = data_fetcher.fetch_news_data(stock_code)
-        
-        # 计算技术指标
-        indicators = technical_analyzer.calculate_indicators(stock_data)
-        
-        # 生成可视化图表
-        chart_path = visualizer.create_charts(stock_data, indicators, stock_code, save_path)
+        # 获取使用的供应商信息
+        provider_info = ai_analyzer.get_provider_info()
+        print('$$$$$$$$$$$$$$')
+        print(provider_info)
         
-        # AI分析预测
-        analysis_result = ai_analyzer.analyze(
-            stock_data, indicators, financial_data, news_data, stock_code, save_path
+    except Exception as e:
+        return {'error': f'AI分析器初始化失败: {str(e)}'}, 500
+    
+    # 获取股票数据
+    stock_data = data_fetcher.fetch_stock_data(stock_code, period)
+    
+    if stock_data.empty:
+        return {'error': f'未找到股票 {stock_code} 的数据'}, 404
+    
+    # 获取财务和新闻数据
+    financial_data = data_fetcher.fetch_financial_data(stock_code)
+    news_data = data_fetcher.fetch_news_data(stock_code)
+    
+    # 计算技术指标，按需计算图表和AI分析实际用到的指标
+    indicators = technical_analyzer.calculate_indicators(stock_data, lazy=True)
+    
+    # 生成可视化图表，相同输入已生成过时直接复用
+    # 页面展示使用web配置，多模态分析使用llm配置
+    chart_key = artifact_store.charts(visualizer, stock_data, indicators, stock_code, period,
+                                      profiles=('web', LLM_RENDER_PROFILE),
+                                      registry=technical_analyzer.registry)
+    
+    # AI分析预测，结果保存在产物仓库中
+    analysis_key, analysis_result = artifact_store.analysis(
+        ai_analyzer, stock_data, indicators, financial_data, news_data, stock_code, period, chart_key=chart_key,
+        registry=technical_analyzer.registry
+    )
+    
+    # 准备返回数据：图表以 {产物键}/charts/{文件名} 的形式由 /artifacts/ 提供
+    llm_chart = os.path.join('charts', chart_filename(stock_code, LLM_RENDER_PROFILE))
+    chart_files = [
+        f"{chart_key}/{file}" for file in artifact_store.files(chart_key)
+        if file != llm_chart and (file.endswith('.png') or file.endswith('.html'))
+    ]
+    
+    return {
+        'success': True,
+        'stock_code': stock_code,
+        'charts': chart_files,
+        'artifacts': {'charts': chart_key, 'analysis': analysis_key},
+        'analysis_result': analysis_result,
+        'provider_info': provider_info,  # 返回使用的AI供应商信息
+        'data_stats': {  # 添加数据统计信息
+            'data_points': len(stock_data),
+            'financial_items': len(financial_data) if financial_data else 0,
+            'news_items': len(news_data) if news_data else 0,
+            'indicators_count': len(indicators) if indicators else 0
+        }
+    }, 200
+
+@app.route('/api/screen', methods=['GET', 'POST'])
+def screen():
+    """全市场信号选股API"""
+    data = request.values
+    expression = data.get('expression')
+    if not expression:
+        return jsonify({'error': '请输入信号表达式', 'presets': SIGNAL_PRESETS}), 400
+    
+    try:
+        result = get_default_screener().screen(
+            expression,
+            sort_by=data.get('sort_by') or DEFAULT_SORT_BY,
+            ascending=data.get('ascending', 'false').lower() == 'true',
+            limit=int(data.get('limit', 50)),
+            date=data.get('date') or None,
         )
-        
-        # 保存分析结果
-        result_path = os.path.join(save_path, f"{stock_code}_analysis_result.txt")
-        with open(result_path, 'w', encoding='utf-8') as f:
-            f.write(analysis_result)
-        
-        # 准备返回数据
-        chart_files = []
-        charts_dir = os.path.join(save_path, 'charts')
-        if os.path.exists(charts_dir):
-            for file in os.listdir(charts_dir):
-                if file.startswith(stock_code) and (file.endswith('.png') or file.endswith('.html')):
-                    chart_files.append(file)
-        
-        return jsonify({
-            'success': True,
-            'stock_code': stock_code,
-            'charts': chart_files,
-            'analysis_result': analysis_result,
-            'provider_info': provider_info,  # 返回使用的AI供应商信息
-            'data_stats': {  # 添加数据统计信息
-                'data_points': len(stock_data),
-                'financial_items': len(financial_data) if financial_data else 0,
-                'news_items': len(news_data) if news_data else 0,
-                'indicators_count': len(indicators) if indicators else 0
-            }
-        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'选股过程中出错: {str(e)}'}), 500
     
+    result['date'] = result['date'].dt.strftime('%Y-%m-%d')
+    return jsonify({
+        'success': True,
+        'expression': expression,
+        'count': len(result),
+        'matches': json.loads(result.to_json(orient='records', force_ascii=False))
+    })
+
+@app.route('/api/chart/<stock_code>')
+def interactive_chart(stock_code):
+    """交互式K线图，HTML在内存中生成后直接返回，不写文件"""
+    period = request.args.get('period', '1年')
+    timeframe = request.args.get('timeframe', 'daily')
+    if timeframe not in TIMEFRAMES:
+        return jsonify({'error': f'不支持的K线周期: {timeframe}'}), 400
+    
+    try:
+        stock_data = data_fetcher.fetch_stock_data(stock_code, period, timeframe=timeframe)
+        if stock_data.empty:
+            return jsonify({'error': f'未找到股票 {stock_code} 的数据'}), 404
+        indicators = technical_analyzer.calculate_indicators(stock_data, lazy=True)
+        html = visualizer.create_interactive_chart(stock_data, indicators, stock_code, timeframe=timeframe)
     except Exception as e:
-        return jsonify({'error': f'分析过程中出错: {str(e)}'}), 500
+        return jsonify({'error': f'生成图表时出错: {str(e)}'}), 500
+    return Response(html, mimetype='text/html')
+
+@app.route('/artifacts/<key>/<path:filename>')
+def serve_artifact(key, filename):
+    """按产物键提供图表和分析结果文件"""
+    if not re.fullmatch(r'[0-9a-f]{32}', key):
+        return jsonify({'error': '无效的产物键'}), 404
+    return send_from_directory(os.path.abspath(artifact_store.root), f"{key}/{filename}")
 
 @app.route('/output/charts/<path:filename>')
 def serve_chart(filename):
@@ -130,14 +209,8 @@ def serve_chart(filename):
 def get_stock_info(stock_code):
     """获取股票基本信息"""
     try:
-        import akshare as ak
-        stock_info = ak.stock_individual_info_em(symbol=stock_code)
-        if not stock_info.empty:
-            # 转换为字典列表
-            info_dict = {
-                row['item']: row['value'] 
-                for _, row in stock_info.iterrows()
-            }
+        info_dict = get_symbol_info_cache().get_info(stock_code)
+        if info_dict:
             return jsonify({'success': True, 'data': info_dict})
         else:
             return jsonify({'error': f'未找到股票 {stock_code} 的信息'}), 404